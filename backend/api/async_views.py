@@ -0,0 +1,50 @@
+"""
+DRF views with coroutine handlers.
+
+AsyncAPIView keeps DRF's request parsing, authentication, permissions,
+throttling, exception handling and content negotiation, but its get()/
+post()/... handlers are `async def`. Served under ASGI the view does not
+hold a worker thread while its queries run, and the handler can await
+several independent queries at once (see api.concurrency.gather()).
+
+    class PatientTimelineView(AsyncAPIView):
+        async def get(self, request, pk):
+            ...
+            return Response(data)
+
+Authentication and permission checks may query the database (loading the
+JWT user), so they run in the request's thread-sensitive executor, where
+django-tenants has already set the tenant's schema on the connection.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose dispatch and handlers are coroutines"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,194 @@
+"""
+Batch requests: several API calls in one round trip.
+
+    POST /api/batch/
+    {
+        "atomic": true,
+        "operations": [
+            {"method": "POST", "path": "/api/assessments/barthel/", "body": {...}},
+            {"method": "PATCH", "path": "/api/patients/<id>/", "body": {"precautions": [...]},
+             "headers": {"If-Match": "W/\"...\""}}
+        ]
+    }
+
+Each operation is dispatched straight to the view its path resolves to,
+without going through the middleware again: the batch request's tenant,
+authenticated user, audit actor and headers (X-PHI-Access-Reason, Accept)
+apply to every operation, so JWT verification, tenant resolution and the
+middleware stack run once per batch instead of once per call.
+
+Operations run in order, each in its own savepoint, so a failed one
+(status >= 400) leaves nothing behind. With "atomic": true they also share
+one transaction: the first failure rolls back the operations before it and
+the rest are not run (status 424).
+
+The response holds one result per operation, in order:
+{"id", "status", "headers": {ETag, Last-Modified, Location}, "body"}.
+"""
+import io
+import json
+import logging
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+from api.concurrency import on_request_connection
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Headers an operation may set for itself (conditional requests); all
+# others come from the batch request
+OPERATION_HEADERS = ('If-Match', 'If-None-Match', 'If-Modified-Since', 'If-Unmodified-Since')
+
+# Response headers copied into each result
+RESULT_HEADERS = ('ETag', 'Last-Modified', 'Location')
+
+# Batch request META that describes the batch itself, not its operations
+_BATCH_META = {
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'QUERY_STRING',
+    *(f'HTTP_{name.upper().replace("-", "_")}' for name in OPERATION_HEADERS),
+}
+
+
+class OperationSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=100)
+    method = serializers.ChoiceField(choices=METHODS)
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def validate_path(self, path):
+        if not path.startswith('/api/'):
+            raise serializers.ValidationError('Only /api/ paths can be batched')
+        return path
+
+    def validate_headers(self, headers):
+        allowed = {name.lower() for name in OPERATION_HEADERS}
+        unknown = [name for name in headers if name.lower() not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f'Only {", ".join(OPERATION_HEADERS)} may be set per operation')
+        return headers
+
+
+class BatchSerializer(serializers.Serializer):
+    atomic = serializers.BooleanField(default=False)
+    operations = OperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(f'At most {settings.BATCH_MAX_OPERATIONS} operations per batch')
+        return operations
+
+
+def _operation_request(request, operation, path, query):
+    """A Django request for `operation`, sharing the batch request's tenant, user and headers"""
+    parent = request._request
+    body = b''
+    if operation.get('body') is not None:
+        body = json.dumps(operation['body'], cls=JSONEncoder).encode()
+    environ = {key: value for key, value in parent.META.items() if key not in _BATCH_META}
+    environ.update({
+        'REQUEST_METHOD': operation['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': parent.scheme,
+    })
+    for name, value in operation.get('headers', {}).items():
+        environ[f'HTTP_{name.upper().replace("-", "_")}'] = value
+
+    sub_request = WSGIRequest(environ)
+    for attribute in ('tenant', 'urlconf', 'session'):
+        if hasattr(parent, attribute):
+            setattr(sub_request, attribute, getattr(parent, attribute))
+    # DRF skips its authenticators for a forced user: the batch request's credentials were already checked
+    sub_request.user = request.user
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def _result_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if response.streaming or not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset, errors='replace')
+
+
+def _error(status, detail):
+    return {'status': status, 'headers': {}, 'body': {'detail': detail}}
+
+
+def run_operation(request, operation):
+    """Dispatch one operation to its view in a savepoint; return its result"""
+    path, _, query = operation['path'].partition('?')
+    try:
+        match = resolve(path, urlconf=getattr(request._request, 'urlconf', None))
+    except Resolver404:
+        return _error(404, 'Not found.')
+    if getattr(match.func, 'view_class', None) is BatchView:
+        return _error(400, 'Batches cannot be nested')
+
+    sub_request = _operation_request(request, operation, path, query)
+    sub_request.resolver_match = match
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    try:
+        with transaction.atomic():
+            response = view(sub_request, *match.args, **match.kwargs)
+            if response.status_code >= 400:
+                transaction.set_rollback(True)
+    except Exception:
+        logger.exception('Batch operation %s %s failed', operation['method'], operation['path'])
+        return _error(500, 'A server error occurred.')
+
+    return {
+        'status': response.status_code,
+        'headers': {name: response[name] for name in RESULT_HEADERS if response.has_header(name)},
+        'body': _result_body(response),
+    }
+
+
+class BatchView(APIView):
+    """Run up to BATCH_MAX_OPERATIONS API calls in one request (see api.batch)"""
+
+    def post(self, request):
+        batch = BatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        atomic = batch.validated_data['atomic']
+        operations = batch.validated_data['operations']
+
+        results = []
+        rolled_back = False
+        if atomic:
+            # Later operations must see earlier ones' uncommitted writes
+            with transaction.atomic(), on_request_connection():
+                for operation in operations:
+                    results.append(run_operation(request, operation))
+                    if results[-1]['status'] >= 400:
+                        transaction.set_rollback(True)
+                        rolled_back = True
+                        break
+            for operation in operations[len(results):]:
+                results.append(_error(424, 'Not run: an earlier operation in the atomic batch failed'))
+        else:
+            results = [run_operation(request, operation) for operation in operations]
+
+        for operation, result in zip(operations, results):
+            if 'id' in operation:
+                result['id'] = operation['id']
+        return Response({'atomic': atomic, 'rolled_back': rolled_back, 'results': results})
@@ -0,0 +1,109 @@
+"""
+Run a request's independent ORM queries concurrently.
+
+The async ORM (aget(), acount(), async for) sends every query of a request
+through the same thread-sensitive executor thread, so awaiting several of
+them with asyncio.gather() still runs them one after another on one
+connection. gather() instead runs each query function on a thread of a
+shared pool, each thread using its own database connection, and awaits
+them together:
+
+    patient, katz, fim = await gather(
+        request,
+        lambda: Patient.objects.get(pk=pk),
+        lambda: list(KatzADLAssessment.objects.filter(patient_id=pk)),
+        lambda: list(FIMAssessment.objects.filter(patient_id=pk)),
+    )
+
+django-tenants keeps the search_path on the connection, so each worker
+switches its connection to the request tenant's schema before running the
+function. Query counts and DB time still land in the request's stats.
+
+With API_CONCURRENT_QUERIES off, or inside on_request_connection(), the
+functions run one after another on the request's own connection (the test
+settings do this: an uncommitted test transaction is invisible to other
+connections; so does an atomic batch, see api.batch).
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from monitoring import profiling
+from monitoring.instrumentation import get_current_stats
+from organizations.utils import is_multi_tenant, schema_context
+
+_executor = None
+_executor_lock = threading.Lock()
+_request_connection_only = contextvars.ContextVar('api_request_connection_only', default=False)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.API_QUERY_WORKERS, thread_name_prefix='api-query')
+    return _executor
+
+
+def request_schema(request):
+    """Schema name of the request's tenant (None without django-tenants)"""
+    if not is_multi_tenant():
+        return None
+    return request.tenant.schema_name
+
+
+def _close_obsolete_connections():
+    # Same connection housekeeping Django does around each request
+    for conn in connections.all(initialized_only=True):
+        conn.close_if_unusable_or_obsolete()
+
+
+@contextlib.contextmanager
+def on_request_connection():
+    """Make gather() run its functions on the request's connection, which sees its open transaction"""
+    token = _request_connection_only.set(True)
+    try:
+        yield
+    finally:
+        _request_connection_only.reset(token)
+
+
+def _run(schema_name, func):
+    _close_obsolete_connections()
+    try:
+        with ExitStack() as stack:
+            stats = get_current_stats()
+            if stats is not None:
+                # All aliases: the function may read from the replica (organizations.routers)
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+            stack.enter_context(schema_context(schema_name))
+            stack.enter_context(profiling.sampling_current_thread())
+            return func()
+    finally:
+        _close_obsolete_connections()
+
+
+async def gather(request, *funcs):
+    """Run each sync function's queries concurrently; return their results in order"""
+    if not settings.API_CONCURRENT_QUERIES or _request_connection_only.get() or len(funcs) < 2:
+        return [await sync_to_async(func)() for func in funcs]
+
+    schema_name = request_schema(request)
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    return await asyncio.gather(*(
+        # Each call gets its own copy of the context (request stats, audit actor)
+        loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, _run, schema_name, func))
+        for func in funcs
+    ))
@@ -0,0 +1,125 @@
+"""
+Conditional GET: ETag and Last-Modified validators for API resources.
+
+A resource's version comes from columns that change whenever its
+representation does, never from the serialized body, so a revalidation is
+answered with 304 Not Modified after a small version query instead of
+loading and serializing the full rows:
+
+- one row: its (id, updated_at), which also gives Last-Modified;
+- a collection: collection_version() of its queryset, the row count plus the
+  newest updated_at, which changes when a row is added, edited or deleted.
+  A deletion does not move the newest updated_at, so collections only send
+  an ETag.
+- a keyset page: page_version(), the (id, updated_at) of the rows on the
+  page plus which links it has, so it costs a page query, not a count of
+  everything before and after it.
+
+    validators = Validators(request, *collection_version(queryset))
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    ...
+    return validators.apply(Response(data))
+
+Views only query the version up front when the request carries
+If-None-Match or If-Modified-Since (is_conditional()); a plain GET takes
+the version from the rows it loads anyway. A 304 sends no PHI, so it does
+not record a PHI access. Bump REPRESENTATION_VERSION whenever serialized
+output changes, so clients drop copies made by the previous release.
+
+Each revalidation is counted as a hit (304) or miss of the `api` cache in
+ot_cache_requests_total (record_revalidation()).
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+from monitoring import metrics
+
+REPRESENTATION_VERSION = 3
+
+
+def is_conditional(request):
+    """Return True if the client sent validators to check"""
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def record_revalidation(request, response, cache='api'):
+    """Count a conditional request as a hit of the client's cached copy (a 304) or a miss"""
+    if is_conditional(request):
+        hit = response is not None and response.status_code == 304
+        metrics.cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def collection_version(queryset):
+    """(row count, newest updated_at) of `queryset`, in one aggregate query"""
+    version = queryset.order_by().aggregate(count=Count('pk'), latest=Max('updated_at'))
+    return version['count'], version['latest']
+
+
+def rows_version(rows):
+    """collection_version() of already loaded rows"""
+    return len(rows), max((row.updated_at for row in rows), default=None)
+
+
+def page_version(paginator, rows):
+    """Version of a KeysetPagination page: its rows' (id, updated_at) and its links"""
+    links = (paginator.has_next, paginator.has_previous, paginator.total_estimate)
+    return (*links, *((str(row.pk), row.updated_at) for row in rows))
+
+
+def page_validators(view, queryset):
+    """Validators of the requested page of `queryset`, loading only its sort columns and updated_at"""
+    columns = {name.lstrip('-') for name in queryset.query.order_by}
+    rows = view.paginate_queryset(queryset.only(*columns, 'updated_at'))
+    return Validators(view.request, *page_version(view.paginator, rows))
+
+
+class Validators:
+    """The ETag (and for single rows, Last-Modified) of one version of a resource"""
+
+    def __init__(self, request, *version, last_modified=None):
+        # The query string selects pages, filters and fields of the same path, the
+        # negotiated renderer its format
+        renderer_format = getattr(getattr(request, 'accepted_renderer', None), 'format', None)
+        parts = (REPRESENTATION_VERSION, request.get_full_path(), renderer_format, *version)
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        self.etag = f'W/"{digest}"'
+        self.last_modified = last_modified
+
+    def not_modified(self, request):
+        """A 304 (or 412 for a failed If-Match) response if the request's validators say so, else None"""
+        timestamp = int(self.last_modified.timestamp()) if self.last_modified is not None else None
+        response = get_conditional_response(request, etag=self.etag, last_modified=timestamp)
+        record_revalidation(request, response)
+        return self.apply(response) if response is not None else None
+
+    def precondition_failed(self, request):
+        """
+        A 412 response if the request's If-Match names another version, else None.
+
+        Unlike get_conditional_response(), which compares If-Match strongly and
+        so never matches a weak ETag, the comparison is weak: a write needs
+        the version of the resource to match, not the bytes of a response.
+        """
+        header = request.META.get('HTTP_IF_MATCH')
+        if header is None:
+            return None
+        etags = parse_etags(header)
+        if '*' in etags or any(etag.removeprefix('W/') == self.etag.removeprefix('W/') for etag in etags):
+            return None
+        return self.apply(HttpResponse(status=412))
+
+    def apply(self, response):
+        """Add the validators and caching headers to `response`"""
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        # PHI: the client may keep a private copy but must revalidate before reusing it
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
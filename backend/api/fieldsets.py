@@ -0,0 +1,111 @@
+"""
+Sparse fieldsets: let clients ask for part of a resource.
+
+?fields=id,full_name,age picks serializer fields by name; ?profile=list picks
+a named set of them. Each serializer declares its profiles, and the sources
+of fields that are computed from other columns, on its Meta:
+
+    class Meta:
+        model = Patient
+        fields = '__all__'
+        profiles = {'list': ('id', 'full_name', 'age', ...), 'full': ALL}
+        sources = {'full_name': ('first_name', 'middle_name', 'last_name'), 'age': ('date_of_birth',)}
+
+The selection trims the serializer output and, through only(), the columns
+the queryset loads. A selected field that is neither a model column nor in
+Meta.sources loads every column, so leaving a source out costs speed, not
+correctness. Unknown fields and profiles are a 400.
+
+Generic views mix in SparseFieldsMixin; other views call select_fields()
+and load_only() themselves.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+PROFILE_PARAM = 'profile'
+
+# Profile value meaning every field of the serializer
+ALL = None
+
+
+def select_fields(serializer_class, request, default_profile='full'):
+    """Names of the fields the request selects from `serializer_class`, or ALL"""
+    available = serializer_class().fields
+    requested = request.query_params.get(FIELDS_PARAM)
+    if requested:
+        names = tuple(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: [f'Unknown field {name!r}' for name in unknown]})
+        return names
+
+    profiles = serializer_class.Meta.profiles
+    profile = request.query_params.get(PROFILE_PARAM, default_profile)
+    if profile not in profiles:
+        raise ValidationError({PROFILE_PARAM: [f'Unknown profile {profile!r}; choose from {", ".join(profiles)}']})
+    return profiles[profile]
+
+
+def columns(serializer_class, fields):
+    """Model fields to load for serializing `fields`, or ALL"""
+    if fields is ALL:
+        return ALL
+    model = serializer_class.Meta.model
+    sources = getattr(serializer_class.Meta, 'sources', {})
+    concrete = {field.name for field in model._meta.concrete_fields}
+    needed = {model._meta.pk.name}
+    for name in fields:
+        if name in sources:
+            needed.update(sources[name])
+        elif name in concrete:
+            needed.add(name)
+        else:
+            return ALL
+    return needed
+
+
+def load_only(queryset, serializer_class, fields, *extra):
+    """`queryset` loading only what `fields` (plus `extra` and its ordering columns) need"""
+    needed = columns(serializer_class, fields)
+    if needed is ALL:
+        return queryset
+    ordering = (name.lstrip('-') for name in queryset.query.order_by)
+    return queryset.only(*needed, *extra, *ordering)
+
+
+class SparseFieldsSerializerMixin:
+    """Serializer that only outputs the field names passed as `fields` (ALL for every field)"""
+
+    def __init__(self, *args, fields=ALL, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not ALL:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """
+    Generic view support: get_serializer() trims to the selected fields and
+    load_only() narrows a queryset to them. default_profile applies when the
+    request names neither fields nor a profile. Writes take and return every
+    field.
+    """
+
+    default_profile = 'full'
+
+    @property
+    def selected_fields(self):
+        if not hasattr(self, '_selected_fields'):
+            if self.request.method in SAFE_METHODS:
+                self._selected_fields = select_fields(self.get_serializer_class(), self.request, self.default_profile)
+            else:
+                self._selected_fields = ALL
+        return self._selected_fields
+
+    def load_only(self, queryset, *extra):
+        return load_only(queryset, self.get_serializer_class(), self.selected_fields, *extra)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.selected_fields)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,91 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses response bodies of at least
+RESPONSE_COMPRESSION_MIN_BYTES with brotli (when installed) or gzip,
+whichever the client accepts with the higher q-value (brotli on a tie).
+Smaller bodies go out as they are: compressing them saves less than it
+costs. Streaming responses (event streams, file downloads) are left alone
+so they are never buffered.
+
+Like Django's GZipMiddleware, gzip output carries random padding against
+BREACH, and strong ETags are weakened because the bytes sent no longer
+match the representation the ETag was computed for.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+BROTLI_QUALITY = 5  # Dynamic responses: most of the ratio of 11 at a fraction of the CPU
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/msgpack', 'application/javascript', 'image/svg')
+
+_CODING_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    """{content coding: q-value} of an Accept-Encoding header"""
+    codings = {}
+    for part in header.split(','):
+        match = _CODING_RE.match(part)
+        if match:
+            try:
+                codings[match[1].lower()] = float(match[2]) if match[2] else 1.0
+            except ValueError:
+                continue
+    return codings
+
+
+def choose_encoding(header):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    codings = accepted_encodings(header)
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    ranked = [
+        (codings.get(coding, codings.get('*', 0.0)), -index, coding)
+        for index, coding in enumerate(available)
+    ]
+    q, _, coding = max(ranked)
+    return coding if q > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=100)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress large enough responses with the best encoding the client accepts"""
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        # The choice depends on Accept-Encoding even when this response is too small to compress
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
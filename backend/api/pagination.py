@@ -0,0 +1,165 @@
+"""
+Keyset (seek) pagination.
+
+PageNumberPagination counts the whole result and skips OFFSET rows for
+every page, so deep pages get slower. KeysetPagination puts the sort key of
+the last row sent into an opaque cursor and asks for the rows after it,
+which an index over the ordering columns answers by seeking: page 2000
+costs the same as page 1.
+
+The queryset's order_by() is the key. It must end with the primary key, so
+every row has a distinct position, and name non-null fields of the model
+itself. Directions may be mixed, e.g. ('-assessment_date', '-created_at',
+'id'); give the table an index with the same columns and directions.
+
+Responses carry `next` and `previous` links but no exact count.
+?total=estimate adds `total_estimate`: the planner's row estimate on
+PostgreSQL (an EXPLAIN, no scan), the exact count on other databases.
+"""
+import base64
+import binascii
+import datetime
+import json
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Planner row estimate for `queryset` on PostgreSQL; the exact count elsewhere"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()  # Keeps microseconds, unlike DjangoJSONEncoder
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _seek(fields, values):
+    # (a, b, c) after (x, y, z): a > x OR (a = x AND (b > y OR (b = y AND c > z))),
+    # with < for descending fields
+    (field, descending), value = fields[0], values[0]
+    beyond = Q(**{f'{field.attname}__{"lt" if descending else "gt"}': value})
+    if len(fields) == 1:
+        return beyond
+    return beyond | (Q(**{field.attname: value}) & _seek(fields[1:], values[1:]))
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_key(self, queryset):
+        """[(field, descending)] of the queryset's ordering, which must end with the primary key"""
+        meta = queryset.model._meta
+        ordering = list(queryset.query.order_by)
+        if not ordering or ordering[-1].lstrip('-') not in ('pk', meta.pk.name):
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} needs a queryset ordered by unique keys ending with the primary key, '
+                f'got {ordering}'
+            )
+        return [
+            (meta.pk if name.lstrip('-') == 'pk' else meta.get_field(name.lstrip('-')), name.startswith('-'))
+            for name in ordering
+        ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.key = self.get_key(queryset)
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.total_estimate = None
+        if request.query_params.get(self.total_query_param) == 'estimate':
+            self.total_estimate = estimate_count(queryset)
+
+        key = [(field, descending != reverse) for field, descending in self.key]
+        if reverse:
+            queryset = queryset.order_by(*(('-' if descending else '') + field.attname for field, descending in key))
+        if position is not None:
+            # The redundant bound on the first column lets the index scan start at the cursor
+            field, descending = key[0]
+            queryset = queryset.filter(
+                Q(**{f'{field.attname}__{"lte" if descending else "gte"}': position[0]}), _seek(key, position))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def position(self, row):
+        return [_encode_value(getattr(row, field.attname)) for field, _ in self.key]
+
+    def encode_cursor(self, row, reverse=False):
+        payload = {'p': self.position(row)}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        """Return (key values, reverse) from the cursor parameter, or (None, False) on the first page"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload['p']
+            if len(values) != len(self.key):
+                raise ValueError
+            position = [field.to_python(value) for (field, _), value in zip(self.key, values)]
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total_estimate is not None:
+            body['total_estimate'] = self.total_estimate
+        return Response(body)
@@ -0,0 +1,54 @@
+"""
+Response renderers.
+
+ORJSONRenderer writes the same JSON as DRF's JSONRenderer (ISO timestamps
+ending in Z, UUIDs and lazy strings as strings) several times faster, using
+orjson when it is installed. MessagePackRenderer sends the same structure
+as MessagePack to clients that ask for application/msgpack; it is only
+enabled when msgpack is installed. Values JSON has no type for are encoded
+as the JSON renderer encodes them, so both formats carry the same data.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to DRF's encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: MessagePackRenderer is left out of DEFAULT_RENDERER_CLASSES
+    msgpack = None
+
+# DRF's encoding of the values orjson and msgpack leave to a default hook
+# (Decimal, lazy translations, querysets, timedelta, ...)
+_encode_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer output, encoded with orjson when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        # Indented output (browsable clients asking for it) keeps the stock encoder
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_encode_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """The JSON structure as MessagePack (application/msgpack)"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Dates, times and UUIDs go out as their JSON strings
+        return msgpack.packb(data, default=_encode_default)
@@ -0,0 +1,527 @@
+import gzip
+import json
+import pytest
+import threading
+from datetime import date, timedelta
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from api import concurrency, middleware, renderers
+from api.async_views import AsyncAPIView
+from api.pagination import KeysetPagination
+from assessments.models import BarthelAssessment, FIMAssessment, KatzADLAssessment
+from assessments.serializers import FIMAssessmentSerializer
+from monitoring import instrumentation
+from patients import synthetic
+from patients.models import Patient
+from users.models import User
+
+
+@pytest.fixture
+def test_user(db):
+    return User.objects.create_user(
+        email='therapist@example.com',
+        password='testpass123',
+        username='therapist1',
+        first_name='Jane',
+        last_name='Doe',
+        role=User.OT,
+        license_number='OT123',
+        license_expiry_date=date.today() + timedelta(days=365)
+    )
+
+
+def make_patient(user, mrn, **fields):
+    return Patient.objects.create(
+        medical_record_number=mrn,
+        first_name=fields.pop('first_name', 'Test'),
+        last_name=fields.pop('last_name', mrn),
+        date_of_birth=date(1950, 1, 1),
+        gender=Patient.MALE,
+        primary_diagnosis='Stroke',
+        admission_date=fields.pop('admission_date', date.today() - timedelta(days=3)),
+        created_by=user,
+        **fields
+    )
+
+
+class EchoView(AsyncAPIView):
+    async def get(self, request):
+        return Response({'user': request.user.email})
+
+
+@pytest.mark.django_db
+class TestAsyncAPIView:
+    """Test DRF behaviour is kept by AsyncAPIView"""
+
+    def test_handler_is_awaited(self, test_user):
+        """Test an async handler runs after authentication"""
+        request = APIRequestFactory().get('/echo/')
+        request.user = test_user
+        view = EchoView.as_view()
+
+        response = async_to_sync(view)(request)
+
+        assert EchoView.view_is_async
+        assert response.data == {'user': 'therapist@example.com'}
+
+    def test_permission_denied(self):
+        """Test unauthenticated requests get DRF's 401/403 handling"""
+        response = async_to_sync(EchoView.as_view())(APIRequestFactory().get('/echo/'))
+
+        assert response.status_code in (401, 403)
+
+    def test_method_not_allowed(self, test_user):
+        """Test methods without a handler are rejected with 405"""
+        request = APIRequestFactory().post('/echo/')
+        request.user = test_user
+
+        response = async_to_sync(EchoView.as_view())(request)
+
+        assert response.status_code == 405
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGather:
+    """Test concurrent query execution"""
+
+    def run(self, *funcs):
+        return async_to_sync(concurrency.gather)(RequestFactory().get('/'), *funcs)
+
+    def test_sequential_on_request_connection(self, test_user):
+        """Test with concurrency off the functions run in order on one thread"""
+        with override_settings(API_CONCURRENT_QUERIES=False):
+            results = self.run(threading.get_ident, Patient.objects.count, threading.get_ident)
+
+        assert results[0] == results[2]
+        assert results[1] == 0
+
+    def test_concurrent_on_worker_connections(self, test_user):
+        """Test each function runs on a pool thread and its queries are counted"""
+        make_patient(test_user, 'G001')
+        barrier = threading.Barrier(2, timeout=5)
+
+        def count_patients():
+            barrier.wait()  # Both functions must be running at the same time
+            return threading.get_ident(), Patient.objects.count()
+
+        stats = instrumentation.RequestStats()
+        token = instrumentation.activate(stats)
+        try:
+            with override_settings(API_CONCURRENT_QUERIES=True):
+                (first_thread, first), (second_thread, second) = self.run(count_patients, count_patients)
+        finally:
+            instrumentation.deactivate(token)
+
+        assert first == second == 1
+        assert first_thread != second_thread != threading.get_ident()
+        assert stats.query_count == 2
+
+
+@pytest.mark.django_db
+class TestDashboard:
+    """Test the dashboard summary endpoint"""
+
+    def test_summary(self, test_user):
+        """Test patient counts, weekly assessment counts and recent assessments"""
+        recent = make_patient(test_user, 'D001')
+        make_patient(test_user, 'D002', admission_date=date.today() - timedelta(days=60), is_active=False,
+                     discharge_date=date.today() - timedelta(days=30), discharge_disposition=Patient.HOME)
+        KatzADLAssessment.objects.create(
+            patient=recent, assessed_by=test_user, assessment_date=date.today(),
+            bathing=1, dressing=1, toileting=1, transferring=1, continence=1, feeding=0
+        )
+        client = APIClient()
+        client.force_authenticate(test_user)
+
+        response = client.get('/api/dashboard/')
+
+        assert response.status_code == 200
+        assert response.data['patients'] == {'active': 1, 'admitted': 1, 'discharged': 0}
+        assert response.data['assessments'] == {'katz': 1, 'barthel': 0, 'fim': 0}
+        assert response.data['recent_assessments'][0]['patient_name'] == 'Test D001'
+        assert response.data['recent_assessments'][0]['total_score'] == 5
+
+
+def paginate(queryset, url):
+    """Paginate `queryset` for a GET of `url`; return (page, response body)"""
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(url)))
+    return page, paginator.get_paginated_response([]).data
+
+
+def walk(queryset, url, link='next'):
+    """Follow `link` from `url` to the end; return the pages"""
+    pages = []
+    while url is not None:
+        page, body = paginate(queryset, url)
+        pages.append(page)
+        url = body[link]
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cursor pagination keyed on each model's ordering"""
+
+    @pytest.fixture
+    def patients(self, test_user):
+        # Tied last names and first names, so the id decides the order within them
+        names = [('Adams', 'Ann'), ('Adams', 'Ann'), ('Adams', 'Bo'), ('Berg', 'Ann'), ('Berg', 'Ann'), ('Cole', 'Al')]
+        for number, (last_name, first_name) in enumerate(names):
+            make_patient(test_user, f'K{number:03}', last_name=last_name, first_name=first_name)
+        return Patient.objects.order_by('last_name', 'first_name', 'id')
+
+    def test_walks_forward_without_gaps_or_duplicates(self, patients):
+        """Test following next links visits every row once, in order"""
+        pages = walk(patients, '/patients/?page_size=4')
+
+        assert [len(page) for page in pages] == [4, 2]
+        assert [patient.pk for page in pages for patient in page] == list(patients.values_list('pk', flat=True))
+
+    def test_walks_back_from_the_last_page(self, patients):
+        """Test previous links return the same pages in reverse"""
+        forward = walk(patients, '/patients/?page_size=2')
+        _, last = paginate(patients, '/patients/?page_size=2')
+        while last['next'] is not None:
+            url = last['next']
+            _, last = paginate(patients, url)
+
+        backward = walk(patients, url, link='previous')
+
+        assert backward == forward[::-1]
+
+    def test_first_page_links(self, patients):
+        """Test the first page has no previous link and the last no next link"""
+        _, first = paginate(patients, '/patients/?page_size=5')
+        _, last = paginate(patients, first['next'])
+
+        assert first['previous'] is None
+        assert last['next'] is None
+        assert last['previous'] is not None
+
+    def test_mixed_directions(self, test_user):
+        """Test a newest-first key with tied dates pages like the full ordering"""
+        patient = make_patient(test_user, 'K100')
+        for days in (3, 1, 1, 1, 2):
+            KatzADLAssessment.objects.create(
+                patient=patient, assessed_by=test_user, assessment_date=date.today() - timedelta(days=days),
+                bathing=1, dressing=1, toileting=1, transferring=1, continence=1, feeding=1,
+            )
+        assessments = KatzADLAssessment.objects.order_by('-assessment_date', '-created_at', 'id')
+
+        pages = walk(assessments, '/assessments/?page_size=2')
+
+        assert [a.pk for page in pages for a in page] == list(assessments.values_list('pk', flat=True))
+        assert walk(assessments, '/assessments/?page_size=2') == pages
+
+    def test_seeks_instead_of_counting_and_skipping(self, patients):
+        """Test a deep page is a bounded seek query, not OFFSET with a COUNT"""
+        _, first = paginate(patients, '/patients/?page_size=2')
+
+        with CaptureQueriesContext(connection) as captured:
+            page, _ = paginate(patients, first['next'])
+
+        assert len(captured.captured_queries) == 1
+        sql = captured.captured_queries[0]['sql'].upper()
+        assert 'OFFSET' not in sql
+        assert 'COUNT(' not in sql
+        assert 'LIMIT 3' in sql
+        assert len(page) == 2
+
+    def test_total_estimate_on_request(self, patients):
+        """Test ?total=estimate adds an approximate total"""
+        _, body = paginate(patients, '/patients/')
+        _, estimated = paginate(patients, '/patients/?total=estimate')
+
+        assert 'total_estimate' not in body
+        if connection.vendor == 'postgresql':
+            assert estimated['total_estimate'] > 0  # Planner statistics of an unanalyzed table
+        else:
+            assert estimated['total_estimate'] == 6
+
+    def test_page_size_is_capped(self, patients):
+        """Test ?page_size cannot exceed max_page_size and falls back when invalid"""
+        paginator = KeysetPagination()
+
+        assert paginator.get_page_size(Request(APIRequestFactory().get('/?page_size=100000'))) == 200
+        assert paginator.get_page_size(Request(APIRequestFactory().get('/?page_size=zero'))) == 50
+
+    @pytest.mark.parametrize('cursor', ['garbage', 'eyJwIjpbXX0=', 'eyJwIjpbIkEiLCJCIiwibm90LWEtdXVpZCJdfQ=='])
+    def test_invalid_cursor_is_404(self, patients, cursor):
+        """Test undecodable, short and mistyped cursors are rejected"""
+        with pytest.raises(NotFound):
+            paginate(patients, f'/patients/?cursor={cursor}')
+
+    def test_ordering_must_end_with_primary_key(self, patients):
+        """Test a key that may tie is refused"""
+        with pytest.raises(ImproperlyConfigured):
+            paginate(patients.order_by('last_name', 'first_name'), '/patients/')
+
+
+@pytest.fixture
+def fim_payload(test_user):
+    """Serialized FIM assessments, the widest rows the API sends"""
+    patient = make_patient(test_user, 'R001', admission_date=date.today() - timedelta(days=10))
+    items = {field.name: 4 for field in FIMAssessment._meta.concrete_fields if field.choices}
+    assessments = [
+        FIMAssessment.objects.create(
+            patient=patient, assessed_by=test_user, assessment_date=date.today() - timedelta(days=days),
+            notes='Needs moderate assistance with lower body dressing', **items,
+        )
+        for days in range(5)
+    ]
+    return FIMAssessmentSerializer(assessments, many=True).data
+
+
+@pytest.mark.django_db
+class TestRenderers:
+    """Test the orjson and MessagePack renderers send what JSONRenderer sends"""
+
+    def test_orjson_matches_json_renderer(self, fim_payload):
+        """Test byte-identical output for serialized assessments"""
+        assert renderers.ORJSONRenderer().render(fim_payload) == JSONRenderer().render(fim_payload)
+
+    def test_orjson_falls_back_without_orjson(self, fim_payload, monkeypatch):
+        """Test the renderer works when orjson is not installed"""
+        monkeypatch.setattr(renderers, 'orjson', None)
+
+        assert renderers.ORJSONRenderer().render(fim_payload) == JSONRenderer().render(fim_payload)
+
+    def test_indent_uses_stock_encoder(self, fim_payload):
+        """Test an Accept indent parameter is honoured"""
+        rendered = renderers.ORJSONRenderer().render(fim_payload, 'application/json; indent=2')
+
+        assert rendered.startswith(b'[\n  {')
+
+    def test_msgpack_carries_the_json_structure(self, fim_payload):
+        """Test MessagePack decodes to the same values as the JSON response"""
+        msgpack = pytest.importorskip('msgpack')
+
+        packed = renderers.MessagePackRenderer().render(fim_payload)
+
+        assert msgpack.unpackb(packed) == json.loads(JSONRenderer().render(fim_payload))
+
+    def test_msgpack_negotiated_by_accept(self, test_user, fim_payload):
+        """Test Accept: application/msgpack selects the MessagePack renderer"""
+        pytest.importorskip('msgpack')
+        client = APIClient(HTTP_X_PHI_ACCESS_REASON='treatment')
+        client.force_authenticate(test_user)
+
+        response = client.get('/api/assessments/fim/', HTTP_ACCEPT='application/msgpack')
+
+        assert response['Content-Type'] == 'application/msgpack'
+
+
+class TestCompressionMiddleware:
+    """Test responses are compressed above the size threshold with an accepted encoding"""
+
+    def respond(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return middleware.CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, size):
+        return HttpResponse(json.dumps(['x' * 10] * (size // 15)), content_type='application/json')
+
+    @pytest.fixture(autouse=True)
+    def gzip_only(self, monkeypatch):
+        monkeypatch.setattr(middleware, 'brotli', None)
+
+    def test_large_response_is_compressed(self):
+        """Test a body over the threshold is gzipped and still decodes"""
+        original = self.json_response(10_000)
+        body = original.content
+
+        response = self.respond(original)
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == body
+        assert int(response['Content-Length']) == len(response.content) < len(body)
+        assert 'Accept-Encoding' in response['Vary']
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_BYTES=1024)
+    def test_small_response_is_left_alone(self):
+        """Test bodies under the threshold are sent as they are, but still vary on Accept-Encoding"""
+        response = self.respond(self.json_response(500))
+
+        assert not response.has_header('Content-Encoding')
+        assert 'Accept-Encoding' in response['Vary']
+
+    @pytest.mark.parametrize('accept_encoding', ['', 'identity', 'gzip;q=0', 'deflate'])
+    def test_unaccepted_encoding_is_not_used(self, accept_encoding):
+        """Test the client's Accept-Encoding is respected"""
+        response = self.respond(self.json_response(10_000), accept_encoding)
+
+        assert not response.has_header('Content-Encoding')
+
+    def test_strong_etag_is_weakened(self):
+        """Test a compressed body no longer claims byte equality"""
+        original = self.json_response(10_000)
+        original['ETag'] = '"abc"'
+
+        assert self.respond(original)['ETag'] == 'W/"abc"'
+
+    def test_streaming_and_binary_responses_are_skipped(self):
+        """Test streams are not buffered and incompressible types are not compressed"""
+        stream = StreamingHttpResponse(iter([b'data: x\n\n'] * 1000), content_type='text/event-stream')
+        image = HttpResponse(b'\x89PNG' * 1000, content_type='image/png')
+
+        assert not self.respond(stream).has_header('Content-Encoding')
+        assert not self.respond(image).has_header('Content-Encoding')
+
+    def test_choose_encoding(self, monkeypatch):
+        """Test q-values decide and brotli wins a tie when installed"""
+        assert middleware.choose_encoding('br, gzip') == 'gzip'
+        assert middleware.choose_encoding('*') == 'gzip'
+
+        monkeypatch.setattr(middleware, 'brotli', object())
+        assert middleware.choose_encoding('gzip, br') == 'br'
+        assert middleware.choose_encoding('gzip;q=1.0, br;q=0.5') == 'gzip'
+        assert middleware.choose_encoding('br;q=0, gzip;q=0') is None
+
+
+@pytest.fixture
+def access_buffer(monkeypatch):
+    from audit import access
+    buffer = access.AccessLogBuffer(max_size=100, flush_interval=0)
+    monkeypatch.setattr(access, 'access_log_buffer', buffer)
+    return buffer
+
+
+@pytest.fixture
+def batch_client(test_user):
+    client = APIClient(HTTP_X_PHI_ACCESS_REASON='treatment')
+    client.force_authenticate(test_user)
+    return client
+
+
+@pytest.fixture
+def session_patient(test_user):
+    return make_patient(test_user, 'B001')
+
+
+def barthel(patient, **overrides):
+    return {
+        'method': 'POST',
+        'path': '/api/assessments/barthel/',
+        'body': {
+            'patient': str(patient.pk), 'assessment_date': date.today().isoformat(),
+            'notes': 'Independent with setup', **dict.fromkeys(synthetic.BARTHEL_ITEMS, 5), **overrides,
+        },
+    }
+
+
+def patch_patient(patient, **body):
+    return {'method': 'PATCH', 'path': f'/api/patients/{patient.pk}/', 'body': body}
+
+
+@pytest.mark.django_db
+class TestBatch:
+    """Test running several API operations in one request"""
+
+    def test_session_in_one_request(self, batch_client, session_patient, access_buffer):
+        """Test a Barthel, a precautions update and a chart read run in order with their own results"""
+        response = batch_client.post('/api/batch/', {'operations': [
+            {'id': 'barthel', **barthel(session_patient)},
+            {'id': 'precautions', **patch_patient(session_patient, precautions=['fall_risk'])},
+            {'id': 'chart', 'method': 'GET', 'path': f'/api/patients/{session_patient.pk}/chart/'},
+        ]}, format='json')
+
+        results = response.data['results']
+        assert response.status_code == 200
+        assert [(result['id'], result['status']) for result in results] == [
+            ('barthel', 201), ('precautions', 200), ('chart', 200)]
+        assert results[0]['body']['total_score'] == 50
+        assert results[1]['headers']['ETag']
+        assert results[2]['body']['patient']['precautions'] == ['fall_risk']
+        assert results[2]['body']['assessments']['barthel']['count'] == 1
+
+    def test_authenticates_once(self, test_user, session_patient, access_buffer, monkeypatch):
+        """Test the JWT is verified for the batch, not again for each operation"""
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.tokens import AccessToken
+        calls = []
+        authenticate = JWTAuthentication.authenticate
+        monkeypatch.setattr(JWTAuthentication, 'authenticate',
+                            lambda self, request: calls.append(1) or authenticate(self, request))
+        client = APIClient(HTTP_X_PHI_ACCESS_REASON='treatment')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+        read = {'method': 'GET', 'path': f'/api/patients/{session_patient.pk}/'}
+
+        response = client.post('/api/batch/', {'operations': [read, read, read]}, format='json')
+
+        assert [result['status'] for result in response.data['results']] == [200, 200, 200]
+        assert len(calls) == 1
+
+    def test_atomic_batch_rolls_back_on_failure(self, batch_client, session_patient, access_buffer):
+        """Test a failing operation undoes the earlier ones and skips the rest"""
+        response = batch_client.post('/api/batch/', {'atomic': True, 'operations': [
+            barthel(session_patient),
+            patch_patient(session_patient, discharge_date=(date.today() - timedelta(days=30)).isoformat(),
+                          discharge_disposition=Patient.HOME),
+            {'method': 'GET', 'path': f'/api/patients/{session_patient.pk}/'},
+        ]}, format='json')
+
+        results = response.data['results']
+        assert response.data['rolled_back'] is True
+        assert [result['status'] for result in results] == [201, 400, 424]
+        assert 'discharge_date' in results[1]['body']
+        assert not BarthelAssessment.objects.exists()
+
+    def test_non_atomic_batch_keeps_successes(self, batch_client, session_patient, access_buffer):
+        """Test without atomic each operation stands on its own"""
+        response = batch_client.post('/api/batch/', {'operations': [
+            barthel(session_patient),
+            barthel(session_patient, feeding=7),
+            patch_patient(session_patient, precautions=['isolation']),
+        ]}, format='json')
+
+        assert [result['status'] for result in response.data['results']] == [201, 400, 200]
+        assert response.data['rolled_back'] is False
+        assert BarthelAssessment.objects.count() == 1
+        session_patient.refresh_from_db()
+        assert session_patient.precautions == ['isolation']
+
+    def test_operation_if_match(self, batch_client, session_patient, access_buffer):
+        """Test an operation's own If-Match guards its update"""
+        response = batch_client.post('/api/batch/', {'operations': [
+            {**patch_patient(session_patient, precautions=['fall_risk']), 'headers': {'If-Match': 'W/"stale"'}},
+        ]}, format='json')
+
+        assert response.data['results'][0]['status'] == 412
+
+    def test_unroutable_operations(self, batch_client, access_buffer):
+        """Test unknown paths and nested batches fail on their own"""
+        response = batch_client.post('/api/batch/', {'operations': [
+            {'method': 'GET', 'path': '/api/nothing/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'operations': []}},
+        ]}, format='json')
+
+        assert [result['status'] for result in response.data['results']] == [404, 400]
+
+    @override_settings(BATCH_MAX_OPERATIONS=2)
+    @pytest.mark.parametrize('operations', [
+        [],
+        [{'method': 'GET', 'path': '/admin/'}],
+        [{'method': 'GET', 'path': '/api/dashboard/', 'headers': {'Authorization': 'Bearer other'}}],
+        [{'method': 'GET', 'path': '/api/dashboard/'}] * 3,
+    ])
+    def test_invalid_batch_is_400(self, batch_client, operations):
+        """Test empty, non-API, header-forging and oversized batches are rejected as a whole"""
+        response = batch_client.post('/api/batch/', {'operations': operations}, format='json')
+
+        assert response.status_code == 400
+
+    def test_requires_authentication(self, db):
+        """Test the batch itself needs a login"""
+        response = APIClient().post('/api/batch/', {'operations': []}, format='json')
+
+        assert response.status_code == 401
@@ -0,0 +1,19 @@
+"""
+API URL root (/api/). Resource endpoints live in their apps' urls.py and
+keep their app namespace, e.g. 'patients:patient-detail'.
+"""
+from django.urls import include, path
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from api import views
+from api.batch import BatchView
+
+urlpatterns = [
+    path('auth/token/', TokenObtainPairView.as_view(), name='token-obtain'),
+    path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('patients/', include('patients.urls')),
+    path('assessments/', include('assessments.urls')),
+    path('sync/', include('sync.urls')),
+]
@@ -0,0 +1,71 @@
+import functools
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from api.async_views import AsyncAPIView
+from api.concurrency import gather
+from assessments.models import INSTRUMENTS
+from assessments.serializers import SUMMARY_FIELDS, AssessmentSummarySerializer
+from organizations.routers import use_replica
+from patients.models import Patient
+
+RECENT_ASSESSMENTS = 10
+SUMMARY_DAYS = 7
+
+
+@use_replica('analytics')
+def _patient_summary(since):
+    return Patient.objects.aggregate(
+        active=Count('pk', filter=Q(is_active=True)),
+        admitted=Count('pk', filter=Q(admission_date__gte=since)),
+        discharged=Count('pk', filter=Q(discharge_date__gte=since)),
+    )
+
+
+def _instrument_summary(model, since):
+    recent = (
+        model.objects
+        .select_related('patient')
+        .only(*SUMMARY_FIELDS, 'patient__first_name', 'patient__last_name')
+        .order_by('-created_at')[:RECENT_ASSESSMENTS]
+    )
+    items = AssessmentSummarySerializer(recent, many=True).data
+    for item, assessment in zip(items, recent):
+        item['patient_name'] = f'{assessment.patient.first_name} {assessment.patient.last_name}'
+    with use_replica('analytics'):
+        count = model.objects.filter(assessment_date__gte=since).count()
+    return {'recent': items, 'count': count}
+
+
+class DashboardView(AsyncAPIView):
+    """
+    Ward overview: patient counts and, per instrument, assessments in the
+    last SUMMARY_DAYS days, plus the most recent assessments across
+    instruments. Each table is queried concurrently. The counts may come
+    from the read replica; the recent assessments always come from the
+    primary so a just-saved assessment shows up.
+    """
+
+    query_budget = {'queries': 9}
+
+    async def get(self, request):
+        since = timezone.localdate() - timedelta(days=SUMMARY_DAYS)
+        patients, *instruments = await gather(
+            request,
+            functools.partial(_patient_summary, since),
+            *(functools.partial(_instrument_summary, model, since) for model in INSTRUMENTS.values()),
+        )
+        recent = sorted(
+            (item for instrument in instruments for item in instrument['recent']),
+            key=lambda item: item['created_at'],
+            reverse=True,
+        )
+        return Response({
+            'since': since,
+            'patients': patients,
+            'assessments': {key: instrument['count'] for key, instrument in zip(INSTRUMENTS, instruments)},
+            'recent_assessments': recent[:RECENT_ASSESSMENTS],
+        })
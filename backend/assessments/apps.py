@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssessmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assessments'
+
+    def ready(self):
+        from assessments.definitions import get_form_definitions
+        get_form_definitions()  # Build the form definitions once, at startup
@@ -0,0 +1,233 @@
+"""
+Idempotent bulk upsert of assessments keyed by client-generated ids.
+
+    POST /api/assessments/<instrument>/bulk/
+    {"assessments": [{"id": "<client uuid>", "patient": "<id>", "assessment_date": "...", ...}, ...]}
+
+creates the assessments whose ids are new and overwrites the others, in one
+transaction, and answers with {"created": n, "updated": n, "unchanged": n,
+"conflicts": [id, ...]}. Resending a batch after a lost response changes
+nothing. An existing assessment is never moved to another patient and,
+once complete, never overwritten: such rows are left as they are and their
+ids listed as conflicts.
+
+Validation runs in memory: the batch's patients are loaded in one query and
+each assessment is scored and full_clean()ed without the per-row FK and
+uniqueness lookups save() would make. A batch with any invalid assessment
+is rejected as a whole (400, errors by position).
+
+On PostgreSQL the batch is a single INSERT ... ON CONFLICT (id) DO UPDATE
+whose WHERE skips rows that would not change or must not, and whose
+RETURNING tells inserts (xmax = 0) from updates; the same statement reads
+the existing rows as they were (a CTE), so a replayed batch is one
+statement that writes nothing. Elsewhere the existing rows are read in one
+query first. Rows that did change get their audit outbox entries (old
+values from those existing rows) and sync change entries in one INSERT
+each; assessed_by and created_at keep the values of the first write.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from rest_framework import serializers
+
+from audit.outbox import record_bulk_saves
+from patients.models import Patient
+from sync.changes import record_saves
+
+# Columns an update leaves alone: the assessment's identity, who first recorded it, and when
+PRESERVED_FIELDS = ('id', 'patient', 'assessed_by', 'created_at')
+
+# PostgreSQL's limit on bind parameters per statement
+MAX_QUERY_PARAMS = 65535
+
+
+class BulkUpsertSerializer(serializers.Serializer):
+    assessments = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_assessments(self, assessments):
+        if len(assessments) > settings.BULK_UPSERT_MAX_RECORDS:
+            raise serializers.ValidationError(f'At most {settings.BULK_UPSERT_MAX_RECORDS} assessments per batch')
+        return assessments
+
+
+def item_serializer_class(serializer_class):
+    """`serializer_class` taking the id and patient as plain UUIDs, so validating runs no queries"""
+    return type(f'Bulk{serializer_class.__name__}', (serializer_class,), {
+        'id': serializers.UUIDField(),
+        'patient': serializers.UUIDField(),
+    })
+
+
+def build(model, serializer_class, records, user):
+    """Validated, scored, unsaved `model` instances for `records`; raises ValidationError with errors by position"""
+    item_class = item_serializer_class(serializer_class)
+    items = [item_class(data=record) for record in records]
+    errors = [{} if item.is_valid() else item.errors for item in items]
+
+    patients = Patient.objects.only('id', 'admission_date', 'first_name', 'middle_name', 'last_name').in_bulk(
+        {item.validated_data['patient'] for item in items if not item.errors}
+    )
+    instances = []
+    seen = set()
+    for index, item in enumerate(items):
+        if item.errors:
+            continue
+        data = dict(item.validated_data)
+        patient_id = data.pop('patient')
+        if data['id'] in seen:
+            errors[index] = {'id': ['Duplicate id in this batch']}
+            continue
+        seen.add(data['id'])
+        if patient_id not in patients:
+            errors[index] = {'patient': [f'Invalid pk "{patient_id}" - object does not exist.']}
+            continue
+        instance = model(**data, patient=patients[patient_id], assessed_by=user)
+        # As save() does: drafts are not scored and may leave items unanswered
+        instance.total_score = instance.calculate_total_score() if instance.is_complete else None
+        unanswered = () if instance.is_complete else instance.unanswered_items()
+        try:
+            instance.full_clean(
+                exclude=('patient', 'assessed_by', *unanswered), validate_unique=False, validate_constraints=False,
+            )
+        except ValidationError as error:
+            errors[index] = error.message_dict
+            continue
+        instances.append(instance)
+
+    if any(errors):
+        raise serializers.ValidationError({'assessments': errors})
+    return instances
+
+
+def _compared_fields(model):
+    # The columns an update writes, less the timestamp every write changes
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in PRESERVED_FIELDS and field.name != 'updated_at'
+    ]
+
+
+def _differs(row, instance, compared):
+    return any(getattr(instance, field.attname) != getattr(row, field.attname) for field in compared)
+
+
+def _refuses(row, instance, compared):
+    """Whether the stored `row` may not be overwritten with `instance`"""
+    return row.patient_id != instance.patient_id or (row.is_complete and _differs(row, instance, compared))
+
+
+def _upsert_returning(model, instances, connection):
+    # WITH existing AS (SELECT ...), upserted AS (INSERT ... ON CONFLICT DO UPDATE ... WHERE
+    # <open, same patient, changed> RETURNING id, <inserted>) SELECT <both, joined>. Both parts
+    # read the statement's snapshot, so `existing` has the rows as they were before the update.
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    fields = model._meta.concrete_fields
+    updated = [field for field in fields if field.name not in PRESERVED_FIELDS]
+    compared = _compared_fields(model)
+    columns = [field.get_col(model._meta.db_table) for field in fields]
+    converters = [connection.ops.get_db_converters(column) + column.get_db_converters(connection) for column in columns]
+    row = f'({", ".join(["%s"] * len(fields))})'
+    excluded = ', '.join(f'EXCLUDED.{quote(field.column)}' for field in compared)
+    current = ', '.join(f'{table}.{quote(field.column)}' for field in compared)
+    patient = quote(model._meta.get_field('patient').column)
+    is_complete = quote(model._meta.get_field('is_complete').column)
+    pk_index = fields.index(model._meta.pk)
+
+    created, changed, existing = set(), set(), {}
+    batch_size = MAX_QUERY_PARAMS // (len(fields) + 1)
+    with connection.cursor() as cursor:
+        for start in range(0, len(instances), batch_size):
+            batch = instances[start:start + batch_size]
+            params = [instance.pk for instance in batch] + [
+                field.get_db_prep_save(field.pre_save(instance, True), connection)
+                for instance in batch for field in fields
+            ]
+            cursor.execute(
+                f'WITH existing AS ('
+                f'SELECT {", ".join(quote(field.column) for field in fields)} FROM {table} '
+                f'WHERE {pk} IN ({", ".join(["%s"] * len(batch))})'
+                f'), upserted AS ('
+                f'INSERT INTO {table} ({", ".join(quote(field.column) for field in fields)}) '
+                f'VALUES {", ".join([row] * len(batch))} '
+                f'ON CONFLICT ({pk}) DO UPDATE SET '
+                f'{", ".join(f"{quote(field.column)} = EXCLUDED.{quote(field.column)}" for field in updated)} '
+                f'WHERE NOT {table}.{is_complete} AND {table}.{patient} = EXCLUDED.{patient} '
+                f'AND ({current}) IS DISTINCT FROM ({excluded}) '
+                f'RETURNING {pk}, xmax = 0 AS inserted'
+                f') SELECT {", ".join(f"existing.{quote(field.column)}" for field in fields)}, '
+                f'upserted.{pk}, upserted.inserted FROM existing FULL JOIN upserted ON existing.{pk} = upserted.{pk}',
+                params,
+            )
+            for *values, upserted_pk, inserted in cursor.fetchall():
+                if values[pk_index] is not None:
+                    for index, column in enumerate(columns):
+                        for converter in converters[index]:
+                            values[index] = converter(values[index], column, connection)
+                    stored = model.from_db(connection.alias, [field.attname for field in fields], values)
+                    existing[stored.pk] = stored
+                if upserted_pk is not None:
+                    (created if inserted else changed).add(model._meta.pk.to_python(upserted_pk))
+    return created, changed, existing
+
+
+def _upsert_compared(model, instances, using):
+    updated = [field for field in model._meta.concrete_fields if field.name not in PRESERVED_FIELDS]
+    compared = _compared_fields(model)
+    existing = model.objects.using(using).in_bulk([instance.pk for instance in instances])
+
+    created = {instance.pk for instance in instances if instance.pk not in existing}
+    changed = {
+        instance.pk for instance in instances
+        if instance.pk in existing
+        and not _refuses(existing[instance.pk], instance, compared)
+        and _differs(existing[instance.pk], instance, compared)
+    }
+    model.objects.using(using).bulk_create(
+        [instance for instance in instances if instance.pk in created or instance.pk in changed],
+        update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=[field.name for field in updated],
+    )
+    return created, changed, existing
+
+
+def upsert(model, instances, using=None):
+    """
+    Insert or update `instances` by primary key; return {'created', 'updated',
+    'unchanged'} counts and the ids of the rows refused as 'conflicts'.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    compared = _compared_fields(model)
+    with transaction.atomic(using=using, savepoint=False):
+        if connection.vendor == 'postgresql':
+            created, changed, existing = _upsert_returning(model, instances, connection)
+        else:
+            created, changed, existing = _upsert_compared(model, instances, using)
+        conflicts = [
+            instance.pk for instance in instances
+            if instance.pk in existing and instance.pk not in changed
+            and _refuses(existing[instance.pk], instance, compared)
+        ]
+        written = [instance for instance in instances if instance.pk in created or instance.pk in changed]
+        for instance in written:
+            if instance.pk in changed and instance.pk in existing:
+                for name in PRESERVED_FIELDS:
+                    attname = model._meta.get_field(name).attname
+                    setattr(instance, attname, getattr(existing[instance.pk], attname))
+                # As if loaded, so change_event() sees a draft being finalized
+                instance._audit_snapshot = existing[instance.pk]._audit_snapshot
+        if written:
+            record_bulk_saves(written, created, using, existing)
+            record_saves(
+                model, [instance.pk for instance in written], using,
+                {instance.pk: instance.change_event(instance.pk in created) for instance in written},
+            )
+    return {
+        'created': len(created),
+        'updated': len(changed),
+        'unchanged': len(instances) - len(created) - len(changed) - len(conflicts),
+        'conflicts': [str(pk) for pk in conflicts],
+    }
@@ -0,0 +1,81 @@
+"""
+Assessment form definitions generated from the models.
+
+Each instrument's items, their choices and point values, their validator
+bounds and the score range are read from the model fields, so the forms
+clients render cannot drift from what the models accept. The definitions
+are built once per process (AssessmentsConfig.ready() warms them) and are
+identified by a hash of their content, which only changes when a release
+changes the models.
+"""
+import functools
+import hashlib
+import json
+
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils.text import capfirst
+
+from assessments.models import INSTRUMENTS
+
+# Fields the clinician fills in besides the items
+COMMON_FIELDS = ('assessment_date', 'is_baseline', 'notes', 'goals', 'recommendations')
+
+_FIELD_TYPES = {'DateField': 'date', 'BooleanField': 'boolean', 'TextField': 'text'}
+
+
+def _bound(field, validator_class):
+    values = [validator.limit_value for validator in field.validators if isinstance(validator, validator_class)]
+    return values[0] if values else None
+
+
+def item_fields(model):
+    """The scored item fields of an instrument, in declaration order"""
+    return model.item_fields()
+
+
+def _item(field, section):
+    return {
+        'name': field.name,
+        'label': capfirst(field.verbose_name),
+        'help_text': str(field.help_text),
+        'section': section,
+        'required': not field.blank,
+        'min': _bound(field, MinValueValidator),
+        'max': _bound(field, MaxValueValidator),
+        'options': [{'value': value, 'label': str(label)} for value, label in field.choices],
+    }
+
+
+def _common_field(model, name):
+    field = model._meta.get_field(name)
+    return {
+        'name': name,
+        'label': capfirst(field.verbose_name),
+        'help_text': str(field.help_text),
+        'type': _FIELD_TYPES[field.get_internal_type()],
+        'required': not field.blank and not field.has_default(),
+    }
+
+
+def _instrument(key, model):
+    sections = {name: section for section, names in getattr(model, 'SECTIONS', {}).items() for name in names}
+    items = [_item(field, sections.get(field.name)) for field in item_fields(model)]
+    return {
+        'instrument': key,
+        'name': str(model._meta.verbose_name),
+        'description': (model.__doc__ or '').strip().splitlines()[0],
+        'items': items,
+        'fields': [_common_field(model, name) for name in COMMON_FIELDS],
+        'score': {
+            'min': sum(min(option['value'] for option in item['options']) for item in items),
+            'max': sum(max(option['value'] for option in item['options']) for item in items),
+        },
+    }
+
+
+@functools.cache
+def get_form_definitions():
+    """Return (version, {instrument key: definition}); the version is a hash of the content"""
+    definitions = {key: _instrument(key, model) for key, model in INSTRUMENTS.items()}
+    content = json.dumps(definitions, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(content).hexdigest()[:16], definitions
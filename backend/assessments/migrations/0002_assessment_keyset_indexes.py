@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0001_initial'),
+        ('patients', '0002_patient_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='barthelassessment',
+            index=models.Index(fields=['-assessment_date', '-created_at', 'id'], name='assessments_assessm_ffb2b6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fimassessment',
+            index=models.Index(fields=['-assessment_date', '-created_at', 'id'], name='assessments_assessm_690aa3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='katzadlassessment',
+            index=models.Index(fields=['-assessment_date', '-created_at', 'id'], name='assessments_assessm_89c4b8_idx'),
+        ),
+    ]
@@ -0,0 +1,184 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0002_assessment_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='bathing',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (5, 'Independent (or in shower)')], help_text='Bathing ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='bladder',
+            field=models.IntegerField(choices=[(0, 'Incontinent or catheterized and unable to manage alone'), (5, 'Occasional accident'), (10, 'Continent')], help_text='Bladder control', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='bowels',
+            field=models.IntegerField(choices=[(0, 'Incontinent (or needs enema)'), (5, 'Occasional accident'), (10, 'Continent')], help_text='Bowel control', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='dressing',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (5, 'Needs help but can do about half unaided'), (10, 'Independent (including buttons, zips, laces)')], help_text='Dressing ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='feeding',
+            field=models.IntegerField(choices=[(0, 'Unable'), (5, 'Needs help (e.g., cutting, spreading butter)'), (10, 'Independent')], help_text='Feeding ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='grooming',
+            field=models.IntegerField(choices=[(0, 'Needs help with personal care'), (5, 'Independent (face/hair/teeth/shaving)')], help_text='Grooming ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='mobility',
+            field=models.IntegerField(choices=[(0, 'Immobile or < 50 yards'), (5, 'Wheelchair independent, including corners, > 50 yards'), (10, 'Walks with help of one person (verbal or physical) > 50 yards'), (15, 'Independent (but may use aid) for > 50 yards')], help_text='Mobility ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(15)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='stairs',
+            field=models.IntegerField(choices=[(0, 'Unable'), (5, 'Needs help (verbal, physical, carrying aid)'), (10, 'Independent')], help_text='Stair climbing ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='toilet_use',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (5, 'Needs some help, but can do something alone'), (10, 'Independent (on and off, dressing, wiping)')], help_text='Toilet use ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AlterField(
+            model_name='barthelassessment',
+            name='transfers',
+            field=models.IntegerField(choices=[(0, 'Unable - no sitting balance'), (5, 'Major help (1-2 people, physical), can sit'), (10, 'Minor help (verbal or physical)'), (15, 'Independent')], help_text='Transfer ability', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(15)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='bathing',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Bathing', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='bladder_management',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Bladder Management', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='bowel_management',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Bowel Management', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='comprehension',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Comprehension', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='dressing_lower',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Dressing - Lower Body', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='dressing_upper',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Dressing - Upper Body', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='eating',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Eating', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='expression',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Expression', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='grooming',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Grooming', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='locomotion_stairs',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Locomotion: Stairs', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='locomotion_walk_wheelchair',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Locomotion: Walk/Wheelchair', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='memory',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Memory', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='problem_solving',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Problem Solving', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='social_interaction',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Social Interaction', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='toileting',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Toileting', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='transfer_bed_chair',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Transfer: Bed, Chair, Wheelchair', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='transfer_toilet',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Transfer: Toilet', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='fimassessment',
+            name='transfer_tub_shower',
+            field=models.IntegerField(choices=[(1, '1 - Total Assistance (<25%)'), (2, '2 - Maximal Assistance (25-49%)'), (3, '3 - Moderate Assistance (50-74%)'), (4, '4 - Minimal Assistance (75%+)'), (5, '5 - Supervision/Setup'), (6, '6 - Modified Independence (device)'), (7, '7 - Complete Independence')], help_text='Transfer: Tub or Shower', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='bathing',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Bathing: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='continence',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Continence: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='dressing',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Dressing: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='feeding',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Feeding: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='toileting',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Toileting: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='katzadlassessment',
+            name='transferring',
+            field=models.IntegerField(choices=[(0, 'Dependent'), (1, 'Independent')], help_text='Transferring: 0=Dependent, 1=Independent', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+    ]
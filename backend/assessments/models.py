@@ -4,12 +4,24 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from datetime import date
+from audit.mixins import AuditOutboxMixin
+from monitoring import metrics
+from monitoring.instrumentation import timed_section
+from sync.mixins import SyncTrackedMixin
 
 
-class BaseAssessment(models.Model):
+def score_items(scores):
+    """Sum of item scores, or None while an item is unanswered"""
+    return None if None in scores else sum(scores)
+
+
+class BaseAssessment(SyncTrackedMixin, AuditOutboxMixin, models.Model):
     """
     Abstract base model for all assessment types.
     Provides common fields and functionality shared across all assessments.
+
+    Item fields are nullable so drafts can leave items unanswered; they stay
+    required (blank=False) for complete assessments.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -96,13 +108,48 @@ class BaseAssessment(models.Model):
                     'assessment_date': 'Assessment date cannot be before patient admission date'
                 })
 
+    @classmethod
+    def item_fields(cls):
+        """The scored item fields of the instrument, in declaration order"""
+        base_fields = {field.name for field in BaseAssessment._meta.get_fields()}
+        return [
+            field for field in cls._meta.concrete_fields
+            if field.choices and field.name not in base_fields
+        ]
+
+    def unanswered_items(self):
+        """Names of the items a draft has no response for yet"""
+        return [field.name for field in self.item_fields() if getattr(self, field.attname) is None]
+
+    def change_event(self, created):
+        """Live event of a save: 'created' once it is complete (created so, or a draft finalized); drafts send none"""
+        if not self.is_complete:
+            return ''
+        if created or not getattr(self, '_audit_snapshot', {}).get('is_complete', True):
+            return 'assessment.created'
+        return 'assessment.updated'
+
+    @metrics.instrument_save
+    @timed_section('save')
     def save(self, *args, **kwargs):
-        """Override save to calculate total score and run validation"""
-        # Calculate total score before saving
-        if hasattr(self, 'calculate_total_score'):
-            self.total_score = self.calculate_total_score()
+        """
+        Score and fully validate complete assessments before saving.
 
-        self.full_clean()
+        Drafts (is_complete=False) may leave items unanswered and are not
+        scored. Creating one validates what it has; a save with
+        update_fields writes values the caller validated, without reading
+        the rest of the row.
+        """
+        if self.is_complete:
+            with metrics.scoring_seconds.time(instrument=self._meta.model_name):
+                self.total_score = self.calculate_total_score()
+            with timed_section('full_clean'):
+                self.full_clean()
+        else:
+            self.total_score = None
+            if kwargs.get('update_fields') is None:
+                with timed_section('full_clean'):
+                    self.full_clean(exclude=self.unanswered_items())
         super().save(*args, **kwargs)
 
     def calculate_total_score(self):
@@ -137,36 +184,42 @@ class KatzADLAssessment(BaseAssessment):
 
     # The 6 ADL Functions
     bathing = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Bathing: 0=Dependent, 1=Independent"
     )
 
     dressing = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Dressing: 0=Dependent, 1=Independent"
     )
 
     toileting = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Toileting: 0=Dependent, 1=Independent"
     )
 
     transferring = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Transferring: 0=Dependent, 1=Independent"
     )
 
     continence = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Continence: 0=Dependent, 1=Independent"
     )
 
     feeding = models.IntegerField(
+        null=True,
         choices=SCORE_CHOICES,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Feeding: 0=Dependent, 1=Independent"
@@ -179,11 +232,12 @@ class KatzADLAssessment(BaseAssessment):
         indexes = [
             models.Index(fields=['patient', 'assessment_date']),
             models.Index(fields=['assessment_date', 'is_baseline']),
+            models.Index(fields=['-assessment_date', '-created_at', 'id']),
         ]
 
     def calculate_total_score(self):
         """Calculate total Katz ADL score (0-6)"""
-        return sum([
+        return score_items([
             self.bathing,
             self.dressing,
             self.toileting,
@@ -194,6 +248,8 @@ class KatzADLAssessment(BaseAssessment):
 
     def get_interpretation(self):
         """Return clinical interpretation of the score"""
+        if not self.is_complete:
+            return None  # Drafts are not scored
         score = self.total_score if self.total_score is not None else self.calculate_total_score()
 
         if score == 6:
@@ -220,6 +276,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Feeding
     feeding = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Unable'),
             (5, 'Needs help (e.g., cutting, spreading butter)'),
@@ -231,6 +288,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Bathing
     bathing = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Dependent'),
             (5, 'Independent (or in shower)')
@@ -241,6 +299,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Grooming
     grooming = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Needs help with personal care'),
             (5, 'Independent (face/hair/teeth/shaving)')
@@ -251,6 +310,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Dressing
     dressing = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Dependent'),
             (5, 'Needs help but can do about half unaided'),
@@ -262,6 +322,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Bowels
     bowels = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Incontinent (or needs enema)'),
             (5, 'Occasional accident'),
@@ -273,6 +334,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Bladder
     bladder = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Incontinent or catheterized and unable to manage alone'),
             (5, 'Occasional accident'),
@@ -284,6 +346,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Toilet Use
     toilet_use = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Dependent'),
             (5, 'Needs some help, but can do something alone'),
@@ -295,6 +358,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Transfers (bed to chair and back)
     transfers = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Unable - no sitting balance'),
             (5, 'Major help (1-2 people, physical), can sit'),
@@ -307,6 +371,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Mobility (on level surfaces)
     mobility = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Immobile or < 50 yards'),
             (5, 'Wheelchair independent, including corners, > 50 yards'),
@@ -319,6 +384,7 @@ class BarthelAssessment(BaseAssessment):
 
     # Stairs
     stairs = models.IntegerField(
+        null=True,
         choices=[
             (0, 'Unable'),
             (5, 'Needs help (verbal, physical, carrying aid)'),
@@ -335,11 +401,12 @@ class BarthelAssessment(BaseAssessment):
         indexes = [
             models.Index(fields=['patient', 'assessment_date']),
             models.Index(fields=['assessment_date', 'is_baseline']),
+            models.Index(fields=['-assessment_date', '-created_at', 'id']),
         ]
 
     def calculate_total_score(self):
         """Calculate total Barthel Index score (0-100)"""
-        return sum([
+        return score_items([
             self.feeding,
             self.bathing,
             self.grooming,
@@ -354,6 +421,8 @@ class BarthelAssessment(BaseAssessment):
 
     def get_interpretation(self):
         """Return clinical interpretation of the score"""
+        if not self.is_complete:
+            return None  # Drafts are not scored
         score = self.total_score if self.total_score is not None else self.calculate_total_score()
 
         if score >= 90:
@@ -400,38 +469,54 @@ class FIMAssessment(BaseAssessment):
         (7, '7 - Complete Independence'),
     ]
 
+    # Item fields by section, in form order
+    SECTIONS = {
+        'Self-Care': ['eating', 'grooming', 'bathing', 'dressing_upper', 'dressing_lower', 'toileting'],
+        'Sphincter Control': ['bladder_management', 'bowel_management'],
+        'Transfers': ['transfer_bed_chair', 'transfer_toilet', 'transfer_tub_shower'],
+        'Locomotion': ['locomotion_walk_wheelchair', 'locomotion_stairs'],
+        'Communication': ['comprehension', 'expression'],
+        'Social Cognition': ['social_interaction', 'problem_solving', 'memory'],
+    }
+
     # SELF-CARE (6 items)
     eating = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Eating"
     )
 
     grooming = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Grooming"
     )
 
     bathing = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Bathing"
     )
 
     dressing_upper = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Dressing - Upper Body"
     )
 
     dressing_lower = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Dressing - Lower Body"
     )
 
     toileting = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Toileting"
@@ -439,12 +524,14 @@ class FIMAssessment(BaseAssessment):
 
     # SPHINCTER CONTROL (2 items)
     bladder_management = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Bladder Management"
     )
 
     bowel_management = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Bowel Management"
@@ -452,18 +539,21 @@ class FIMAssessment(BaseAssessment):
 
     # TRANSFERS (3 items)
     transfer_bed_chair = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Transfer: Bed, Chair, Wheelchair"
     )
 
     transfer_toilet = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Transfer: Toilet"
     )
 
     transfer_tub_shower = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Transfer: Tub or Shower"
@@ -471,12 +561,14 @@ class FIMAssessment(BaseAssessment):
 
     # LOCOMOTION (2 items)
     locomotion_walk_wheelchair = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Locomotion: Walk/Wheelchair"
     )
 
     locomotion_stairs = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Locomotion: Stairs"
@@ -484,12 +576,14 @@ class FIMAssessment(BaseAssessment):
 
     # COMMUNICATION (2 items)
     comprehension = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Comprehension"
     )
 
     expression = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Expression"
@@ -497,18 +591,21 @@ class FIMAssessment(BaseAssessment):
 
     # SOCIAL COGNITION (3 items)
     social_interaction = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Social Interaction"
     )
 
     problem_solving = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Problem Solving"
     )
 
     memory = models.IntegerField(
+        null=True,
         choices=FIM_CHOICES,
         validators=[MinValueValidator(1), MaxValueValidator(7)],
         help_text="Memory"
@@ -521,11 +618,12 @@ class FIMAssessment(BaseAssessment):
         indexes = [
             models.Index(fields=['patient', 'assessment_date']),
             models.Index(fields=['assessment_date', 'is_baseline']),
+            models.Index(fields=['-assessment_date', '-created_at', 'id']),
         ]
 
     def calculate_total_score(self):
         """Calculate total FIM score (18-126)"""
-        return sum([
+        return score_items([
             # Self-care
             self.eating,
             self.grooming,
@@ -554,7 +652,7 @@ class FIMAssessment(BaseAssessment):
 
     def calculate_motor_score(self):
         """Calculate motor subscore (13 items, 13-91)"""
-        return sum([
+        return score_items([
             # Self-care
             self.eating,
             self.grooming,
@@ -576,7 +674,7 @@ class FIMAssessment(BaseAssessment):
 
     def calculate_cognitive_score(self):
         """Calculate cognitive subscore (5 items, 5-35)"""
-        return sum([
+        return score_items([
             self.comprehension,
             self.expression,
             self.social_interaction,
@@ -586,6 +684,8 @@ class FIMAssessment(BaseAssessment):
 
     def get_interpretation(self):
         """Return clinical interpretation of the score"""
+        if not self.is_complete:
+            return None  # Drafts are not scored
         score = self.total_score if self.total_score is not None else self.calculate_total_score()
 
         if score >= 108:
@@ -596,3 +696,15 @@ class FIMAssessment(BaseAssessment):
             return "Modified Dependence (54-89)"
         else:
             return "Complete Dependence (18-53)"
+
+
+# =============================================================================
+# INSTRUMENT REGISTRY
+# =============================================================================
+
+# Assessment model by the instrument key used in API URLs and payloads
+INSTRUMENTS = {
+    'katz': KatzADLAssessment,
+    'barthel': BarthelAssessment,
+    'fim': FIMAssessment,
+}
@@ -0,0 +1,91 @@
+from rest_framework import serializers
+
+from api.fieldsets import ALL, SparseFieldsSerializerMixin
+from assessments.models import INSTRUMENTS, BarthelAssessment, FIMAssessment, KatzADLAssessment
+
+# Fields of the compact form used in timelines and dashboards
+SUMMARY_FIELDS = (
+    'id', 'patient', 'assessed_by', 'assessment_date', 'total_score',
+    'is_complete', 'is_baseline', 'created_at', 'updated_at',
+)
+
+
+class AssessmentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Full assessment with its computed score and interpretation"""
+
+    instrument = serializers.SerializerMethodField()
+    interpretation = serializers.CharField(source='get_interpretation', read_only=True)
+
+    class Meta:
+        fields = '__all__'
+        read_only_fields = ('assessed_by', 'total_score', 'created_at', 'updated_at')
+        profiles = {'list': SUMMARY_FIELDS + ('instrument', 'interpretation'), 'full': ALL}
+        sources = {'instrument': (), 'interpretation': ('total_score', 'is_complete')}
+
+    def get_instrument(self, assessment):
+        return instrument_key(assessment)
+
+
+class KatzADLAssessmentSerializer(AssessmentSerializer):
+    class Meta(AssessmentSerializer.Meta):
+        model = KatzADLAssessment
+
+
+class BarthelAssessmentSerializer(AssessmentSerializer):
+    class Meta(AssessmentSerializer.Meta):
+        model = BarthelAssessment
+
+
+def _fim_items(*sections):
+    return tuple(name for section in sections for name in FIMAssessment.SECTIONS[section])
+
+
+class FIMAssessmentSerializer(AssessmentSerializer):
+    motor_score = serializers.IntegerField(source='calculate_motor_score', read_only=True)
+    cognitive_score = serializers.IntegerField(source='calculate_cognitive_score', read_only=True)
+
+    class Meta(AssessmentSerializer.Meta):
+        model = FIMAssessment
+        sources = {
+            **AssessmentSerializer.Meta.sources,
+            'motor_score': _fim_items('Self-Care', 'Sphincter Control', 'Transfers', 'Locomotion'),
+            'cognitive_score': _fim_items('Communication', 'Social Cognition'),
+        }
+
+
+SERIALIZERS = {
+    'katz': KatzADLAssessmentSerializer,
+    'barthel': BarthelAssessmentSerializer,
+    'fim': FIMAssessmentSerializer,
+}
+
+_KEYS_BY_MODEL = {model: key for key, model in INSTRUMENTS.items()}
+
+
+def instrument_key(assessment):
+    """Return the instrument key ('katz', 'barthel', 'fim') of an assessment"""
+    return _KEYS_BY_MODEL[type(assessment)]
+
+
+def serialize_assessment(assessment):
+    """Serialize any assessment with its instrument's serializer"""
+    return SERIALIZERS[instrument_key(assessment)](assessment).data
+
+
+class AssessmentSummarySerializer(serializers.Serializer):
+    """Instrument-independent summary of an assessment (load with .only(*SUMMARY_FIELDS))"""
+
+    id = serializers.UUIDField()
+    instrument = serializers.SerializerMethodField()
+    patient = serializers.UUIDField(source='patient_id')
+    assessed_by = serializers.UUIDField(source='assessed_by_id')
+    assessment_date = serializers.DateField()
+    total_score = serializers.IntegerField()
+    interpretation = serializers.CharField(source='get_interpretation')
+    is_complete = serializers.BooleanField()
+    is_baseline = serializers.BooleanField()
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+
+    def get_instrument(self, assessment):
+        return instrument_key(assessment)
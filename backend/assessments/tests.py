@@ -1,8 +1,17 @@
 import pytest
+import uuid
 from datetime import date, timedelta
+from auditlog.models import LogEntry
 from django.core.exceptions import ValidationError
+from django.db import connection
+from rest_framework.test import APIClient
+from assessments import bulk, views
 from assessments.models import KatzADLAssessment, BarthelAssessment, FIMAssessment
+from assessments.serializers import KatzADLAssessmentSerializer
+from audit.models import AuditOutboxEntry
+from patients import synthetic
 from patients.models import Patient
+from sync.models import Change
 from users.models import User
 
 
@@ -569,3 +578,504 @@ class TestAssessmentValidation:
         assessment.save()
 
         assert assessment.updated_at >= old_updated
+
+
+# =============================================================================
+# READ API TESTS
+# =============================================================================
+
+@pytest.fixture
+def api_client(test_user):
+    client = APIClient(HTTP_X_PHI_ACCESS_REASON='assessment')
+    client.force_authenticate(test_user)
+    return client
+
+
+@pytest.fixture
+def katz_history(test_patient, test_user):
+    """Three Katz assessments of the test patient, oldest first"""
+    return [
+        KatzADLAssessment.objects.create(
+            patient=test_patient, assessed_by=test_user, assessment_date=date.today() - timedelta(days=days),
+            bathing=1, dressing=1, toileting=1, transferring=1, continence=score, feeding=score,
+        )
+        for days, score in ((6, 0), (4, 1), (2, 1))
+    ]
+
+
+@pytest.fixture
+def access_buffer(monkeypatch):
+    from audit import access
+    buffer = access.AccessLogBuffer(max_size=100, flush_interval=0)
+    monkeypatch.setattr(access, 'access_log_buffer', buffer)
+    return buffer
+
+
+@pytest.mark.django_db
+class TestAssessmentEndpoints:
+    """Test the per-instrument assessment list and detail endpoints"""
+
+    def test_list_newest_first(self, api_client, katz_history, access_buffer):
+        """Test the list is newest first and records the patient's access once"""
+        response = api_client.get('/api/assessments/katz/')
+
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data['results']] == [str(a.pk) for a in reversed(katz_history)]
+        assert response.data['results'][0]['instrument'] == 'katz'
+        assert len(access_buffer) == 1
+
+    def test_ordering_parameter_is_ignored(self, api_client, katz_history, access_buffer):
+        """Test ?ordering= cannot replace the keyset order"""
+        response = api_client.get('/api/assessments/katz/?ordering=assessment_date')
+
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data['results']] == [str(a.pk) for a in reversed(katz_history)]
+
+    def test_list_filtered_by_patient(self, api_client, katz_history, test_user, access_buffer):
+        """Test ?patient= restricts the list to one patient"""
+        other = Patient.objects.create(
+            medical_record_number='MRN002', first_name='Ann', last_name='Other', date_of_birth=date(1940, 2, 2),
+            gender=Patient.FEMALE, primary_diagnosis='TBI', admission_date=date.today(), created_by=test_user,
+        )
+
+        response = api_client.get(f'/api/assessments/katz/?patient={other.pk}')
+
+        assert response.data['results'] == []
+
+    def test_create(self, api_client, test_patient, test_user):
+        """Test POST records a scored assessment by the requesting clinician"""
+        response = api_client.post('/api/assessments/katz/', {
+            'patient': str(test_patient.pk), 'assessment_date': date.today().isoformat(),
+            'bathing': 1, 'dressing': 1, 'toileting': 1, 'transferring': 0, 'continence': 1, 'feeding': 1,
+        }, format='json')
+
+        assert response.status_code == 201
+        assert response.data['total_score'] == 5
+        assert response.data['assessed_by'] == test_user.pk
+        assert KatzADLAssessment.objects.get().assessed_by == test_user
+
+    def test_unknown_instrument_is_404(self, api_client):
+        """Test only the registered instruments are routed"""
+        assert api_client.get('/api/assessments/moca/').status_code == 404
+
+    def test_list_revalidates_until_changed(self, api_client, katz_history, access_buffer):
+        """Test the collection ETag changes when an assessment is edited"""
+        url = f'/api/assessments/katz/?patient={katz_history[0].patient_id}'
+        first = api_client.get(url)
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+
+        katz_history[0].notes = 'Re-scored after review'
+        katz_history[0].save()
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 200
+
+    def test_detail_revalidation(self, api_client, katz_history, access_buffer, django_assert_num_queries):
+        """Test the detail is revalidated from (id, updated_at) alone"""
+        url = f'/api/assessments/katz/{katz_history[0].pk}/'
+        first = api_client.get(url)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        assert first.data['total_score'] == 4
+        assert first['Last-Modified']
+        assert response.status_code == 304
+        assert len(access_buffer) == 1
+
+    def test_detail_of_other_instrument_is_404(self, api_client, katz_history):
+        """Test an assessment id is only found under its own instrument"""
+        assert api_client.get(f'/api/assessments/fim/{katz_history[0].pk}/').status_code == 404
+
+
+class TestFormDefinitions:
+    """Test form definitions generated from the assessment models"""
+
+    def test_items_follow_model_choices(self):
+        """Test items, options and bounds come from the model fields"""
+        from assessments.definitions import get_form_definitions
+        _, definitions = get_form_definitions()
+
+        transfers = next(item for item in definitions['barthel']['items'] if item['name'] == 'transfers')
+        assert [option['value'] for option in transfers['options']] == [0, 5, 10, 15]
+        assert (transfers['min'], transfers['max']) == (0, 15)
+        assert [item['name'] for item in definitions['katz']['items']] == [
+            'bathing', 'dressing', 'toileting', 'transferring', 'continence', 'feeding',
+        ]
+
+    def test_score_ranges_and_sections(self):
+        """Test score ranges are derived from the options and FIM items carry their section"""
+        from assessments.definitions import get_form_definitions
+        _, definitions = get_form_definitions()
+
+        assert definitions['katz']['score'] == {'min': 0, 'max': 6}
+        assert definitions['barthel']['score'] == {'min': 0, 'max': 100}
+        assert definitions['fim']['score'] == {'min': 18, 'max': 126}
+        sections = {item['name']: item['section'] for item in definitions['fim']['items']}
+        assert sections['memory'] == 'Social Cognition'
+        assert all(sections.values())
+
+    def test_endpoint_needs_no_database_or_login(self, client):
+        """Test the definitions are served anonymously (no django_db mark: any query would fail)"""
+        response = client.get('/api/assessments/forms/')
+
+        assert response.status_code == 200
+        assert set(response.json()['instruments']) == {'katz', 'barthel', 'fim'}
+        assert response['ETag'] == f'"{response.json()["version"]}"'
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_versioned_url_is_immutable(self, client):
+        """Test requesting the current version allows long-lived caching"""
+        version = client.get('/api/assessments/forms/').json()['version']
+
+        response = client.get(f'/api/assessments/forms/fim/?version={version}')
+
+        assert list(response.json()['instruments']) == ['fim']
+        assert 'max-age=31536000' in response['Cache-Control']
+        assert 'immutable' in response['Cache-Control']
+
+    def test_revalidation_is_304(self, client):
+        """Test a client holding the current version gets 304"""
+        first = client.get('/api/assessments/forms/')
+
+        response = client.get('/api/assessments/forms/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        assert response.status_code == 304
+
+    def test_unknown_instrument_is_404(self, client):
+        """Test only registered instruments have definitions"""
+        assert client.get('/api/assessments/forms/moca/').status_code == 404
+
+
+@pytest.mark.django_db
+class TestAssessmentFieldsets:
+    """Test assessment lists default to the summary and load only what is selected"""
+
+    def test_list_profile_omits_items(self, api_client, katz_history, access_buffer):
+        """Test the list sends the summary and ?profile=full adds the item scores"""
+        summary = api_client.get('/api/assessments/katz/').data['results'][0]
+        full = api_client.get('/api/assessments/katz/?profile=full').data['results'][0]
+
+        assert 'bathing' not in summary
+        assert summary['interpretation'] == full['interpretation']
+        assert full['bathing'] == 1
+
+    def test_fim_subscore_loads_its_items(self, api_client, test_patient, test_user, access_buffer,
+                                          django_assert_num_queries):
+        """Test a computed field loads its source columns up front instead of per row"""
+        FIMAssessment.objects.create(
+            patient=test_patient, assessed_by=test_user, assessment_date=date.today(),
+            **dict.fromkeys(FIMAssessment.SECTIONS['Self-Care'] + FIMAssessment.SECTIONS['Sphincter Control']
+                            + FIMAssessment.SECTIONS['Transfers'] + FIMAssessment.SECTIONS['Locomotion'], 5),
+            **dict.fromkeys(FIMAssessment.SECTIONS['Communication'] + FIMAssessment.SECTIONS['Social Cognition'], 6),
+        )
+
+        with django_assert_num_queries(1) as captured:
+            response = api_client.get('/api/assessments/fim/?fields=id,motor_score')
+
+        assert response.data['results'][0]['motor_score'] == 65
+        assert 'memory' not in captured.captured_queries[0]['sql']
+
+
+# =============================================================================
+# BULK UPSERT TESTS
+# =============================================================================
+
+def katz_record(patient, **overrides):
+    return {
+        'id': str(uuid.uuid4()), 'patient': str(patient.pk), 'assessment_date': date.today().isoformat(),
+        'bathing': 1, 'dressing': 1, 'toileting': 1, 'transferring': 1, 'continence': 1, 'feeding': 0,
+        **overrides,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkUpsert:
+    """Test POST /api/assessments/<instrument>/bulk/ upserts by client-generated id"""
+
+    url = '/api/assessments/katz/bulk/'
+
+    def upsert(self, client, records):
+        return client.post(self.url, {'assessments': records}, format='json')
+
+    def test_creates_scored_assessments(self, api_client, test_patient, test_user):
+        """Test new ids are created, scored and attributed to the requesting clinician"""
+        records = [katz_record(test_patient), katz_record(test_patient, feeding=1)]
+
+        response = self.upsert(api_client, records)
+
+        assert response.status_code == 200
+        assert response.data == {'created': 2, 'updated': 0, 'unchanged': 0, 'conflicts': []}
+        assessments = KatzADLAssessment.objects.in_bulk([record['id'] for record in records], field_name='id')
+        assert sorted(assessment.total_score for assessment in assessments.values()) == [5, 6]
+        assert {assessment.assessed_by for assessment in assessments.values()} == {test_user}
+        assert Change.objects.filter(model='assessments.katzadlassessment').count() == 2
+        assert AuditOutboxEntry.objects.filter(
+            content_type__model='katzadlassessment', action=LogEntry.Action.CREATE).count() == 2
+
+    def test_replay_is_unchanged(self, api_client, test_patient):
+        """Test resending a batch writes nothing"""
+        records = [katz_record(test_patient) for _ in range(3)]
+        self.upsert(api_client, records)
+        changes, outbox = Change.objects.count(), AuditOutboxEntry.objects.count()
+
+        response = self.upsert(api_client, records)
+
+        assert response.data == {'created': 0, 'updated': 0, 'unchanged': 3, 'conflicts': []}
+        assert KatzADLAssessment.objects.count() == 3
+        assert (Change.objects.count(), AuditOutboxEntry.objects.count()) == (changes, outbox)
+
+    def test_replay_is_one_statement(self, api_client, test_patient, test_user, django_assert_num_queries):
+        """Test an unchanged batch costs one statement (the upsert on PostgreSQL, the read elsewhere)"""
+        records = [katz_record(test_patient) for _ in range(20)]
+        self.upsert(api_client, records)
+        instances = bulk.build(KatzADLAssessment, KatzADLAssessmentSerializer, records, test_user)
+
+        with django_assert_num_queries(1):
+            assert bulk.upsert(KatzADLAssessment, instances)['unchanged'] == 20
+
+    def test_updates_changed_rows(self, api_client, test_patient, test_user):
+        """Test changed drafts are overwritten and scored; the assessor and creation time are kept"""
+        first, second = katz_record(test_patient, is_complete=False), katz_record(test_patient)
+        self.upsert(api_client, [first, second])
+        created_at = KatzADLAssessment.objects.get(pk=first['id']).created_at
+        other = User.objects.create_user(
+            email='ot2@example.com', password='testpass123', username='ot2', first_name='Sam', last_name='Other',
+            role=User.OT,
+            license_number='OT456', license_expiry_date=date.today() + timedelta(days=365),
+        )
+        api_client.force_authenticate(other)
+
+        response = self.upsert(api_client, [{**first, 'feeding': 1, 'notes': 'Re-scored', 'is_complete': True}, second, katz_record(test_patient)])
+
+        assert response.data == {'created': 1, 'updated': 1, 'unchanged': 1, 'conflicts': []}
+        updated = KatzADLAssessment.objects.get(pk=first['id'])
+        assert (updated.total_score, updated.notes) == (6, 'Re-scored')
+        assert updated.assessed_by == test_user
+        assert updated.created_at == created_at
+        assert updated.updated_at > created_at
+
+    def test_update_audits_old_values(self, api_client, test_patient):
+        """Test an update's outbox entry has the values the row had before, not just the new ones"""
+        record = katz_record(test_patient, is_complete=False)
+        self.upsert(api_client, [record])
+
+        self.upsert(api_client, [{**record, 'feeding': 1, 'notes': 'Re-scored'}])
+
+        entry = AuditOutboxEntry.objects.get(action=LogEntry.Action.UPDATE)
+        assert entry.changes == {'feeding': ['0', '1'], 'notes': ['', 'Re-scored']}
+
+    def test_complete_rows_are_conflicts(self, api_client, test_patient):
+        """Test a finalized assessment is never overwritten; the refused id is reported"""
+        complete, draft = katz_record(test_patient), katz_record(test_patient, is_complete=False)
+        self.upsert(api_client, [complete, draft])
+
+        response = self.upsert(api_client, [{**complete, 'feeding': 1}, {**draft, 'feeding': 1, 'is_complete': True}])
+        replay = self.upsert(api_client, [complete])
+
+        assert response.data == {'created': 0, 'updated': 1, 'unchanged': 0, 'conflicts': [complete['id']]}
+        assert replay.data == {'created': 0, 'updated': 0, 'unchanged': 1, 'conflicts': []}
+        assert KatzADLAssessment.objects.get(pk=complete['id']).feeding == 0
+        assert KatzADLAssessment.objects.get(pk=draft['id']).total_score == 6
+
+    def test_patient_is_never_changed(self, api_client, test_patient, test_user):
+        """Test an id already recorded for one patient cannot be moved to another"""
+        other = Patient.objects.create(
+            medical_record_number='MRN002', first_name='Ann', last_name='Roe', date_of_birth=date(1960, 1, 1),
+            gender=Patient.FEMALE, primary_diagnosis='Hip fracture',
+            admission_date=date.today() - timedelta(days=5), created_by=test_user,
+        )
+        record = katz_record(test_patient, is_complete=False)
+        self.upsert(api_client, [record])
+
+        response = self.upsert(api_client, [{**record, 'patient': str(other.pk)}])
+
+        assert response.data['conflicts'] == [record['id']]
+        assert KatzADLAssessment.objects.get(pk=record['id']).patient == test_patient
+
+    def test_invalid_batch_is_rejected(self, api_client, test_patient):
+        """Test one invalid assessment rejects the batch, with errors by position"""
+        duplicate = katz_record(test_patient)
+        response = self.upsert(api_client, [
+            katz_record(test_patient),
+            katz_record(test_patient, assessment_date=(date.today() + timedelta(days=1)).isoformat()),
+            {**katz_record(test_patient), 'patient': str(uuid.uuid4())},
+            duplicate,
+            duplicate,
+            katz_record(test_patient, bathing=7),
+        ])
+
+        assert response.status_code == 400
+        errors = response.data['assessments']
+        assert errors[0] == {} and errors[3] == {}
+        assert 'assessment_date' in errors[1]
+        assert 'patient' in errors[2]
+        assert 'id' in errors[4]
+        assert 'bathing' in errors[5]
+        assert not KatzADLAssessment.objects.exists()
+
+    def test_batch_size_limit(self, api_client, test_patient, settings):
+        """Test batches above BULK_UPSERT_MAX_RECORDS are refused"""
+        settings.BULK_UPSERT_MAX_RECORDS = 1
+        response = self.upsert(api_client, [katz_record(test_patient), katz_record(test_patient)])
+        assert response.status_code == 400
+
+    def test_fim_batch(self, api_client, test_patient):
+        """Test instruments with many columns score and upsert the same way"""
+        record = {
+            'id': str(uuid.uuid4()), 'patient': str(test_patient.pk), 'assessment_date': date.today().isoformat(),
+            **dict.fromkeys(synthetic.FIM_ITEMS, 4),
+        }
+
+        response = api_client.post('/api/assessments/fim/bulk/', {'assessments': [record]}, format='json')
+
+        assert response.data == {'created': 1, 'updated': 0, 'unchanged': 0, 'conflicts': []}
+        assert FIMAssessment.objects.get().total_score == 4 * len(synthetic.FIM_ITEMS)
+
+    def test_upsert_returning(self, test_patient, test_user, django_assert_num_queries):
+        """Test the PostgreSQL statement tells inserts from updates and returns the rows as they were"""
+        if connection.vendor != 'postgresql':
+            pytest.skip('INSERT ... ON CONFLICT ... RETURNING path is PostgreSQL only')
+        draft, complete, same = (katz_record(test_patient, is_complete=False), katz_record(test_patient),
+                                 katz_record(test_patient))
+        bulk.upsert(KatzADLAssessment, bulk.build(KatzADLAssessment, KatzADLAssessmentSerializer,
+                                                  [draft, complete, same], test_user))
+        new = katz_record(test_patient)
+        instances = bulk.build(KatzADLAssessment, KatzADLAssessmentSerializer, [
+            {**draft, 'feeding': 1}, {**complete, 'feeding': 1}, same, new,
+        ], test_user)
+
+        with django_assert_num_queries(1):
+            created, changed, existing = bulk._upsert_returning(KatzADLAssessment, instances, connection)
+
+        assert created == {uuid.UUID(new['id'])}
+        assert changed == {uuid.UUID(draft['id'])}
+        assert set(existing) == {uuid.UUID(record['id']) for record in (draft, complete, same)}
+        stored = existing[uuid.UUID(draft['id'])]
+        assert (stored.feeding, stored.is_complete, stored.patient_id) == (0, False, test_patient.pk)
+        assert stored._audit_snapshot['feeding'] == 0
+        assert KatzADLAssessment.objects.get(pk=complete['id']).feeding == 0
+        assert KatzADLAssessment.objects.get(pk=draft['id']).feeding == 1
+
+
+# =============================================================================
+# DRAFT AUTOSAVE TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestDraftAutosave:
+    """Test drafts: partial items, autosave PATCH and finalization"""
+
+    def create_draft(self, client, patient, **items):
+        response = client.post('/api/assessments/fim/', {
+            'patient': str(patient.pk), 'assessment_date': date.today().isoformat(), 'is_complete': False, **items,
+        }, format='json')
+        assert response.status_code == 201, response.data
+        return response.data
+
+    def test_draft_is_stored_unscored(self, api_client, test_patient):
+        """Test a draft keeps its partial items and has no score yet"""
+        draft = self.create_draft(api_client, test_patient, eating=5)
+
+        assert (draft['eating'], draft['grooming']) == (5, None)
+        assert draft['total_score'] is None
+        assert draft['interpretation'] is None
+        assert draft['motor_score'] is None
+        assert FIMAssessment.objects.get().unanswered_items() == [
+            name for name in synthetic.FIM_ITEMS if name != 'eating'
+        ]
+
+    def test_autosave_updates_only_sent_columns(
+        self, api_client, test_patient, access_buffer, django_assert_num_queries,
+    ):
+        """Test an autosave is one load, one UPDATE of the sent columns, its outbox and change rows"""
+        draft = self.create_draft(api_client, test_patient, eating=5)
+        url = f'/api/assessments/fim/{draft["id"]}/'
+
+        with django_assert_num_queries(4) as queries:
+            response = api_client.patch(url, {'grooming': 4, 'notes': 'Needs set-up'}, format='json')
+
+        assert response.status_code == 200
+        assert set(response.data) == {'id', 'is_complete', 'updated_at'}
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+        assert '"grooming"' in updates[0] and '"notes"' in updates[0] and '"eating"' not in updates[0]
+        saved = FIMAssessment.objects.get()
+        assert (saved.eating, saved.grooming, saved.notes) == (5, 4, 'Needs set-up')
+        assert AuditOutboxEntry.objects.filter(action=LogEntry.Action.UPDATE).get().object_repr == str(saved)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    def test_stale_autosave_is_refused(self, api_client, test_patient):
+        """Test If-Match guards autosaves from two devices"""
+        draft = self.create_draft(api_client, test_patient)
+        url = f'/api/assessments/fim/{draft["id"]}/'
+        first = api_client.patch(url, {'eating': 5}, format='json')
+        api_client.patch(url, {'eating': 6}, format='json')
+
+        response = api_client.patch(url, {'eating': 7}, format='json', HTTP_IF_MATCH=first['ETag'])
+
+        assert response.status_code == 412
+        assert FIMAssessment.objects.get().eating == 6
+
+    def test_autosave_racing_a_finalize_is_refused(self, api_client, test_patient, monkeypatch):
+        """Test a draft finalized between an autosave's load and its write keeps its finalized values"""
+        draft = self.create_draft(api_client, test_patient, **dict.fromkeys(synthetic.FIM_ITEMS, 4))
+        finalized = FIMAssessment.objects.get()
+        finalized.is_complete = True
+        load = views.get_object_or_404
+
+        def load_then_finalize(queryset, **kwargs):
+            assessment = load(queryset, **kwargs)
+            if not finalized.total_score:
+                # Another request's finalize: not counted against this request's budget
+                wrappers, connection.execute_wrappers = connection.execute_wrappers, []
+                try:
+                    finalized.save()
+                finally:
+                    connection.execute_wrappers = wrappers
+            return assessment
+
+        monkeypatch.setattr(views, 'get_object_or_404', load_then_finalize)
+        response = api_client.patch(f'/api/assessments/fim/{draft["id"]}/', {'eating': 7}, format='json')
+
+        assert response.status_code == 409
+        saved = FIMAssessment.objects.get()
+        assert (saved.is_complete, saved.eating) == (True, 4)
+        assert saved.total_score == 4 * len(synthetic.FIM_ITEMS)
+
+    def test_finalize_validates_everything(self, api_client, test_patient):
+        """Test completing a draft with unanswered items is refused and leaves it a draft"""
+        draft = self.create_draft(api_client, test_patient, eating=5)
+
+        response = api_client.patch(f'/api/assessments/fim/{draft["id"]}/', {'is_complete': True}, format='json')
+
+        assert response.status_code == 400
+        assert 'grooming' in response.data
+        assert FIMAssessment.objects.get().is_complete is False
+
+    def test_finalize_scores(self, api_client, test_patient, access_buffer):
+        """Test completing a filled draft scores it and returns the full assessment"""
+        draft = self.create_draft(api_client, test_patient, **dict.fromkeys(synthetic.FIM_ITEMS, 4))
+
+        response = api_client.patch(f'/api/assessments/fim/{draft["id"]}/', {'memory': 6, 'is_complete': True},
+                                    format='json')
+
+        assert response.status_code == 200
+        assert response.data['is_complete'] is True
+        assert response.data['total_score'] == 4 * len(synthetic.FIM_ITEMS) + 2
+        assert response.data['interpretation']
+        assert FIMAssessment.objects.get().total_score == response.data['total_score']
+
+    def test_complete_assessment_cannot_be_patched(self, api_client, katz_history):
+        """Test finalized assessments are not editable through autosave"""
+        response = api_client.patch(f'/api/assessments/katz/{katz_history[0].pk}/', {'bathing': 0}, format='json')
+        assert response.status_code == 409
+
+    def test_fixed_fields_are_refused(self, api_client, test_patient):
+        """Test the patient, date and scores cannot be autosaved"""
+        draft = self.create_draft(api_client, test_patient)
+        response = api_client.patch(f'/api/assessments/fim/{draft["id"]}/', {
+            'patient': str(test_patient.pk), 'total_score': 100,
+        }, format='json')
+        assert response.status_code == 400
+        assert set(response.data) == {'patient', 'total_score'}
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from assessments import views
+
+app_name = 'assessments'
+
+urlpatterns = [
+    path('forms/', views.FormDefinitionView.as_view(), name='form-definitions'),
+    path('forms/<str:instrument>/', views.FormDefinitionView.as_view(), name='form-definition'),
+    path('<str:instrument>/', views.AssessmentListView.as_view(), name='assessment-list'),
+    path('<str:instrument>/bulk/', views.AssessmentBulkView.as_view(), name='assessment-bulk'),
+    path('<str:instrument>/<uuid:pk>/', views.AssessmentDetailView.as_view(), name='assessment-detail'),
+]
@@ -1,3 +1,247 @@
-from django.shortcuts import render
+from django.db import router, transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from api.conditional import Validators, is_conditional, page_validators, page_version, record_revalidation
+from api.fieldsets import SparseFieldsMixin
+from assessments.bulk import BulkUpsertSerializer, build, upsert
+from assessments.definitions import get_form_definitions
+from assessments.models import INSTRUMENTS
+from assessments.serializers import SERIALIZERS
+from audit.access import get_access_reason, record_access
+from audit.outbox import record_save
+from sync.changes import record_saves
+
+
+class InstrumentMixin:
+    """Resolve the `instrument` URL argument ('katz', 'barthel', 'fim') to its model and serializer"""
+
+    @property
+    def model(self):
+        try:
+            return INSTRUMENTS[self.kwargs['instrument']]
+        except KeyError:
+            raise Http404(f'Unknown instrument {self.kwargs["instrument"]!r}')
+
+    def get_serializer_class(self):
+        return SERIALIZERS[self.kwargs['instrument']]
+
+
+class AssessmentListView(InstrumentMixin, SparseFieldsMixin, ListCreateAPIView):
+    """
+    One instrument's assessments, newest first, optionally for one patient
+    (?patient=<id>), keyset paginated, in the `list` profile unless
+    ?profile= or ?fields= say otherwise. The ETag is the page version, so a
+    revalidation costs one page query of a few columns.
+
+    POST records a new assessment by the requesting clinician.
+    """
+
+    default_profile = 'list'
+    filter_backends = ()  # The keyset order is fixed: no ?ordering= (OrderingFilter) on top of it
+    # POST: patient lookup, full_clean()'s FK and pk checks, insert, audit outbox (plus its ContentType
+    # lookup on a process's first write), sync change
+    query_budget = {'queries': 8}
+
+    def get_queryset(self):
+        queryset = self.model.objects.order_by('-assessment_date', '-created_at', 'id')
+        patient_id = self.request.query_params.get('patient')
+        if patient_id:
+            queryset = queryset.filter(patient_id=patient_id)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        reason = get_access_reason(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_conditional(request):
+            not_modified = page_validators(self, queryset).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        page = self.paginate_queryset(self.load_only(queryset, 'patient', 'updated_at'))
+        validators = Validators(request, *page_version(self.paginator, page))
+        for patient_id in {assessment.patient_id for assessment in page}:
+            record_access(request, patient_id, reason)
+        return validators.apply(self.get_paginated_response(self.get_serializer(page, many=True).data))
+
+    def perform_create(self, serializer):
+        serializer.save(assessed_by=self.request.user)
+
+
+class AssessmentBulkView(InstrumentMixin, APIView):
+    """Create or update a batch of one instrument's assessments by client-generated id (see assessments.bulk)"""
+
+    # Patients, existing rows (not on PostgreSQL), the upsert, audit content type (first use), audit outbox, sync changes
+    query_budget = {'queries': 6}
+
+    def post(self, request, instrument):
+        batch = BulkUpsertSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        instances = build(self.model, self.get_serializer_class(), batch.validated_data['assessments'], request.user)
+        return Response(upsert(self.model, instances))
+
+
+# Fields an autosave may change besides the items; the patient and date are set when the draft is created
+DRAFT_FIELDS = ('notes', 'goals', 'recommendations', 'is_baseline')
+
+# Patient columns of BaseAssessment.__str__, which names the audit entry of an autosave
+AUTOSAVE_PATIENT_FIELDS = ('patient__first_name', 'patient__middle_name', 'patient__last_name')
+
+
+class AssessmentDetailView(InstrumentMixin, SparseFieldsMixin, RetrieveAPIView):
+    """
+    One assessment, revalidated by (id, updated_at).
+
+    PATCH autosaves a draft (is_complete=false): only the fields sent are
+    validated and written, so each autosave is one small UPDATE of those
+    columns, answered with the new version ({id, is_complete, updated_at}
+    and the ETag). Sending "is_complete": true finalizes the draft: it is
+    scored and fully validated once and the full assessment is returned.
+    Complete assessments cannot be patched (409). The autosave's UPDATE only
+    matches a draft (and, under If-Match, the version checked), and a
+    finalize locks the row, so neither overwrites the other.
+    """
+
+    # Finalizing: locked load, full_clean()'s FK checks and patient, update, outbox, change, and a
+    # savepoint and its release when nested in a transaction (an atomic batch)
+    query_budget = {'queries': 9}
+
+    def get_queryset(self):
+        return self.load_only(self.model.objects.all(), 'patient', 'updated_at')
+
+    def retrieve(self, request, *args, **kwargs):
+        reason = get_access_reason(request)
+        if is_conditional(request):
+            version = self.get_queryset().filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+            if version is None:
+                raise Http404('No assessment matches the given query.')
+            not_modified = self._validators(version).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        assessment = self.get_object()
+        record_access(request, assessment.patient_id, reason)
+        return self._validators(assessment.updated_at).apply(Response(self.get_serializer(assessment).data))
+
+    def patch(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        editable = {field.name for field in self.model.item_fields()} | {*DRAFT_FIELDS, 'is_complete'}
+        fixed = sorted(set(request.data) - editable)
+        if fixed:
+            raise ValidationError({name: ['Cannot be changed in a draft'] for name in fixed})
+        serializer = serializer_class(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        complete = values.pop('is_complete', False)
+        reason = get_access_reason(request) if complete else None
+
+        if complete:
+            # Locked from the checks to the save, so no autosave lands in between
+            with transaction.atomic():
+                assessment = get_object_or_404(self.model.objects.select_for_update(), pk=kwargs['pk'])
+                refused = self._refuse_edit(assessment)
+                if refused is not None:
+                    return refused
+                for name, value in values.items():
+                    setattr(assessment, name, value)
+                assessment.is_complete = True
+                assessment.save()
+            record_access(request, assessment.patient_id, reason)
+            return self._validators(assessment.updated_at).apply(Response(serializer_class(assessment).data))
+
+        # An autosave loads only the columns it compares and writes, plus what the audit entry's
+        # str() shows (the date and, joined, the patient's name) so nothing deferred is fetched later
+        queryset = self.model.objects.select_related('patient').only(
+            'is_complete', 'updated_at', 'assessment_date', *AUTOSAVE_PATIENT_FIELDS, *values,
+        )
+        assessment = get_object_or_404(queryset, pk=kwargs['pk'])
+        refused = self._refuse_edit(assessment)
+        if refused is not None:
+            return refused
+
+        for name, value in values.items():
+            setattr(assessment, name, value)
+        if not self._autosave(assessment, values):
+            # Finalized (or, under If-Match, saved again) since it was loaded
+            current = get_object_or_404(self.model.objects.only('is_complete', 'updated_at'), pk=kwargs['pk'])
+            return self._refuse_edit(current) or Response(
+                {'detail': 'Complete assessments cannot be edited.'}, status=status.HTTP_409_CONFLICT,
+            )
+        return self._validators(assessment.updated_at).apply(Response({
+            'id': str(assessment.pk), 'is_complete': False, 'updated_at': assessment.updated_at,
+        }))
+
+    def _refuse_edit(self, assessment):
+        """412 if If-Match names another version, 409 if the assessment is complete, else None"""
+        precondition_failed = self._validators(assessment.updated_at).precondition_failed(self.request)
+        if precondition_failed is not None:
+            return precondition_failed
+        if assessment.is_complete:
+            return Response({'detail': 'Complete assessments cannot be edited.'}, status=status.HTTP_409_CONFLICT)
+        return None
+
+    def _autosave(self, assessment, values):
+        """
+        Write `values` to the draft in one UPDATE that matches only while it is
+        still a draft (and, under If-Match, still the version loaded), with its
+        audit and sync entries; False if the UPDATE matched no row.
+        """
+        model = self.model
+        using = router.db_for_write(model, instance=assessment)
+        loaded_at = assessment.updated_at
+        updated_at = model._meta.get_field('updated_at').pre_save(assessment, False)
+        rows = model.objects.using(using).filter(pk=assessment.pk, is_complete=False)
+        if 'If-Match' in self.request.headers:
+            rows = rows.filter(updated_at=loaded_at)
+        with transaction.atomic(using=using, savepoint=False):
+            if not rows.update(**values, updated_at=updated_at):
+                return False
+            record_save(assessment, created=False, using=using)
+            record_saves(model, [assessment.pk], using)
+        assessment._audit_snapshot = assessment._audit_values()
+        return True
+
+    def _validators(self, updated_at):
+        return Validators(self.request, str(self.kwargs['pk']), updated_at, last_modified=updated_at)
+
+
+class FormDefinitionView(APIView):
+    """
+    Form definitions of all instruments (or of `instrument`), generated from
+    the models. They hold no PHI and change only with a release, so they are
+    public and need no database access.
+
+    The response's `version` is a content hash. Requested with
+    ?version=<that hash> the response may be cached for a year; without it
+    clients revalidate with the ETag (the same hash).
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    max_age = 365 * 24 * 60 * 60
+
+    def get(self, request, instrument=None):
+        version, definitions = get_form_definitions()
+        if instrument is not None:
+            if instrument not in definitions:
+                raise Http404(f'Unknown instrument {instrument!r}')
+            definitions = {instrument: definitions[instrument]}
+
+        etag = f'"{version}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        record_revalidation(request, not_modified, cache='forms')
+        response = not_modified or Response({'version': version, 'instruments': definitions})
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept',))
+        if request.query_params.get('version') == version:
+            patch_cache_control(response, public=True, max_age=self.max_age, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
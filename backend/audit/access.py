@@ -0,0 +1,192 @@
+"""
+Recording why a user opened a patient's PHI.
+
+Chart opens are the most frequent request, so recording must not touch the
+database on the request path: record_access() appends a tuple to an
+in-process buffer and a background thread writes the buffer with one
+bulk INSERT per tenant schema every PHI_ACCESS_LOG_FLUSH_INTERVAL seconds,
+or as soon as PHI_ACCESS_LOG_BUFFER_SIZE entries are waiting. The buffer is
+also drained at interpreter exit. Entries whose write fails are re-queued,
+up to PHI_ACCESS_LOG_MAX_BUFFER in all; past that the oldest are dropped
+(counted in ot_phi_access_log_dropped_total) so an outage cannot exhaust
+memory.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from audit.models import PHIAccessLog
+from monitoring import metrics
+from organizations.utils import is_multi_tenant, schema_context
+
+logger = logging.getLogger(__name__)
+
+REASON_HEADER = 'X-PHI-Access-Reason'
+
+_REASONS_BY_NAME = {
+    'treatment': PHIAccessLog.TREATMENT,
+    'assessment': PHIAccessLog.ASSESSMENT,
+    'care_coordination': PHIAccessLog.CARE_COORDINATION,
+    'documentation': PHIAccessLog.DOCUMENTATION,
+    'discharge_planning': PHIAccessLog.DISCHARGE_PLANNING,
+    'billing': PHIAccessLog.BILLING,
+    'quality_review': PHIAccessLog.QUALITY_REVIEW,
+    'patient_request': PHIAccessLog.PATIENT_REQUEST,
+    'emergency': PHIAccessLog.EMERGENCY,
+}
+_REASON_CODES = {code for code, _ in PHIAccessLog.REASON_CHOICES}
+
+
+def parse_reason(value):
+    """Return the reason code for a header value (code or name), or None if invalid"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value.isdigit():
+        code = int(value)
+        return code if code in _REASON_CODES else None
+    return _REASONS_BY_NAME.get(value)
+
+
+def get_access_reason(request):
+    """
+    Return the reason code the client gave for accessing PHI.
+
+    Raises PermissionDenied if the reason is missing or unknown while
+    REQUIRE_PHI_ACCESS_REASON is enabled; otherwise a missing reason is
+    recorded as TREATMENT.
+    """
+    reason = parse_reason(request.headers.get(REASON_HEADER))
+    if reason is not None:
+        return reason
+    if settings.REQUIRE_PHI_ACCESS_REASON:
+        raise PermissionDenied(f'A valid {REASON_HEADER} header is required to access patient records')
+    return PHIAccessLog.TREATMENT
+
+
+def _endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match is not None and match.view_name else request.path
+    return name[:PHIAccessLog._meta.get_field('endpoint').max_length]
+
+
+class AccessLogBuffer:
+    """Thread-safe buffer of pending PHI access rows, flushed in batches"""
+
+    def __init__(self, max_size=None, flush_interval=None, max_buffered=None):
+        self.max_size = max_size or settings.PHI_ACCESS_LOG_BUFFER_SIZE
+        self.max_buffered = max(max_buffered or settings.PHI_ACCESS_LOG_MAX_BUFFER, self.max_size)
+        self.flush_interval = (
+            settings.PHI_ACCESS_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, schema_name, user_id, patient_id, reason, endpoint, accessed_at):
+        """Queue one access; wakes the flusher thread when the buffer is full"""
+        with self._lock:
+            self._entries.append((schema_name, user_id, patient_id, reason, endpoint, accessed_at))
+            self._drop_oldest()
+            full = len(self._entries) >= self.max_size
+
+        if self.flush_interval > 0:
+            self._ensure_thread()
+            if full:
+                self._wakeup.set()
+        elif full:
+            self.flush()
+
+    def flush(self):
+        """Write every queued access; return the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            if not entries:
+                return 0
+
+            by_schema = defaultdict(list)
+            for schema_name, *row in entries:
+                by_schema[schema_name].append(row)
+
+            written = 0
+            for schema_name, rows in by_schema.items():
+                try:
+                    with schema_context(schema_name):
+                        PHIAccessLog.objects.bulk_create([
+                            PHIAccessLog(
+                                user_id=user_id,
+                                patient_id=patient_id,
+                                reason=reason,
+                                endpoint=endpoint,
+                                accessed_at=accessed_at,
+                            )
+                            for user_id, patient_id, reason, endpoint, accessed_at in rows
+                        ])
+                    written += len(rows)
+                except Exception:
+                    logger.exception('Failed to write %d PHI access log entries; re-queued', len(rows))
+                    with self._lock:
+                        # Ahead of the entries queued meanwhile, so the oldest go first if any must
+                        self._entries[:0] = [(schema_name, *row) for row in rows]
+                        self._drop_oldest()
+            return written
+
+    def _drop_oldest(self):
+        # With self._lock held
+        excess = len(self._entries) - self.max_buffered
+        if excess > 0:
+            del self._entries[:excess]
+            metrics.phi_access_log_dropped.inc(excess)
+            logger.error('PHI access log buffer full (%d entries); dropped the %d oldest', self.max_buffered, excess)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='phi-access-log', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+access_log_buffer = AccessLogBuffer()
+atexit.register(access_log_buffer.flush)
+
+
+def record_access(request, patient, reason=None, endpoint=None):
+    """
+    Record that `request.user` opened `patient` (a Patient or its id).
+
+    Call from views that return PHI. The reason defaults to the one sent in
+    the request header (see get_access_reason()).
+    """
+    if reason is None:
+        reason = get_access_reason(request)
+    access_log_buffer.append(
+        connection.schema_name if is_multi_tenant() else None,
+        request.user.pk,
+        getattr(patient, 'pk', patient),
+        reason,
+        endpoint or _endpoint_name(request),
+        timezone.now(),
+    )
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'audit'
+
+    def ready(self):
+        from django.apps import apps
+        from django.db.models.signals import post_delete
+        from audit.mixins import AuditOutboxMixin
+        from audit.outbox import record_delete
+
+        # Deletes go through the Collector (model and queryset deletes alike),
+        # which sends post_delete inside its own transaction.
+        for model in apps.get_models():
+            if issubclass(model, AuditOutboxMixin):
+                post_delete.connect(record_delete, sender=model, dispatch_uid=f'audit_outbox_delete_{model._meta.label}')
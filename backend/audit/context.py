@@ -0,0 +1,59 @@
+"""
+Request-scoped audit context (actor and remote address).
+
+Replaces auditlog's thread-local signal currying: the outbox only needs to
+read the current actor when a change is captured, so a context variable is
+enough and works for both WSGI threads and ASGI tasks.
+"""
+import contextlib
+from contextvars import ContextVar
+
+_actor = ContextVar('audit_actor', default=None)
+_request = ContextVar('audit_request', default=None)
+_remote_addr = ContextVar('audit_remote_addr', default=None)
+
+
+@contextlib.contextmanager
+def set_actor(actor, remote_addr=None):
+    """Attach an explicit actor (and optional remote address) to changes captured in this block."""
+    actor_token = _actor.set(actor)
+    addr_token = _remote_addr.set(remote_addr)
+    try:
+        yield
+    finally:
+        _actor.reset(actor_token)
+        _remote_addr.reset(addr_token)
+
+
+@contextlib.contextmanager
+def set_request(request, remote_addr=None):
+    """
+    Attach a request to changes captured in this block.
+
+    The user is read lazily when a change is captured, so users authenticated
+    by DRF (JWT) after the middleware has run are still recorded.
+    """
+    request_token = _request.set(request)
+    addr_token = _remote_addr.set(remote_addr)
+    try:
+        yield
+    finally:
+        _request.reset(request_token)
+        _remote_addr.reset(addr_token)
+
+
+def get_actor():
+    """Return the current actor, or None outside of an authenticated request."""
+    actor = _actor.get()
+    if actor is not None:
+        return actor
+
+    user = getattr(_request.get(), 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    return None
+
+
+def get_remote_addr():
+    """Return the current remote address, or None outside of a request."""
+    return _remote_addr.get()
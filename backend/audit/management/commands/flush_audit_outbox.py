@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audit.flusher import flush_outbox
+from organizations.utils import get_tenant_schemas, schema_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Move captured audit changes from the outbox into the audit log. '
+        'Runs once by default; pass --interval to keep running as a background worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.AUDIT_OUTBOX_BATCH_SIZE,
+            help='Outbox rows moved per transaction',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Seconds to sleep between passes; 0 runs a single pass and exits',
+        )
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Only flush these tenant schemas (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            for schema_name in get_tenant_schemas(options['schemas']):
+                with schema_context(schema_name):
+                    total += flush_outbox(batch_size=options['batch_size'])
+
+            if options['verbosity'] > 1 or not options['interval']:
+                self.stdout.write(f'Flushed {total} audit outbox entries')
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from audit import partitions
+from organizations.utils import get_tenant_schemas, schema_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly audit log partitions and drop partitions older '
+        'than AUDIT_LOG_RETENTION_DAYS. Run daily from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.AUDIT_LOG_PARTITION_MONTHS_AHEAD,
+            help='Future months to create partitions for',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_DAYS,
+            help='Drop partitions whose rows are all older than this',
+        )
+        parser.add_argument(
+            '--no-purge',
+            action='store_true',
+            help='Only create partitions; never drop expired ones',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report expired partitions without dropping them',
+        )
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Only maintain these tenant schemas (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported(connection):
+            self.stdout.write(f'Audit log partitioning is not supported on {connection.vendor}; nothing to do')
+            return
+
+        for schema_name in get_tenant_schemas(options['schemas']):
+            label = schema_name or connection.settings_dict['NAME']
+            with schema_context(schema_name):
+                if not partitions.is_partitioned(connection):
+                    self.stdout.write(self.style.WARNING(f'{label}: audit log is not partitioned; run migrations'))
+                    continue
+
+                created = partitions.ensure_partitions(connection, months_ahead=options['months_ahead'])
+                for name in created:
+                    self.stdout.write(f'{label}: created {name}')
+
+                if options['no_purge']:
+                    continue
+
+                expired = partitions.purge_expired_partitions(
+                    connection,
+                    retention_days=options['retention_days'],
+                    dry_run=options['dry_run'],
+                )
+                verb = 'would drop' if options['dry_run'] else 'dropped'
+                for name in expired:
+                    self.stdout.write(f'{label}: {verb} {name}')
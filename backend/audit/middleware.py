@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from auditlog.middleware import AuditlogMiddleware
+
+from audit.context import set_request
+
+
+class AuditContextMiddleware(AuditlogMiddleware):
+    """
+    Couple the request's user to captured audit changes.
+
+    Drop-in replacement for auditlog's middleware: instead of connecting a
+    pre_save receiver to LogEntry for every request, it publishes the request
+    in audit.context so the outbox can stamp the actor on the queued row.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with set_request(request, remote_addr=self._get_remote_addr(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with set_request(request, remote_addr=self._get_remote_addr(request)):
+            return await self.get_response(request)
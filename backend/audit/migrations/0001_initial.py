@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditOutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_pk', models.CharField(help_text='Primary key of the audited object', max_length=255)),
+                ('object_repr', models.TextField(help_text='String representation of the object when the change was captured')),
+                ('action', models.PositiveSmallIntegerField(choices=[(0, 'create'), (1, 'update'), (2, 'delete'), (3, 'access')], help_text='Create, update or delete')),
+                ('changes', models.JSONField(default=dict, help_text='Changed fields as {field: [old, new]}')),
+                ('remote_addr', models.GenericIPAddressField(blank=True, help_text='Client address of the request that made the change', null=True)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, help_text='When the change was captured (copied to the log entry)')),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, help_text='User who made the change', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('content_type', models.ForeignKey(help_text='Type of the audited object', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Audit Outbox Entry',
+                'verbose_name_plural': 'Audit Outbox Entries',
+                'db_table': 'audit_outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
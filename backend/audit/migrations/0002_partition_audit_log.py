@@ -0,0 +1,165 @@
+"""
+Convert auditlog's LogEntry table into a monthly range-partitioned table.
+
+PostgreSQL only; other backends (the SQLite test database) keep the plain
+table. Existing rows are copied into monthly partitions, and the id sequence
+continues from the current maximum. The primary key becomes (id, timestamp)
+because PostgreSQL requires the partition key in every unique constraint;
+Django keeps addressing rows by id.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+
+# The helpers below are frozen copies of audit.partitions as of this
+# migration; it must not change with that module.
+PARENT_TABLE = 'auditlog_logentry'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+MONTHS_AHEAD = 3  # Later months are created by the partition maintenance job
+STAGING_TABLE = f'{PARENT_TABLE}_partitioned'
+LEGACY_TABLE = f'{PARENT_TABLE}_unpartitioned'
+SEQUENCE = f'{PARENT_TABLE}_partitioned_id_seq'
+
+COLUMNS = (
+    'id', 'content_type_id', 'object_pk', 'object_id', 'object_repr', 'serialized_data',
+    'action', 'changes', 'actor_id', 'remote_addr', 'timestamp', 'additional_data',
+)
+
+INDEXES = (
+    ('timestamp',),
+    ('object_pk',),
+    ('object_id',),
+    ('action',),
+    ('actor_id',),
+    ('content_type_id', 'object_pk'),
+)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def create_partition(cursor, quote, month, parent):
+    """Create `month`'s partition of `parent`, moving its rows out of the default partition"""
+    name = f'{PARENT_TABLE}_p{month.year:04d}{month.month:02d}'
+    lower = month_start(month).isoformat()
+    upper = add_months(month, 1).isoformat()
+    cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(parent)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {quote(DEFAULT_PARTITION)}
+            WHERE "timestamp" >= %s::timestamptz AND "timestamp" < %s::timestamptz
+            RETURNING *
+        )
+        INSERT INTO {quote(name)} SELECT * FROM moved
+        """,
+        [f'{lower} 00:00:00+00', f'{upper} 00:00:00+00'],
+    )
+    cursor.execute(
+        f"ALTER TABLE {quote(parent)} ATTACH PARTITION {quote(name)} "
+        f"FOR VALUES FROM ('{lower} 00:00:00+00') TO ('{upper} 00:00:00+00')"
+    )
+
+
+def add_indexes_and_foreign_keys(apps, cursor, quote, table):
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    content_type_table = apps.get_model('contenttypes', 'ContentType')._meta.db_table
+
+    for index_columns in INDEXES:
+        cursor.execute(f'CREATE INDEX ON {quote(table)} ({", ".join(quote(c) for c in index_columns)})')
+    cursor.execute(
+        f'ALTER TABLE {quote(table)} ADD FOREIGN KEY (content_type_id) '
+        f'REFERENCES {quote(content_type_table)} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    cursor.execute(
+        f'ALTER TABLE {quote(table)} ADD FOREIGN KEY (actor_id) '
+        f'REFERENCES {quote(user_table)} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+
+
+def partition_audit_log(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in COLUMNS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE SEQUENCE {quote(SEQUENCE)}')
+        cursor.execute(
+            f'CREATE TABLE {quote(STAGING_TABLE)} (LIKE {quote(PARENT_TABLE)} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(STAGING_TABLE)} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')"
+        )
+        cursor.execute(f'ALTER SEQUENCE {quote(SEQUENCE)} OWNED BY {quote(STAGING_TABLE)}.id')
+        cursor.execute(
+            f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM {quote(PARENT_TABLE)}), 0) + 1, false)"
+        )
+        cursor.execute(f'ALTER TABLE {quote(STAGING_TABLE)} ADD PRIMARY KEY (id, "timestamp")')
+        add_indexes_and_foreign_keys(apps, cursor, quote, STAGING_TABLE)
+        cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(STAGING_TABLE)} DEFAULT')
+
+        # Copy history into the default partition, then split it into months
+        cursor.execute(
+            f'INSERT INTO {quote(STAGING_TABLE)} ({columns}) SELECT {columns} FROM {quote(PARENT_TABLE)}'
+        )
+        cursor.execute(f'SELECT MIN("timestamp")::date, CURRENT_DATE FROM {quote(PARENT_TABLE)}')
+        oldest, today = cursor.fetchone()
+
+        month = month_start(oldest or today)
+        last = add_months(today, MONTHS_AHEAD)
+        while month <= last:
+            create_partition(cursor, quote, month, STAGING_TABLE)
+            month = add_months(month, 1)
+
+        cursor.execute(f'ALTER TABLE {quote(PARENT_TABLE)} RENAME TO {quote(LEGACY_TABLE)}')
+        cursor.execute(f'ALTER TABLE {quote(STAGING_TABLE)} RENAME TO {quote(PARENT_TABLE)}')
+        cursor.execute(f'DROP TABLE {quote(LEGACY_TABLE)}')
+
+
+def unpartition_audit_log(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in COLUMNS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {quote(LEGACY_TABLE)} (LIKE {quote(PARENT_TABLE)} INCLUDING DEFAULTS)'
+        )
+        cursor.execute(
+            f'INSERT INTO {quote(LEGACY_TABLE)} ({columns}) SELECT {columns} FROM {quote(PARENT_TABLE)}'
+        )
+        cursor.execute(f'ALTER SEQUENCE {quote(SEQUENCE)} OWNED BY {quote(LEGACY_TABLE)}.id')
+        # Back to the name Django gave it, so partitioning again can create SEQUENCE anew
+        cursor.execute(f'ALTER SEQUENCE {quote(SEQUENCE)} RENAME TO {quote(PARENT_TABLE + "_id_seq")}')
+        cursor.execute(f'DROP TABLE {quote(PARENT_TABLE)}')
+        cursor.execute(f'ALTER TABLE {quote(LEGACY_TABLE)} RENAME TO {quote(PARENT_TABLE)}')
+        cursor.execute(f'ALTER TABLE {quote(PARENT_TABLE)} ADD PRIMARY KEY (id)')
+        add_indexes_and_foreign_keys(apps, cursor, quote, PARENT_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+        ('auditlog', '0012_add_logentry_action_access'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_partition_audit_log'),
+        ('patients', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PHIAccessLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.PositiveSmallIntegerField(choices=[(1, 'Treatment'), (2, 'Assessment'), (3, 'Care coordination'), (4, 'Documentation'), (5, 'Discharge planning'), (6, 'Billing / payment'), (7, 'Quality review / operations'), (8, 'Patient request'), (9, 'Emergency access')], help_text='Coded reason for accessing PHI')),
+                ('endpoint', models.CharField(help_text='URL name (or path) of the endpoint that served the PHI', max_length=100)),
+                ('accessed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the PHI was accessed')),
+                ('patient', models.ForeignKey(db_constraint=False, help_text='Patient whose PHI was accessed', on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='patients.patient')),
+                ('user', models.ForeignKey(db_constraint=False, help_text='User who accessed the record', on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'PHI Access Log Entry',
+                'verbose_name_plural': 'PHI Access Log',
+                'db_table': 'audit_phi_access',
+                'ordering': ['-accessed_at'],
+                'indexes': [models.Index(fields=['patient', 'accessed_at'], name='audit_phi_a_patient_7d1097_idx'), models.Index(fields=['user', 'accessed_at'], name='audit_phi_a_user_id_7946dd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+import copy
+
+from django.db import router, transaction
+from django.db.models import JSONField
+
+from audit import outbox
+
+
+class AuditOutboxMixin:
+    """
+    Capture create/update/delete changes into the audit outbox.
+
+    Mix into a concrete model (before models.Model) to have every save write
+    one AuditOutboxEntry in the same transaction as the row itself. The values
+    a row was loaded with are kept on the instance, so diffs are computed in
+    memory instead of re-reading the row before each save.
+    """
+
+    # Fields never written to the audit log (noise on every save)
+    audit_exclude_fields = ('updated_at',)
+
+    # Fields whose values are replaced with a mask in the audit log
+    audit_mask_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_snapshot = instance._audit_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._audit_snapshot = {**getattr(self, '_audit_snapshot', {}), **self._audit_values(fields)}
+
+    def save_base(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        kwargs['using'] = using
+        created = self._state.adding
+
+        # Django sends post_save outside of its own atomic block, so the
+        # outbox row is written here to share the transaction with the save.
+        with transaction.atomic(using=using, savepoint=False):
+            super().save_base(*args, **kwargs)
+            outbox.record_save(self, created=created, using=using)
+
+        self._audit_snapshot = self._audit_values()
+
+    def _audit_values(self, fields=None):
+        """Return {attname: value} for the tracked fields loaded on this instance"""
+        values = {}
+        for field in outbox.tracked_fields(type(self)):
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                value = self.__dict__[field.attname]
+                # JSON values are mutated in place (e.g. Patient.add_precaution)
+                values[field.attname] = copy.deepcopy(value) if isinstance(field, JSONField) else value
+        return values
@@ -0,0 +1,181 @@
+import json
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from auditlog.models import LogEntry
+
+
+class AuditOutboxEntry(models.Model):
+    """
+    A captured model change waiting to be written to the audit log.
+
+    Rows are inserted in the same transaction as the audited change (so a
+    rolled-back save never leaves an audit row behind, and a committed save
+    always does), then moved into auditlog's LogEntry table in bulk by the
+    outbox flusher. The request path therefore pays for one narrow INSERT
+    instead of auditlog's pre-save read plus LogEntry write.
+    """
+
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Type of the audited object"
+    )
+
+    object_pk = models.CharField(
+        max_length=255,
+        help_text="Primary key of the audited object"
+    )
+
+    object_repr = models.TextField(
+        help_text="String representation of the object when the change was captured"
+    )
+
+    action = models.PositiveSmallIntegerField(
+        choices=LogEntry.Action.choices,
+        help_text="Create, update or delete"
+    )
+
+    changes = models.JSONField(
+        default=dict,
+        help_text="Changed fields as {field: [old, new]}"
+    )
+
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,  # Keep the request-path insert free of FK checks
+        related_name='+',
+        help_text="User who made the change"
+    )
+
+    remote_addr = models.GenericIPAddressField(
+        null=True,
+        blank=True,
+        help_text="Client address of the request that made the change"
+    )
+
+    timestamp = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the change was captured (copied to the log entry)"
+    )
+
+    class Meta:
+        db_table = 'audit_outbox'
+        ordering = ['id']
+        verbose_name = 'Audit Outbox Entry'
+        verbose_name_plural = 'Audit Outbox Entries'
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.object_repr} ({self.timestamp:%Y-%m-%d %H:%M:%S})"
+
+    def to_log_entry(self):
+        """Build (without saving) the LogEntry this outbox row becomes"""
+        object_id = int(self.object_pk) if self.object_pk.isdigit() else None
+        return LogEntry(
+            content_type_id=self.content_type_id,
+            object_pk=self.object_pk,
+            object_id=object_id,
+            object_repr=self.object_repr,
+            action=self.action,
+            changes=json.dumps(self.changes),
+            actor_id=self.actor_id,
+            remote_addr=self.remote_addr,
+            timestamp=self.timestamp,
+        )
+
+
+class PHIAccessLogQuerySet(models.QuerySet):
+    """Lookups served by the (patient, accessed_at) and (user, accessed_at) indexes"""
+
+    def for_patient(self, patient):
+        """Who accessed this patient, newest first"""
+        return self.filter(patient=patient).order_by('-accessed_at')
+
+    def for_user(self, user):
+        """What this user accessed, newest first"""
+        return self.filter(user=user).order_by('-accessed_at')
+
+
+class PHIAccessLog(models.Model):
+    """
+    Append-only record of why a user opened a patient's PHI.
+
+    Rows are written in batches by audit.access.AccessLogBuffer, so the
+    request only pays for an in-memory append. The reason is stored as a
+    small integer and relations skip database constraints: the log must
+    outlive the patients and users it refers to (e.g. after a retention
+    purge) and inserts should not wait on foreign key checks.
+    """
+
+    # Reason Codes
+    TREATMENT = 1
+    ASSESSMENT = 2
+    CARE_COORDINATION = 3
+    DOCUMENTATION = 4
+    DISCHARGE_PLANNING = 5
+    BILLING = 6
+    QUALITY_REVIEW = 7
+    PATIENT_REQUEST = 8
+    EMERGENCY = 9
+
+    REASON_CHOICES = [
+        (TREATMENT, 'Treatment'),
+        (ASSESSMENT, 'Assessment'),
+        (CARE_COORDINATION, 'Care coordination'),
+        (DOCUMENTATION, 'Documentation'),
+        (DISCHARGE_PLANNING, 'Discharge planning'),
+        (BILLING, 'Billing / payment'),
+        (QUALITY_REVIEW, 'Quality review / operations'),
+        (PATIENT_REQUEST, 'Patient request'),
+        (EMERGENCY, 'Emergency access'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        help_text="User who accessed the record"
+    )
+
+    patient = models.ForeignKey(
+        'patients.Patient',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        help_text="Patient whose PHI was accessed"
+    )
+
+    reason = models.PositiveSmallIntegerField(
+        choices=REASON_CHOICES,
+        help_text="Coded reason for accessing PHI"
+    )
+
+    endpoint = models.CharField(
+        max_length=100,
+        help_text="URL name (or path) of the endpoint that served the PHI"
+    )
+
+    accessed_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the PHI was accessed"
+    )
+
+    objects = PHIAccessLogQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'audit_phi_access'
+        ordering = ['-accessed_at']
+        verbose_name = 'PHI Access Log Entry'
+        verbose_name_plural = 'PHI Access Log'
+        indexes = [
+            models.Index(fields=['patient', 'accessed_at']),
+            models.Index(fields=['user', 'accessed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} accessed {self.patient_id} for {self.get_reason_display()} ({self.accessed_at:%Y-%m-%d %H:%M:%S})"
@@ -0,0 +1,122 @@
+"""
+Change capture for the audit outbox.
+
+Models opt in by inheriting audit.mixins.AuditOutboxMixin. Diffs are
+computed in memory against the values the instance was loaded with, so
+capturing a change never re-reads the row; the only database work on the
+request path is the single outbox INSERT.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import JSONField
+from django.utils.encoding import smart_str
+from auditlog.models import LogEntry
+
+from audit.context import get_actor, get_remote_addr
+from audit.models import AuditOutboxEntry
+
+MASK = '********'
+OBJECT_REPR_MAX_LENGTH = 255
+
+
+def tracked_fields(model):
+    """Return the concrete fields of `model` that are diffed into the audit log"""
+    cache = model.__dict__.get('_audit_tracked_fields')
+    if cache is None:
+        excluded = set(model.audit_exclude_fields)
+        cache = [
+            field for field in model._meta.concrete_fields
+            if field.name not in excluded and not field.primary_key
+        ]
+        model._audit_tracked_fields = cache
+    return cache
+
+
+def serialize_value(field, value):
+    """Convert a field value into the JSON form stored in `changes`"""
+    if value is None:
+        return None
+    if field.name in field.model.audit_mask_fields:
+        return MASK
+    if isinstance(field, JSONField):
+        return value
+    return smart_str(value)
+
+
+def compute_changes(instance, old_values, new_values):
+    """Return {field: [old, new]} for every tracked field whose value differs"""
+    changes = {}
+    for field in tracked_fields(type(instance)):
+        old = old_values.get(field.attname)
+        new = new_values.get(field.attname)
+        if old != new:
+            changes[field.name] = [serialize_value(field, old), serialize_value(field, new)]
+    return changes
+
+
+def enqueue(instance, action, changes, using):
+    """Write one outbox row describing `action` on `instance`"""
+    actor = get_actor()
+    return AuditOutboxEntry.objects.using(using).create(
+        content_type=ContentType.objects.db_manager(using).get_for_model(instance, for_concrete_model=False),
+        object_pk=smart_str(instance.pk),
+        object_repr=smart_str(instance)[:OBJECT_REPR_MAX_LENGTH],
+        action=action,
+        changes=changes,
+        actor_id=actor.pk if actor is not None else None,
+        remote_addr=get_remote_addr(),
+    )
+
+
+def record_save(instance, created, using):
+    """Queue a create/update entry for a saved instance; no-op if nothing tracked changed"""
+    if created:
+        changes = compute_changes(instance, {}, instance._audit_values())
+        action = LogEntry.Action.CREATE
+    else:
+        # Instances that were never loaded (bulk_create, Model(pk=...)) have no
+        # snapshot; every tracked value is then recorded as the new value.
+        snapshot = getattr(instance, '_audit_snapshot', {})
+        changes = compute_changes(instance, snapshot, instance._audit_values())
+        action = LogEntry.Action.UPDATE
+        if not changes:
+            return None
+    return enqueue(instance, action, changes, using)
+
+
+def record_bulk_saves(instances, created_pks, using, existing=None):
+    """
+    Queue entries for instances written in bulk, in one INSERT.
+
+    `created_pks` tells creates from updates. Bulk-written instances keep no
+    snapshot: an update's old values come from `existing`, {pk: the row as
+    loaded before the write}, and without one every tracked value is
+    recorded as new.
+    """
+    existing = existing or {}
+    if not instances:
+        return []
+    actor = get_actor()
+    content_type = ContentType.objects.db_manager(using).get_for_model(instances[0], for_concrete_model=False)
+    remote_addr = get_remote_addr()
+    return AuditOutboxEntry.objects.using(using).bulk_create([
+        AuditOutboxEntry(
+            content_type=content_type,
+            object_pk=smart_str(instance.pk),
+            object_repr=smart_str(instance)[:OBJECT_REPR_MAX_LENGTH],
+            action=LogEntry.Action.CREATE if instance.pk in created_pks else LogEntry.Action.UPDATE,
+            changes=compute_changes(
+                instance,
+                {} if instance.pk in created_pks else getattr(existing.get(instance.pk), '_audit_snapshot', {}),
+                instance._audit_values(),
+            ),
+            actor_id=actor.pk if actor is not None else None,
+            remote_addr=remote_addr,
+        )
+        for instance in instances
+    ])
+
+
+def record_delete(sender, instance, using, **kwargs):
+    """post_delete receiver: queue a delete entry inside the Collector's transaction"""
+    changes = compute_changes(instance, instance._audit_values(), {})
+    return enqueue(instance, LogEntry.Action.DELETE, changes, using)
@@ -0,0 +1,186 @@
+"""
+Monthly range partitioning of the audit log (PostgreSQL only).
+
+Migration 0002 turns auditlog's LogEntry table into a table partitioned by
+month on `timestamp`, one set per tenant schema. Indexes are declared on the
+parent, so each partition carries its own small copy, and queries filtered on
+`timestamp` are pruned to the matching months by the planner. Retention is
+enforced by detaching and dropping whole months, which never scans or
+vacuums rows the way DELETE would.
+
+Partitions are named <table>_pYYYYMM; a default partition catches rows
+outside every monthly range until the maintenance job creates that month.
+"""
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from auditlog.models import LogEntry
+
+PARENT_TABLE = LogEntry._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(day):
+    """Return the first day of the month containing `day`"""
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    """Return the first day of the month `months` after the month of `day`"""
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Return the partition table name for the month containing `month`"""
+    return f'{PARENT_TABLE}_p{month.year:04d}{month.month:02d}'
+
+
+def partition_month(name):
+    """Return the first day of the month a partition covers, or None for other tables"""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_partition_names(names, retention_days, today=None):
+    """
+    Return the monthly partitions whose every row is older than the retention period.
+
+    A month is only dropped once its last day has passed the cutoff, so no
+    row younger than `retention_days` is ever removed.
+    """
+    today = today or timezone.now().date()
+    cutoff = today - timedelta(days=retention_days)
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def is_supported(connection):
+    """Return True if the connection's database supports declarative partitioning"""
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(connection):
+    """Return True if the audit log in the current schema is already partitioned"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = current_schema()
+            """,
+            [PARENT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection, parent=PARENT_TABLE):
+    """Return the names of the monthly partitions of `parent` in the current schema"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE parent.relname = %s AND n.nspname = current_schema()
+            """,
+            [parent],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(name for name in names if partition_month(name) is not None)
+
+
+def create_partition(connection, month, parent=PARENT_TABLE):
+    """
+    Create the partition for `month` and attach it to `parent`.
+
+    Rows that already landed in the default partition for that month are
+    moved in the same transaction, since PostgreSQL refuses to attach a
+    range the default partition still holds rows for.
+    """
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    lower = month_start(month).isoformat()
+    upper = add_months(month, 1).isoformat()
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} (LIKE {quote(parent)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {quote(DEFAULT_PARTITION)}
+                WHERE "timestamp" >= %s::timestamptz AND "timestamp" < %s::timestamptz
+                RETURNING *
+            )
+            INSERT INTO {quote(name)} SELECT * FROM moved
+            """,
+            [f'{lower} 00:00:00+00', f'{upper} 00:00:00+00'],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(parent)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM ('{lower} 00:00:00+00') TO ('{upper} 00:00:00+00')"
+        )
+    return name
+
+
+def ensure_partitions(connection, months_ahead=None, today=None):
+    """Create missing partitions for the current month and `months_ahead` future months"""
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_LOG_PARTITION_MONTHS_AHEAD
+    today = today or timezone.now().date()
+
+    existing = set(list_partitions(connection))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(today, offset)
+        if partition_name(month) not in existing:
+            created.append(create_partition(connection, month))
+    return created
+
+
+def drop_partition(connection, name, parent=PARENT_TABLE):
+    """Detach and drop one monthly partition"""
+    quote = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(parent)} DETACH PARTITION {quote(name)}')
+        cursor.execute(f'DROP TABLE {quote(name)}')
+
+
+def purge_expired_partitions(connection, retention_days=None, today=None, dry_run=False):
+    """Drop every monthly partition older than the audit retention period; return their names"""
+    if retention_days is None:
+        retention_days = settings.AUDIT_LOG_RETENTION_DAYS
+
+    expired = expired_partition_names(list_partitions(connection), retention_days, today=today)
+    if not dry_run:
+        for name in expired:
+            drop_partition(connection, name)
+    return expired
+
+
+def recent_log_entries(months=3, today=None):
+    """
+    Return LogEntry rows from the last `months` calendar months (including this one).
+
+    The lower bound is a month boundary so the planner prunes the query to
+    exactly those partitions.
+    """
+    today = today or timezone.now().date()
+    since = add_months(today, -(months - 1))
+    return LogEntry.objects.filter(timestamp__gte=datetime(since.year, since.month, 1, tzinfo=dt_timezone.utc))
@@ -0,0 +1,448 @@
+import pytest
+from datetime import date, timedelta
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from auditlog.models import LogEntry
+from audit import access, partitions
+from audit.context import get_actor, set_actor
+from audit.flusher import flush_outbox
+from audit.middleware import AuditContextMiddleware
+from audit.models import AuditOutboxEntry, PHIAccessLog
+from monitoring import metrics
+from assessments.models import KatzADLAssessment
+from patients.models import Patient
+from users.models import User
+
+
+@pytest.fixture
+def test_user(db):
+    """Create a test OT user"""
+    return User.objects.create_user(
+        email='ot@example.com',
+        password='testpass123',
+        username='ot1',
+        first_name='Jane',
+        last_name='Therapist',
+        role=User.OT,
+        license_number='OT123',
+        license_expiry_date=date.today() + timedelta(days=365)
+    )
+
+
+@pytest.fixture
+def test_patient(db, test_user):
+    """Create a test patient"""
+    return Patient.objects.create(
+        medical_record_number='MRN001',
+        first_name='John',
+        last_name='Doe',
+        date_of_birth=date(1950, 1, 1),
+        gender=Patient.MALE,
+        primary_diagnosis='Stroke',
+        admission_date=date.today() - timedelta(days=10),
+        created_by=test_user
+    )
+
+
+def outbox_for(instance):
+    """Return outbox entries for an instance, oldest first"""
+    return list(AuditOutboxEntry.objects.filter(object_pk=str(instance.pk)))
+
+
+@pytest.mark.django_db
+class TestAuditOutboxCapture:
+    """Test that tracked model changes are captured into the outbox"""
+
+    def test_create_is_captured(self, test_patient):
+        """Test creating a patient queues one create entry"""
+        entries = outbox_for(test_patient)
+
+        assert len(entries) == 1
+        assert entries[0].action == LogEntry.Action.CREATE
+        assert entries[0].changes['medical_record_number'] == [None, 'MRN001']
+        assert entries[0].object_repr == str(test_patient)
+
+    def test_create_does_not_write_log_entry_synchronously(self, test_patient):
+        """Test nothing reaches the audit log until the outbox is flushed"""
+        assert LogEntry.objects.count() == 0
+
+    def test_update_records_only_changed_fields(self, test_patient):
+        """Test update entries contain old and new values of changed fields"""
+        test_patient.primary_diagnosis = 'Hip Fracture'
+        test_patient.save()
+
+        entry = outbox_for(test_patient)[-1]
+        assert entry.action == LogEntry.Action.UPDATE
+        assert entry.changes == {'primary_diagnosis': ['Stroke', 'Hip Fracture']}
+
+    def test_update_of_loaded_instance_uses_loaded_values(self, test_patient):
+        """Test diffs of instances read from the database use the loaded values"""
+        patient = Patient.objects.get(pk=test_patient.pk)
+        patient.first_name = 'Johnny'
+        patient.save()
+
+        entry = outbox_for(test_patient)[-1]
+        assert entry.changes == {'first_name': ['John', 'Johnny']}
+
+    def test_in_place_json_mutation_is_captured(self, test_patient):
+        """Test mutating a JSON list in place is detected"""
+        patient = Patient.objects.get(pk=test_patient.pk)
+        patient.add_precaution(Patient.PRECAUTION_FALL_RISK)
+
+        entry = outbox_for(test_patient)[-1]
+        assert entry.changes == {'precautions': [[], [Patient.PRECAUTION_FALL_RISK]]}
+
+    def test_save_without_changes_is_not_captured(self, test_patient):
+        """Test re-saving an unchanged instance queues nothing"""
+        test_patient.save()
+
+        assert len(outbox_for(test_patient)) == 1
+
+    def test_delete_is_captured(self, test_patient, test_user):
+        """Test deleting an assessment queues a delete entry"""
+        assessment = KatzADLAssessment.objects.create(
+            patient=test_patient,
+            assessed_by=test_user,
+            assessment_date=date.today(),
+            bathing=1, dressing=1, toileting=1,
+            transferring=1, continence=1, feeding=1
+        )
+        assessment_pk = assessment.pk
+        assessment.delete()
+
+        entries = list(AuditOutboxEntry.objects.filter(object_pk=str(assessment_pk)))
+        assert [entry.action for entry in entries] == [LogEntry.Action.CREATE, LogEntry.Action.DELETE]
+        assert entries[-1].changes['total_score'] == ['6', None]
+
+    def test_update_of_bulk_created_instance(self, test_user):
+        """Test instances never loaded from the database can still be updated"""
+        user = User(
+            email='bulk@example.com', username='bulk1', first_name='Bulk',
+            last_name='User', role=User.VIEWER
+        )
+        User.objects.bulk_create([user])
+        user.increment_failed_login()
+
+        entry = outbox_for(user)[-1]
+        assert entry.action == LogEntry.Action.UPDATE
+        assert entry.changes['failed_login_attempts'] == [None, '1']
+
+    def test_masked_fields(self, test_user):
+        """Test user secrets never reach the outbox"""
+        entry = outbox_for(test_user)[0]
+
+        assert entry.changes['password'] == [None, '********']
+
+    def test_rolled_back_save_leaves_no_entry(self, test_patient):
+        """Test the outbox row shares the transaction of the audited change"""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                test_patient.first_name = 'Rolled'
+                test_patient.save()
+                raise RuntimeError('abort')
+
+        assert len(outbox_for(test_patient)) == 1
+
+    def test_actor_is_recorded(self, test_patient, test_user):
+        """Test the context actor is stamped on captured entries"""
+        with set_actor(test_user, remote_addr='10.0.0.1'):
+            test_patient.last_name = 'Smith'
+            test_patient.save()
+
+        entry = outbox_for(test_patient)[-1]
+        assert entry.actor_id == test_user.pk
+        assert entry.remote_addr == '10.0.0.1'
+
+
+@pytest.mark.django_db
+class TestAuditOutboxFlush:
+    """Test moving outbox entries into the audit log"""
+
+    def test_flush_moves_entries_to_log(self, test_patient):
+        """Test flushing empties the outbox into LogEntry"""
+        pending = AuditOutboxEntry.objects.count()
+
+        assert flush_outbox() == pending
+        assert AuditOutboxEntry.objects.count() == 0
+        assert LogEntry.objects.count() == pending
+
+    def test_flush_preserves_capture_details(self, test_patient, test_user):
+        """Test LogEntry keeps the captured timestamp, actor and diff"""
+        with set_actor(test_user, remote_addr='10.0.0.1'):
+            test_patient.last_name = 'Smith'
+            test_patient.save()
+        captured = outbox_for(test_patient)[-1]
+
+        flush_outbox()
+
+        entry = LogEntry.objects.get_for_object(test_patient).filter(action=LogEntry.Action.UPDATE).get()
+        assert entry.timestamp == captured.timestamp
+        assert entry.actor_id == test_user.pk
+        assert entry.remote_addr == '10.0.0.1'
+        assert entry.changes_dict == {'last_name': ['Doe', 'Smith']}
+
+    def test_flush_in_small_batches(self, test_patient):
+        """Test the outbox drains completely across several batches"""
+        for name in ['A', 'B', 'C', 'D']:
+            test_patient.first_name = name
+            test_patient.save()
+        pending = AuditOutboxEntry.objects.count()
+
+        assert flush_outbox(batch_size=2) == pending
+        assert AuditOutboxEntry.objects.count() == 0
+
+    def test_flush_command(self, test_patient):
+        """Test the management command drains the outbox"""
+        call_command('flush_audit_outbox', verbosity=0)
+
+        assert AuditOutboxEntry.objects.count() == 0
+        assert LogEntry.objects.get_for_object(test_patient).count() == 1
+
+
+@pytest.mark.django_db
+class TestAuditContextMiddleware:
+    """Test the request actor is published to the audit context"""
+
+    def test_actor_resolved_from_request_user(self, test_user):
+        """Test the request user is the actor during the request"""
+        seen = {}
+
+        def view(request):
+            seen['actor'] = get_actor()
+            return None
+
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.2')
+        request.user = test_user
+        AuditContextMiddleware(view)(request)
+
+        assert seen['actor'] == test_user
+        assert get_actor() is None
+
+
+# =============================================================================
+# AUDIT LOG PARTITIONING TESTS
+# =============================================================================
+
+class TestAuditPartitionNaming:
+    """Test month arithmetic and retention selection for audit partitions"""
+
+    def test_add_months_across_year_boundary(self):
+        """Test month offsets wrap years in both directions"""
+        assert partitions.add_months(date(2026, 11, 15), 3) == date(2027, 2, 1)
+        assert partitions.add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+
+    def test_partition_name_round_trip(self):
+        """Test partition names encode and decode their month"""
+        name = partitions.partition_name(date(2026, 3, 17))
+
+        assert name == 'auditlog_logentry_p202603'
+        assert partitions.partition_month(name) == date(2026, 3, 1)
+        assert partitions.partition_month(partitions.DEFAULT_PARTITION) is None
+
+    def test_expired_partitions_respect_whole_months(self):
+        """Test a month is only expired once all of its rows are past retention"""
+        names = [partitions.partition_name(date(2026, month, 1)) for month in (1, 2, 3)]
+
+        # Cutoff is 2026-03-01: January and February are entirely older
+        expired = partitions.expired_partition_names(names, retention_days=31, today=date(2026, 4, 1))
+
+        assert expired == ['auditlog_logentry_p202601', 'auditlog_logentry_p202602']
+
+    def test_expired_partitions_ignore_default_partition(self):
+        """Test the default partition is never selected for dropping"""
+        names = [partitions.DEFAULT_PARTITION]
+
+        assert partitions.expired_partition_names(names, retention_days=0, today=date(2030, 1, 1)) == []
+
+    def test_recent_log_entries_bound_is_month_start(self):
+        """Test the recent-entries filter starts on a partition boundary"""
+        queryset = partitions.recent_log_entries(months=2, today=date(2026, 10, 18))
+        lower = queryset.query.where.children[0].rhs
+
+        assert (lower.year, lower.month, lower.day, lower.hour) == (2026, 9, 1, 0)
+
+
+@pytest.mark.django_db
+class TestAuditPartitionMaintenance:
+    """Test partition maintenance against the configured database"""
+
+    @pytest.fixture(autouse=True)
+    def require_postgresql(self):
+        if not partitions.is_supported(connection):
+            pytest.skip('Audit log partitioning requires PostgreSQL')
+
+    def test_migration_partitions_audit_log(self):
+        """Test the audit log is partitioned with current and upcoming months"""
+        existing = partitions.list_partitions(connection)
+
+        assert partitions.is_partitioned(connection)
+        assert partitions.partition_name(date.today()) in existing
+
+    def test_flushed_entries_land_in_monthly_partition(self, test_patient):
+        """Test flushed rows are stored in the partition for their month"""
+        flush_outbox()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {partitions.partition_name(date.today())}')
+            assert cursor.fetchone()[0] == LogEntry.objects.count()
+
+    def test_create_partition_moves_rows_from_default(self, test_patient):
+        """Test creating a month moves rows that fell into the default partition"""
+        month = partitions.add_months(date.today(), 26)
+        flushed = flush_outbox()
+        LogEntry.objects.update(timestamp=timezone.now() + timedelta(days=800))
+
+        created = partitions.ensure_partitions(connection, months_ahead=30)
+
+        assert partitions.partition_name(month) in created
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {partitions.DEFAULT_PARTITION}')
+            assert cursor.fetchone()[0] == 0
+        assert LogEntry.objects.count() == flushed
+
+    def test_purge_drops_expired_partitions(self):
+        """Test expired months are dropped and recent ones kept"""
+        old_month = partitions.add_months(date.today(), -40)
+        partitions.create_partition(connection, old_month)
+
+        dropped = partitions.purge_expired_partitions(connection, retention_days=365)
+
+        assert partitions.partition_name(old_month) in dropped
+        assert partitions.partition_name(old_month) not in partitions.list_partitions(connection)
+        assert partitions.partition_name(date.today()) in partitions.list_partitions(connection)
+
+    def test_purge_dry_run_keeps_partitions(self):
+        """Test a dry run reports but does not drop expired months"""
+        old_month = partitions.add_months(date.today(), -40)
+        partitions.create_partition(connection, old_month)
+
+        dropped = partitions.purge_expired_partitions(connection, retention_days=365, dry_run=True)
+
+        assert partitions.partition_name(old_month) in dropped
+        assert partitions.partition_name(old_month) in partitions.list_partitions(connection)
+
+
+# =============================================================================
+# PHI ACCESS LOG TESTS
+# =============================================================================
+
+@pytest.fixture
+def access_buffer(monkeypatch):
+    """A fresh synchronous access log buffer installed as the module buffer"""
+    buffer = access.AccessLogBuffer(max_size=3, flush_interval=0)
+    monkeypatch.setattr(access, 'access_log_buffer', buffer)
+    return buffer
+
+
+def chart_request(user, reason=None):
+    """Build a chart-open request for `user`, optionally carrying a reason header"""
+    headers = {'HTTP_X_PHI_ACCESS_REASON': reason} if reason is not None else {}
+    request = RequestFactory().get('/api/patients/chart/', **headers)
+    request.user = user
+    return request
+
+
+class TestPHIAccessReason:
+    """Test parsing of the PHI access reason header"""
+
+    def test_parse_reason_accepts_names_and_codes(self):
+        """Test reasons can be given by name or integer code"""
+        assert access.parse_reason('treatment') == PHIAccessLog.TREATMENT
+        assert access.parse_reason('Discharge_Planning') == PHIAccessLog.DISCHARGE_PLANNING
+        assert access.parse_reason('9') == PHIAccessLog.EMERGENCY
+
+    def test_parse_reason_rejects_unknown_values(self):
+        """Test unknown names and codes are rejected"""
+        assert access.parse_reason('curiosity') is None
+        assert access.parse_reason('42') is None
+        assert access.parse_reason(None) is None
+
+    def test_missing_reason_denied_when_required(self, settings):
+        """Test PHI access without a reason is denied while reasons are required"""
+        settings.REQUIRE_PHI_ACCESS_REASON = True
+
+        with pytest.raises(PermissionDenied):
+            access.get_access_reason(RequestFactory().get('/'))
+
+    def test_missing_reason_defaults_when_optional(self, settings):
+        """Test a missing reason falls back to treatment when not required"""
+        settings.REQUIRE_PHI_ACCESS_REASON = False
+
+        assert access.get_access_reason(RequestFactory().get('/')) == PHIAccessLog.TREATMENT
+
+
+@pytest.mark.django_db
+class TestPHIAccessLog:
+    """Test buffered recording and querying of PHI access"""
+
+    def test_record_access_is_buffered(self, access_buffer, test_user, test_patient):
+        """Test recording an access does not write until the buffer flushes"""
+        access.record_access(chart_request(test_user, 'assessment'), test_patient)
+
+        assert len(access_buffer) == 1
+        assert PHIAccessLog.objects.count() == 0
+
+    def test_flush_writes_entries(self, access_buffer, test_user, test_patient):
+        """Test flushing writes the buffered accesses with coded reasons"""
+        access.record_access(chart_request(test_user, 'assessment'), test_patient)
+
+        assert access_buffer.flush() == 1
+        entry = PHIAccessLog.objects.get()
+        assert entry.user_id == test_user.pk
+        assert entry.patient_id == test_patient.pk
+        assert entry.reason == PHIAccessLog.ASSESSMENT
+        assert entry.endpoint == '/api/patients/chart/'
+
+    def test_full_buffer_flushes_in_one_batch(self, access_buffer, test_user, test_patient):
+        """Test reaching the buffer size writes every pending entry"""
+        for _ in range(3):
+            access.record_access(chart_request(test_user, 'treatment'), test_patient)
+
+        assert len(access_buffer) == 0
+        assert PHIAccessLog.objects.count() == 3
+
+    def test_failing_writes_keep_a_bounded_buffer(self, test_user, test_patient, monkeypatch):
+        """Test re-queued entries from failed flushes are capped, dropping and counting the oldest"""
+        buffer = access.AccessLogBuffer(max_size=3, flush_interval=1, max_buffered=5)
+        monkeypatch.setattr(access, 'access_log_buffer', buffer)
+        monkeypatch.setattr(buffer, '_ensure_thread', lambda: None)
+
+        def fail(*args, **kwargs):
+            raise DatabaseError('database unavailable')
+
+        monkeypatch.setattr(PHIAccessLog.objects, 'bulk_create', fail)
+        dropped = metrics.phi_access_log_dropped.value()
+        for reason in ['treatment', 'billing'] * 4:
+            access.record_access(chart_request(test_user, reason), test_patient)
+            assert buffer.flush() == 0
+            assert len(buffer) <= 5
+
+        assert len(buffer) == 5
+        assert metrics.phi_access_log_dropped.value() == dropped + 3
+        assert [entry[3] for entry in buffer._entries] == [
+            PHIAccessLog.BILLING, PHIAccessLog.TREATMENT, PHIAccessLog.BILLING,
+            PHIAccessLog.TREATMENT, PHIAccessLog.BILLING,
+        ]
+
+    def test_record_access_requires_reason(self, access_buffer, test_user, test_patient, settings):
+        """Test an access without a reason is refused and not logged"""
+        settings.REQUIRE_PHI_ACCESS_REASON = True
+
+        with pytest.raises(PermissionDenied):
+            access.record_access(chart_request(test_user), test_patient)
+        assert len(access_buffer) == 0
+
+    def test_queries_by_patient_and_user(self, access_buffer, test_user, test_patient):
+        """Test who-accessed-patient and what-did-user-access lookups"""
+        access.record_access(chart_request(test_user, 'treatment'), test_patient)
+        access.record_access(chart_request(test_user, 'billing'), test_patient)
+        access_buffer.flush()
+
+        by_patient = PHIAccessLog.objects.for_patient(test_patient)
+        by_user = PHIAccessLog.objects.for_user(test_user)
+
+        assert [entry.reason for entry in by_patient] == [PHIAccessLog.BILLING, PHIAccessLog.TREATMENT]
+        assert by_user.count() == 2
@@ -0,0 +1,16 @@
+"""
+Performance benchmarks for the model-layer hot paths.
+
+Run from the backend directory (not collected by pytest, and run without
+coverage):
+
+    python -m benchmarks --scale 1k
+    python -m benchmarks --scale 100k --save-baseline
+    python -m benchmarks --scale 100k --baseline benchmarks/baselines/100k.json
+
+Synthetic data is loaded into a throwaway test database (in-memory SQLite
+with the default config.settings_test; pass --settings to benchmark against
+PostgreSQL). Results are written as JSON to benchmarks/results/ and, when a
+baseline is given, compared against it; any case slower than the baseline by
+more than --threshold exits non-zero.
+"""
@@ -0,0 +1,94 @@
+"""Command-line entry point: python -m benchmarks --help"""
+import argparse
+import json
+import os
+import sys
+import time
+
+DEFAULT_OPS = 200
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD = 0.10
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--scale', default='1k', choices=('1k', '100k', '1m'),
+                        help='Number of synthetic patients to load (default: 1k)')
+    parser.add_argument('--ops', type=int, default=DEFAULT_OPS,
+                        help='Operations per round for per-record cases (default: %(default)s)')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help='Timed rounds per case (default: %(default)s)')
+    parser.add_argument('--case', action='append', dest='cases',
+                        help='Run only this case (repeatable)')
+    parser.add_argument('--settings', default='config.settings_test',
+                        help='Django settings module (default: %(default)s)')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<time>-<scale>.json)')
+    parser.add_argument('--baseline', help='Baseline file to compare against '
+                                           '(default: benchmarks/baselines/<scale>.json if present)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Also write the results as the baseline for this scale')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown before a case counts as regressed (default: 0.10)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.db import connection
+
+    from . import data, runner
+    from .cases import CASES
+
+    unknown = set(args.cases or ()) - set(CASES)
+    if unknown:
+        print(f'Unknown case(s): {", ".join(sorted(unknown))}', file=sys.stderr)
+        return 2
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        print(f'Loading {args.scale} synthetic patients into {connection.vendor}...')
+        start = time.perf_counter()
+        user = data.load(args.scale)
+        load_seconds = time.perf_counter() - start
+        print(f'Loaded in {load_seconds:.1f}s\n')
+
+        report = runner.run(user, args.scale, args.ops, args.rounds,
+                            names=args.cases, load_seconds=load_seconds)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    path = runner.write_results(report, args.output)
+    print(f'\nResults written to {path}')
+    if args.save_baseline:
+        path = runner.write_results(report, runner.baseline_path(args.scale))
+        print(f'Baseline written to {path}')
+        return 0
+
+    baseline_file = args.baseline or runner.baseline_path(args.scale)
+    if not os.path.exists(baseline_file):
+        print('No baseline to compare against (use --save-baseline to create one)')
+        return 0
+
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    rows = runner.compare(report, baseline, args.threshold)
+    print(f'\nCompared with {baseline_file} (threshold {args.threshold:.0%}):')
+    for name, previous, current, ratio, regressed in rows:
+        flag = 'REGRESSION' if regressed else ''
+        print(f'{name:32s} {previous:12.1f} -> {current:12.1f} us/op  {ratio:6.2f}x  {flag}')
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f'\n{len(regressions)} case(s) regressed')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
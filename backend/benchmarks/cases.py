@@ -0,0 +1,267 @@
+"""
+Benchmark cases.
+
+Each case is a function taking the benchmark context and returning the
+number of operations it performed; the runner times it over several rounds
+and reports the per-operation cost. Cases that produce output add its size
+to ctx.output_bytes, reported per operation. Every round runs inside a transaction
+that is rolled back, so write-path cases leave the dataset unchanged.
+"""
+import random
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import middleware, renderers
+from assessments import bulk
+from assessments.models import BarthelAssessment, FIMAssessment, KatzADLAssessment
+from assessments.serializers import FIMAssessmentSerializer
+from patients import synthetic
+from patients.models import Patient
+from patients.retention import ASSESSMENT_MODELS
+from users.models import User
+
+from . import data
+
+CASES = {}
+
+
+def benchmark(name):
+    """Register a benchmark case under `name`"""
+    def decorator(func):
+        CASES[name] = func
+        return func
+    return decorator
+
+
+class BenchmarkContext:
+    """Shared state for the cases: the loaded clinician and a sample of patients"""
+
+    def __init__(self, user, ops, seed=42):
+        self.user = user
+        self.ops = ops
+        self.rng = random.Random(seed)
+        self.patient_ids = list(
+            Patient.objects.order_by('?').values_list('id', flat=True)[:ops]
+        )
+        self.assessments = {
+            model: list(model.objects.all()[:ops]) for model in ASSESSMENT_MODELS
+        }
+        self.output_bytes = 0
+        self._sequence = 0
+        self._fim_payload = None
+
+    @property
+    def fim_payload(self):
+        """The sampled FIM assessments, serialized as the API sends them"""
+        if self._fim_payload is None:
+            self._fim_payload = FIMAssessmentSerializer(self.assessments[FIMAssessment], many=True).data
+        return self._fim_payload
+
+    def next_index(self):
+        self._sequence += 1
+        return 90_000_000 + self._sequence
+
+
+# =============================================================================
+# MODEL SAVE PATHS
+# =============================================================================
+
+@benchmark('patient.save')
+def patient_save(ctx):
+    """Create patients through Patient.save() (full_clean + audit outbox)"""
+    for _ in range(ctx.ops):
+        data.build_patient(ctx.rng, ctx.next_index(), ctx.user).save()
+    return ctx.ops
+
+
+@benchmark('patient.update')
+def patient_update(ctx):
+    """Re-save existing patients with a single changed field"""
+    patients = Patient.objects.filter(id__in=ctx.patient_ids)
+    for patient in patients:
+        patient.referring_physician = f'Dr. Bench {ctx.rng.randint(1, 999)}'
+        patient.save()
+    return len(ctx.patient_ids)
+
+
+def _assessment_save(ctx, model):
+    patients = list(Patient.objects.filter(id__in=ctx.patient_ids))
+    template = ctx.assessments[model][0]
+    items = {name: getattr(template, name) for name in synthetic.INSTRUMENT_ITEMS[model]}
+    for patient in patients:
+        assessment = model(
+            patient=patient,
+            assessed_by=ctx.user,
+            assessment_date=patient.admission_date,
+            **items,
+        )
+        assessment.save()
+    return len(patients)
+
+
+@benchmark('assessment.katz.save')
+def katz_save(ctx):
+    return _assessment_save(ctx, KatzADLAssessment)
+
+
+@benchmark('assessment.barthel.save')
+def barthel_save(ctx):
+    return _assessment_save(ctx, BarthelAssessment)
+
+
+@benchmark('assessment.fim.save')
+def fim_save(ctx):
+    return _assessment_save(ctx, FIMAssessment)
+
+
+def _bulk_upsert(ctx, records):
+    instances = bulk.build(FIMAssessment, FIMAssessmentSerializer, records, ctx.user)
+    bulk.upsert(FIMAssessment, instances)
+    return len(records)
+
+
+@benchmark('assessment.fim.bulk_upsert')
+def fim_bulk_upsert(ctx):
+    """Validate, score and insert the sampled FIM assessments as one batch under new ids"""
+    return _bulk_upsert(ctx, [{**record, 'id': str(uuid.uuid4())} for record in ctx.fim_payload])
+
+
+@benchmark('assessment.fim.bulk_replay')
+def fim_bulk_replay(ctx):
+    """Replay the sampled FIM assessments unchanged (one statement on PostgreSQL)"""
+    return _bulk_upsert(ctx, ctx.fim_payload)
+
+
+# =============================================================================
+# SCORING
+# =============================================================================
+
+@benchmark('assessment.scoring')
+def scoring(ctx):
+    """calculate_total_score() + get_interpretation() on loaded instances"""
+    ops = 0
+    for assessments in ctx.assessments.values():
+        for assessment in assessments:
+            assessment.calculate_total_score()
+            assessment.get_interpretation()
+            ops += 1
+    return ops
+
+
+# =============================================================================
+# EXPORTS AND READS
+# =============================================================================
+
+@benchmark('patient.anonymize_for_export')
+def anonymize_for_export(ctx):
+    """Anonymize every patient in the dataset, streamed from the database"""
+    ops = 0
+    for patient in Patient.objects.iterator(chunk_size=2000):
+        patient.anonymize_for_export()
+        ops += 1
+    return ops
+
+
+@benchmark('patient.timeline')
+def timeline(ctx):
+    """Read each sampled patient's assessment history across all instruments"""
+    for patient_id in ctx.patient_ids:
+        history = []
+        for model in ASSESSMENT_MODELS:
+            history.extend(
+                model.objects.filter(patient_id=patient_id).order_by('assessment_date')
+            )
+        history.sort(key=lambda assessment: assessment.assessment_date)
+    return len(ctx.patient_ids)
+
+
+# =============================================================================
+# RENDERING AND COMPRESSION (FIM rows, the widest the API sends)
+# =============================================================================
+
+def _render(ctx, renderer):
+    ctx.output_bytes += len(renderer.render(ctx.fim_payload))
+    return len(ctx.fim_payload)
+
+
+def _compress(ctx, encoding):
+    body = renderers.ORJSONRenderer().render(ctx.fim_payload)
+    ctx.output_bytes += len(middleware.compress(body, encoding))
+    return len(ctx.fim_payload)
+
+
+@benchmark('render.fim.json')
+def render_json(ctx):
+    """DRF's JSONRenderer (per assessment)"""
+    return _render(ctx, JSONRenderer())
+
+
+@benchmark('render.fim.orjson')
+def render_orjson(ctx):
+    """ORJSONRenderer (per assessment)"""
+    return _render(ctx, renderers.ORJSONRenderer())
+
+
+if renderers.msgpack is not None:
+    @benchmark('render.fim.msgpack')
+    def render_msgpack(ctx):
+        """MessagePackRenderer (per assessment)"""
+        return _render(ctx, renderers.MessagePackRenderer())
+
+
+@benchmark('compress.fim.gzip')
+def compress_gzip(ctx):
+    """orjson rendering plus gzip (per assessment)"""
+    return _compress(ctx, 'gzip')
+
+
+if middleware.brotli is not None:
+    @benchmark('compress.fim.brotli')
+    def compress_brotli(ctx):
+        """orjson rendering plus brotli (per assessment)"""
+        return _compress(ctx, 'br')
+
+
+# =============================================================================
+# LOGIN PATH
+# =============================================================================
+
+@benchmark('user.login_path')
+def login_path(ctx):
+    """The User methods the login view runs: lock check, password, reset"""
+    user = User.objects.get(pk=ctx.user.pk)
+    for _ in range(ctx.ops):
+        user.is_account_locked()
+        user.check_password('benchmark-password-123')
+        user.is_password_expired()
+        user.is_session_expired()
+        user.reset_failed_login_attempts()
+    return ctx.ops
+
+
+@benchmark('user.failed_login')
+def failed_login(ctx):
+    """increment_failed_login() up to and including the lockout"""
+    password = make_password('benchmark-password-123')
+    users = [
+        User(
+            email=f'bench_lock{ctx.next_index()}@example.com',
+            username=f'bench_lock{ctx.next_index()}',
+            password=password,
+            first_name='Bench',
+            last_name='Lockout',
+            role=User.VIEWER,
+            password_last_changed=timezone.now(),
+        )
+        for _ in range(max(ctx.ops // 5, 1))
+    ]
+    User.objects.bulk_create(users)
+    ops = 0
+    for user in users:
+        for _ in range(5):
+            user.increment_failed_login()
+            ops += 1
+    return ops
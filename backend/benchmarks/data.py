@@ -0,0 +1,44 @@
+"""Synthetic data for the benchmarks (see patients.synthetic)"""
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from patients import synthetic
+from patients.models import Patient
+from users.models import User
+
+SCALES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+BATCH_SIZE = 5_000
+
+
+def create_clinician(username='bench_ot'):
+    return User.objects.create_user(
+        email=f'{username}@example.com',
+        password='benchmark-password-123',
+        username=username,
+        first_name='Bench',
+        last_name='Therapist',
+        role=User.OT,
+        license_number='OT-BENCH',
+        license_expiry_date=date.today() + timedelta(days=365),
+    )
+
+
+def build_patient(rng, index, user):
+    """Return an unsaved, valid Patient"""
+    profile = synthetic.patient_profiles(rng, 1, timezone.localdate())[0]
+    return Patient(**synthetic.patient_row(rng, index, profile, user.pk, timezone.now()))
+
+
+def load(scale, seed=42):
+    """Load `scale` patients with one assessment each; return the clinician user"""
+    user = create_clinician()
+    synthetic.generate_schema(
+        SCALES[scale], visits=(1, 1), batch_size=BATCH_SIZE, seed=seed, clinician_ids=[user.pk]
+    )
+    return user
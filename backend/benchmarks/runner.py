@@ -0,0 +1,128 @@
+"""Timing, result files and baseline comparison for the benchmark suite"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+import django
+from django.db import connection, transaction
+
+from monitoring.instrumentation import RequestStats, activate, deactivate
+
+from .cases import CASES, BenchmarkContext
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(func, ctx, rounds, warmup=1):
+    """
+    Time `func` over `warmup + rounds` rolled-back rounds.
+
+    Returns per-operation timings in microseconds plus the queries, model
+    save/full_clean time and output bytes per operation from the last round.
+    """
+    per_op = []
+    for round_number in range(warmup + rounds):
+        stats = RequestStats()
+        ctx.output_bytes = 0
+        with transaction.atomic():
+            token = activate(stats)
+            try:
+                with connection.execute_wrapper(stats):
+                    start = time.perf_counter()
+                    ops = func(ctx)
+                    elapsed = time.perf_counter() - start
+            finally:
+                deactivate(token)
+            transaction.set_rollback(True)
+        if round_number >= warmup:
+            per_op.append(elapsed / max(ops, 1) * 1_000_000)
+
+    per_op.sort()
+    return {
+        'ops': ops,
+        'rounds': rounds,
+        'median_us': statistics.median(per_op),
+        'mean_us': statistics.fmean(per_op),
+        'min_us': per_op[0],
+        'max_us': per_op[-1],
+        'stdev_us': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+        'queries_per_op': stats.query_count / max(ops, 1),
+        'db_us_per_op': stats.db_time / max(ops, 1) * 1_000_000,
+        'save_us_per_op': stats.sections.get('save', 0.0) / max(ops, 1) * 1_000_000,
+        'full_clean_us_per_op': stats.sections.get('full_clean', 0.0) / max(ops, 1) * 1_000_000,
+        'bytes_per_op': ctx.output_bytes / max(ops, 1),
+    }
+
+
+def run(user, scale, ops, rounds, names=None, load_seconds=None, log=print):
+    ctx = BenchmarkContext(user, ops)
+    results = {}
+    for name, func in CASES.items():
+        if names and name not in names:
+            continue
+        results[name] = run_case(func, ctx, rounds)
+        size = f', {results[name]["bytes_per_op"]:.0f} bytes/op' if results[name]['bytes_per_op'] else ''
+        log(f'{name:32s} {results[name]["median_us"]:12.1f} us/op  '
+            f'({results[name]["queries_per_op"]:.1f} queries/op{size})')
+
+    return {
+        'meta': {
+            'scale': scale,
+            'ops': ops,
+            'rounds': rounds,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'load_seconds': load_seconds,
+        },
+        'results': results,
+    }
+
+
+def write_results(report, path=None):
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = RESULTS_DIR / f'{stamp}-{report["meta"]["scale"]}.json'
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    return path
+
+
+def baseline_path(scale):
+    return BASELINES_DIR / f'{scale}.json'
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare median per-op time against a baseline report.
+
+    Returns a list of (name, baseline_us, current_us, ratio, regressed) for
+    the cases present in both. A case regresses when it is slower than the
+    baseline by more than `threshold` (0.10 == 10%).
+    """
+    rows = []
+    for name, current in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = current['median_us'] / previous['median_us'] if previous['median_us'] else 1.0
+        rows.append((name, previous['median_us'], current['median_us'], ratio, ratio > 1 + threshold))
+    return rows
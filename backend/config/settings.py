@@ -9,6 +9,7 @@ This configuration includes:
 - PostgreSQL database configuration
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
 import os
@@ -63,6 +64,8 @@ SHARED_APPS = [
 
     # Our shared apps
     'organizations',  # Organization/tenant management
+    'monitoring',     # Request instrumentation and query budgets
+    'api',            # REST API root and shared view machinery
 ]
 
 # Tenant-specific apps - each tenant has their own tables
@@ -72,11 +75,13 @@ TENANT_APPS = [
 
     # Audit logging
     'auditlog',
+    'audit',         # Transactional audit outbox feeding auditlog
 
     # Our tenant-specific apps
     'users',         # Therapists and staff
     'patients',      # Patient records (PHI)
     'assessments',   # Assessment forms and results
+    'sync',          # Change log for offline clients
 ]
 
 INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in SHARED_APPS]
@@ -90,7 +95,10 @@ TENANT_DOMAIN_MODEL = "organizations.Domain"
 # =============================================================================
 
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware',  # Must be first
+    'organizations.middleware.TenantMiddleware',  # Must be first (django-tenants routing)
+    'monitoring.middleware.RequestProfilingMiddleware',  # Opt-in sampling profiler
+    'monitoring.middleware.RequestInstrumentationMiddleware',  # Query count / DB time per request
+    'api.middleware.CompressionMiddleware',  # brotli/gzip above RESPONSE_COMPRESSION_MIN_BYTES
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -99,7 +107,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'auditlog.middleware.AuditlogMiddleware',  # Audit logging
+    'audit.middleware.AuditContextMiddleware',  # Audit logging (actor for the audit outbox)
 ]
 
 # =============================================================================
@@ -139,18 +147,46 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # DATABASE
 # =============================================================================
 
+# django-tenants' backend plus a per-process connection pool and a cached
+# search_path (organizations/postgresql_backend). Connections go back to the
+# pool at the end of each request, so CONN_MAX_AGE stays 0. Size the pool for
+# a process's request threads plus its API_QUERY_WORKERS.
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        'ENGINE': 'organizations.postgresql_backend',
         'NAME': config('DB_NAME', default='ot_assessment_db'),
         'USER': config('DB_USER', default='ot_user'),
         'PASSWORD': config('DB_PASSWORD', default='ot_password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=20, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=float),  # seconds to wait for a free connection
+            'MAX_LIFETIME': 1800,  # seconds before a connection is replaced
+        },
     }
 }
 
+# Read replica for analytics, export and report reads (organizations.routers.
+# use_replica). Set DB_REPLICA_HOST to enable it; pointing it at the primary or
+# a local copy of the database exercises the routing without a standby.
+REPLICA_DATABASE_ALIAS = 'replica'
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_READS = config('REPLICA_READS', default=True, cast=bool)
+# Reads fall back to the primary while the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=30, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = 5  # seconds
+
 DATABASE_ROUTERS = (
+    'organizations.routers.ReplicaRouter',
     'django_tenants.routers.TenantSyncRouter',
 )
 
@@ -192,17 +228,50 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
+        # Accept: application/msgpack, when msgpack is installed
+        *(('api.renderers.MessagePackRenderer',) if find_spec('msgpack') else ()),
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': (
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    'EXCEPTION_HANDLER': 'api.exceptions.exception_handler',
 }
 
+# Most operations one POST /api/batch/ may carry (api.batch)
+BATCH_MAX_OPERATIONS = config('BATCH_MAX_OPERATIONS', default=25, cast=int)
+
+# Changes per GET /api/sync/changes/ page (default, most a client may ask for)
+# and records per POST /api/sync/upload/ (sync.views)
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_MAX_PAGE_SIZE = config('SYNC_MAX_PAGE_SIZE', default=2000, cast=int)
+SYNC_UPLOAD_MAX_RECORDS = config('SYNC_UPLOAD_MAX_RECORDS', default=500, cast=int)
+
+# Live event streams, GET /api/sync/events/ (sync.events): seconds of silence
+# before a heartbeat, client reconnect delay (ms), events a stream may fall
+# behind before it is closed, the hub's poll interval in seconds (safety net
+# behind LISTEN/NOTIFY on PostgreSQL) and most missed events replayed on reconnect
+EVENT_STREAM_HEARTBEAT = config('EVENT_STREAM_HEARTBEAT', default=15.0, cast=float)
+EVENT_STREAM_RETRY = config('EVENT_STREAM_RETRY', default=3000, cast=int)
+EVENT_STREAM_QUEUE_SIZE = config('EVENT_STREAM_QUEUE_SIZE', default=1000, cast=int)
+EVENT_STREAM_POLL_INTERVAL = config('EVENT_STREAM_POLL_INTERVAL', default=2.0, cast=float)
+EVENT_STREAM_REPLAY_LIMIT = config('EVENT_STREAM_REPLAY_LIMIT', default=500, cast=int)
+
+# Most assessments one POST /api/assessments/<instrument>/bulk/ may carry (assessments.bulk)
+BULK_UPSERT_MAX_RECORDS = config('BULK_UPSERT_MAX_RECORDS', default=500, cast=int)
+
+# Responses smaller than this are sent uncompressed (api.middleware.CompressionMiddleware)
+RESPONSE_COMPRESSION_MIN_BYTES = config('RESPONSE_COMPRESSION_MIN_BYTES', default=1024, cast=int)
+
+# Async read endpoints (api.concurrency.gather) run their independent queries
+# on a shared pool of this many threads, each with its own database
+# connection; with API_CONCURRENT_QUERIES off they run one after another
+API_CONCURRENT_QUERIES = config('API_CONCURRENT_QUERIES', default=True, cast=bool)
+API_QUERY_WORKERS = config('API_QUERY_WORKERS', default=8, cast=int)
+
 # =============================================================================
 # JWT SETTINGS
 # =============================================================================
@@ -278,14 +347,16 @@ FIELD_ENCRYPTION_KEY = config(
 # AUDIT LOGGING
 # =============================================================================
 
-# Automatically log changes to models
-AUDITLOG_INCLUDE_ALL_MODELS = False  # Explicitly define models to audit
-AUDITLOG_INCLUDE_TRACKING_MODELS = (
-    'users.User',
-    'patients.Patient',
-    'assessments.Assessment',
-    'assessments.AssessmentItem',
-)
+# Changes to User, Patient and assessment models are captured by
+# audit.mixins.AuditOutboxMixin into an outbox table (same transaction as the
+# change) and bulk-moved into auditlog's LogEntry table by
+# `manage.py flush_audit_outbox`. auditlog's own synchronous receivers are
+# therefore left unregistered.
+AUDITLOG_INCLUDE_ALL_MODELS = False
+AUDITLOG_INCLUDE_TRACKING_MODELS = ()
+
+# Outbox rows moved into the audit log per flusher transaction
+AUDIT_OUTBOX_BATCH_SIZE = config('AUDIT_OUTBOX_BATCH_SIZE', default=500, cast=int)
 
 # =============================================================================
 # INTERNATIONALIZATION
@@ -334,6 +405,14 @@ EMAIL_BACKEND = config(
 # LOGGING CONFIGURATION
 # =============================================================================
 
+# Handlers only enqueue records; a background listener per handler formats
+# and writes them (see monitoring.log_pipeline). When a queue is full records
+# are dropped and counted rather than blocking the request thread.
+LOG_QUEUE_SIZE = 10000
+LOG_FILE_MAX_BYTES = 50 * 1024 * 1024  # Rotate django.log at 50 MB...
+LOG_FILE_BACKUP_COUNT = 10            # ...keeping 10 old files
+LOG_RATE_LIMIT = (50, 200)            # Records per second per logger, burst
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -342,16 +421,33 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'monitoring.log_pipeline.JSONFormatter',
+        },
+    },
+    'filters': {
+        'rate_limit': {
+            '()': 'monitoring.log_pipeline.RateLimitFilter',
+            'rate': LOG_RATE_LIMIT[0],
+            'burst': LOG_RATE_LIMIT[1],
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': 'monitoring.log_pipeline.QueueLogHandler',
+            'stream': 'ext://sys.stderr',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'verbose',
+            'filters': ['rate_limit'],
         },
         'file': {
-            'class': 'logging.FileHandler',
+            '()': 'monitoring.log_pipeline.QueueLogHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'max_bytes': LOG_FILE_MAX_BYTES,
+            'backup_count': LOG_FILE_BACKUP_COUNT,
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json',
+            'filters': ['rate_limit'],
         },
     },
     'root': {
@@ -380,6 +476,58 @@ LOGGING = {
 # Create logs directory if it doesn't exist
 os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 
+# =============================================================================
+# REQUEST INSTRUMENTATION
+# =============================================================================
+
+# Return X-Query-Count / X-DB-Time-Ms / X-Save-Time-Ms / X-Full-Clean-Time-Ms headers
+REQUEST_STATS_HEADERS = config('REQUEST_STATS_HEADERS', default=DEBUG, cast=bool)
+
+# Per-endpoint budgets by URL name, e.g. {'patients:patient-detail': {'queries': 4, 'db_ms': 50}}
+# (budgets can also be declared on views with monitoring.budgets.query_budget)
+QUERY_BUDGETS = {}
+
+# Raise instead of logging when a request exceeds its budget (on in tests)
+QUERY_BUDGET_ENFORCE = False
+
+# Sampling profiler: fraction of requests profiled (0 = only requests carrying
+# a staff token from /monitoring/profile-token/), stack sampling interval in
+# seconds, and the on-disk ring buffer of collapsed-stack profiles
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+PROFILING_MAX_FILES = 500
+PROFILING_TOKEN_MAX_AGE = 3600  # 1 hour
+
+# Application metrics (served at /monitoring/metrics/). With several worker
+# processes set METRICS_DIR to a directory they share; each writes its values
+# there and a scrape merges them. Scrapers authenticate with METRICS_TOKEN as
+# a bearer token (staff sessions are also accepted).
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = 5  # seconds
+METRICS_STALE_SECONDS = 86400  # Files of processes gone this long are dropped
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Cold start (manage.py startup_report): time budget for booting a worker
+# through a loaded URLconf, and modules that must not be imported while
+# booting. Heavy optional components (PDF, export, analytics and their
+# libraries) belong here; import them inside the functions that use them.
+STARTUP_TIME_BUDGET_MS = config('STARTUP_TIME_BUDGET_MS', default=1500, cast=int)
+STARTUP_LAZY_MODULES = [
+    'patients.retention',
+    'patients.synthetic',
+    'audit.partitions',
+    'benchmarks',
+    'loadtest',
+    'monitoring.startup',
+    'reportlab',
+    'weasyprint',
+    'openpyxl',
+    'pandas',
+    'numpy',
+    'matplotlib',
+]
+
 # =============================================================================
 # DEFAULT PRIMARY KEY FIELD TYPE
 # =============================================================================
@@ -399,9 +547,16 @@ AUTH_USER_MODEL = 'users.User'  # Custom user model
 # Data retention period (in days)
 DATA_RETENTION_DAYS = 2555  # 7 years (HIPAA minimum is 6 years)
 
+# Patients purged per transaction by `manage.py enforce_data_retention`
+DATA_RETENTION_BATCH_SIZE = 200
+
 # Audit log retention (in days)
 AUDIT_LOG_RETENTION_DAYS = 3650  # 10 years
 
+# The audit log is partitioned by month (PostgreSQL); expired months are
+# dropped whole by `manage.py maintain_audit_partitions`
+AUDIT_LOG_PARTITION_MONTHS_AHEAD = 3
+
 # Failed login attempts before account lockout
 MAX_FAILED_LOGIN_ATTEMPTS = 5
 
@@ -414,6 +569,13 @@ SESSION_INACTIVITY_TIMEOUT = 900  # 15 minutes
 # Require reason for accessing PHI
 REQUIRE_PHI_ACCESS_REASON = True
 
+# PHI access log entries are buffered in memory and bulk-written when the
+# buffer fills or every interval (seconds; 0 disables the background thread)
+PHI_ACCESS_LOG_BUFFER_SIZE = 200
+PHI_ACCESS_LOG_FLUSH_INTERVAL = 2.0
+# Entries kept while writes fail (database down); beyond it the oldest are dropped
+PHI_ACCESS_LOG_MAX_BUFFER = 50000
+
 # =============================================================================
 # DEVELOPMENT SETTINGS
 # =============================================================================
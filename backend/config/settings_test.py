@@ -9,11 +9,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Stand-in read replica: a second connection to the test database
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
 # Remove tenant-specific database router
-DATABASE_ROUTERS = []
+DATABASE_ROUTERS = ['organizations.routers.ReplicaRouter']
 
 # Disable django-tenants for unit tests (we'll test tenant features separately)
 # Remove from installed apps
@@ -26,7 +32,10 @@ if 'django_tenants' in TENANT_APPS:
 INSTALLED_APPS = SHARED_APPS + [app for app in TENANT_APPS if app not in SHARED_APPS]
 
 # Remove django-tenants middleware
-MIDDLEWARE = [mw for mw in MIDDLEWARE if 'django_tenants' not in mw]
+MIDDLEWARE = [
+    mw for mw in MIDDLEWARE
+    if 'django_tenants' not in mw and mw != 'organizations.middleware.TenantMiddleware'
+]
 
 # Speed up password hashing in tests
 PASSWORD_HASHERS = [
@@ -41,5 +50,22 @@ DEBUG_TOOLBAR_CONFIG = {
     'SHOW_TOOLBAR_CALLBACK': lambda request: False,
 }
 
+# Flush the PHI access log buffer explicitly instead of from a background thread
+PHI_ACCESS_LOG_FLUSH_INTERVAL = 0
+
+# Tests poll the live event hub themselves instead of from a background thread
+EVENT_STREAM_POLL_INTERVAL = 0
+
+# Run concurrent API queries on the test connection (other connections cannot
+# see the uncommitted test transaction)
+API_CONCURRENT_QUERIES = False
+
+# Keep reads on the test connection (the replica connection cannot see the
+# uncommitted test transaction); replica routing tests turn this on
+REPLICA_READS = False
+
+# Requests exceeding their declared query budget fail the test
+QUERY_BUDGET_ENFORCE = True
+
 # Use custom user model
 AUTH_USER_MODEL = 'users.User'
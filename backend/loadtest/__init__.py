@@ -0,0 +1,18 @@
+"""
+HTTP load-test harness for the tenant-routed API.
+
+Runs against a local server (runserver, gunicorn, uvicorn) with a number of
+concurrent virtual clinicians spread across tenants. Each tenant is
+addressed by its subdomain through the Host header, so no DNS setup is
+needed:
+
+    python -m loadtest --tenant acme --tenant riverside \\
+        --email ot@example.com --password ... --users 50 --duration 60
+
+Each virtual user authenticates with a JWT, then replays a weighted mix of
+requests (chart open, assessment submit, dashboard, search; see
+loadtest/scenarios.py or pass --profile). Latency percentiles and
+throughput are reported per scenario and written as JSON; --baseline
+compares against an earlier run. Request choice is seeded, so two runs with
+the same arguments issue the same sequence of requests.
+"""
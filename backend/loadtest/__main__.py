@@ -0,0 +1,89 @@
+"""Command-line entry point: python -m loadtest --help"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from .runner import LoadTest, compare
+from .scenarios import load_profile
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest')
+    parser.add_argument('--host', default='127.0.0.1', help='Server address to connect to')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--domain', default='localhost',
+                        help='Base domain; tenants are addressed as <tenant>.<domain> (default: localhost)')
+    parser.add_argument('--tenant', action='append', dest='tenants',
+                        help='Tenant subdomain (repeatable); users are spread across tenants round-robin')
+    parser.add_argument('--email', help='Account used to obtain a JWT in every tenant')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual clinicians (default: 10)')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='Seconds to measure after warm-up; 0 to run --iterations only (default: 30)')
+    parser.add_argument('--iterations', type=int, default=0,
+                        help='Scenarios per user; makes runs issue identical request sets')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds excluded from the results (default: 5)')
+    parser.add_argument('--ramp-up', type=float, default=2, help='Spread user start over this many seconds')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='Mean pause between scenarios in seconds (0 = closed loop, maximum load)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--profile', help='JSON file overriding the default scenario mix (see loadtest/scenarios.py)')
+    parser.add_argument('--output', help='Result file (default: loadtest/results/<time>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed p95/throughput change before flagging a regression (default: 0.10)')
+    options = parser.parse_args(argv)
+    if not options.duration and not options.iterations:
+        parser.error('set --duration or --iterations')
+    return options
+
+
+def print_report(report):
+    print(f'\n{"scenario":20s} {"count":>7s} {"err":>5s} {"req/s":>8s} {"p50":>8s} {"p95":>8s} {"p99":>8s}  (ms)')
+    for name, row in report['scenarios'].items():
+        print(f'{name:20s} {row["count"]:7d} {row["errors"]:5d} {row["throughput_per_s"]:8.1f} '
+              f'{row["p50_ms"]:8.1f} {row["p95_ms"]:8.1f} {row["p99_ms"]:8.1f}')
+    totals = report['totals']
+    if totals['scenarios']:
+        print(f'\n{totals["requests"]} requests, {totals["requests_per_s"]:.1f} req/s, '
+              f'{totals["errors"]} failed scenarios; p50 {totals["p50_ms"]:.1f} ms, '
+              f'p95 {totals["p95_ms"]:.1f} ms, p99 {totals["p99_ms"]:.1f} ms')
+        print(f'Status codes: {totals["statuses"]}')
+    for failure in report['meta']['failures']:
+        print(f'! {failure}')
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    profile, scenarios = load_profile(options.profile)
+
+    try:
+        report = LoadTest(options, profile, scenarios).run()
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print_report(report)
+
+    path = Path(options.output) if options.output else RESULTS_DIR / f'{time.strftime("%Y%m%d-%H%M%S")}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    print(f'\nResults written to {path}')
+
+    if not options.baseline:
+        return 0
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, options.threshold)
+    print(f'\nCompared with {options.baseline} (threshold {options.threshold:.0%}):')
+    for name, metric, previous, current, regressed in rows:
+        print(f'{name:20s} {metric:17s} {previous:10.1f} -> {current:10.1f}  {"REGRESSION" if regressed else ""}')
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Keep-alive HTTP client for one virtual user on one tenant"""
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+
+class TenantClient:
+    """
+    One persistent connection to the server, routed to a tenant by Host header.
+
+    Requests never raise on transport errors; they report status 0 so a
+    dropped connection counts as an error instead of killing the user.
+    Every request carries `access_reason` as its X-PHI-Access-Reason.
+    """
+
+    def __init__(self, host, port, tenant, domain='localhost', timeout=30, access_reason=None):
+        self.host = host
+        self.port = port
+        self.host_header = f'{tenant}.{domain}' if tenant else domain
+        self.timeout = timeout
+        self.access_reason = access_reason
+        self.token = None
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def request(self, method, path, body=None):
+        """Return (status, response body, seconds)"""
+        headers = {'Host': self.host_header, 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if self.access_reason:
+            headers['X-PHI-Access-Reason'] = self.access_reason
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            connection = self._connect()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (http.client.HTTPException, OSError):
+            self.close()
+            status, payload = 0, b''
+        return status, payload, time.perf_counter() - start
+
+    def authenticate(self, token_url, email, password):
+        """Obtain a JWT access token; return True on success"""
+        self.token = None
+        if not email:
+            return True  # Unauthenticated run (e.g. against a profile of public URLs)
+        body = json.dumps({'email': email, 'password': password}).encode()
+        status, payload, _ = self.request('POST', token_url, body)
+        if status != 200:
+            return False
+        self.token = json.loads(payload)['access']
+        return True
+
+    def fetch_ids(self, url, limit=500):
+        """Collect object ids from a (possibly paginated) list endpoint"""
+        ids = []
+        while url and len(ids) < limit:
+            status, payload, _ = self.request('GET', url)
+            if status != 200:
+                break
+            data = json.loads(payload)
+            results = data.get('results', []) if isinstance(data, dict) else data
+            ids.extend(str(item['id']) for item in results if 'id' in item)
+            url = data.get('next') if isinstance(data, dict) else None
+            if url:
+                parts = urlsplit(url)  # Absolute next links point at the tenant host
+                url = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        return ids[:limit]
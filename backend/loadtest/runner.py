@@ -0,0 +1,207 @@
+"""Virtual users, latency recording and reporting"""
+import platform
+import random
+import subprocess
+import threading
+import time
+
+from .client import TenantClient
+from .scenarios import fixtures_for
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Thread-safe latency and status collection per scenario"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+        self.requests = 0
+
+    def record(self, scenario, seconds, statuses):
+        ok = all(200 <= status < 400 for status in statuses)
+        with self._lock:
+            self.requests += len(statuses)
+            self.latencies.setdefault(scenario, []).append(seconds)
+            if not ok:
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+            for status in statuses:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        scenarios = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            scenarios[name] = {
+                'count': len(latencies),
+                'errors': self.errors.get(name, 0),
+                'throughput_per_s': len(latencies) / elapsed,
+                'mean_ms': sum(latencies) / len(latencies) * 1000,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'max_ms': latencies[-1] * 1000,
+            }
+        everything = sorted(latency for latencies in self.latencies.values() for latency in latencies)
+        totals = {
+            'scenarios': len(everything),
+            'requests': self.requests,
+            'errors': sum(self.errors.values()),
+            'requests_per_s': self.requests / elapsed,
+            'p50_ms': percentile(everything, 50) * 1000 if everything else None,
+            'p95_ms': percentile(everything, 95) * 1000 if everything else None,
+            'p99_ms': percentile(everything, 99) * 1000 if everything else None,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+        return scenarios, totals
+
+
+class LoadTest:
+    """
+    Run `users` virtual users until `duration` seconds have passed or each
+    has completed `iterations` scenarios. Users are assigned to tenants
+    round-robin; results from the first `warmup` seconds are discarded.
+    """
+
+    def __init__(self, options, profile, scenarios, log=print):
+        self.options = options
+        self.profile = profile
+        self.scenarios = scenarios
+        self.weights = [scenario.weight for scenario in scenarios]
+        self.tenants = options.tenants or ['']
+        self.log = log
+        self.recorder = Recorder()
+        self.patient_ids = {}
+        self.failures = []
+
+    def _client(self, tenant):
+        return TenantClient(
+            self.options.host, self.options.port, tenant, self.options.domain, self.options.timeout,
+            access_reason=self.profile.get('access_reason'),
+        )
+
+    def _authenticate(self, client):
+        return client.authenticate(self.profile['token_url'], self.options.email, self.options.password)
+
+    def prepare(self):
+        """Authenticate once per tenant and collect patient ids used in paths"""
+        for tenant in self.tenants:
+            client = self._client(tenant)
+            if not self._authenticate(client):
+                raise RuntimeError(f'Could not authenticate against tenant {tenant or "(default)"}')
+            self.patient_ids[tenant] = client.fetch_ids(self.profile['fixtures_url'])
+            client.close()
+            self.log(f'{tenant or "(default)"}: {len(self.patient_ids[tenant])} patients for path fixtures')
+
+    def _virtual_user(self, number, start, stop_at, warmup_until):
+        options = self.options
+        rng = random.Random(f'{options.seed}:{number}')
+        tenant = self.tenants[number % len(self.tenants)]
+        client = self._client(tenant)
+        try:
+            if not self._authenticate(client):
+                self.failures.append(f'user {number}: authentication failed')
+                return
+            # Stagger arrivals so users do not fire in lockstep
+            time.sleep(rng.uniform(0, options.ramp_up))
+
+            completed = 0
+            while time.monotonic() < stop_at and (not options.iterations or completed < options.iterations):
+                scenario = rng.choices(self.scenarios, weights=self.weights)[0]
+                requests = scenario.render(fixtures_for(rng, self.patient_ids.get(tenant, [])))
+
+                statuses = []
+                began = time.perf_counter()
+                for method, path, body in requests:
+                    status, _, _ = client.request(method, path, body)
+                    if status == 401 and self._authenticate(client):  # Access token expired
+                        status, _, _ = client.request(method, path, body)
+                    statuses.append(status)
+                elapsed = time.perf_counter() - began
+
+                if time.monotonic() >= warmup_until:
+                    self.recorder.record(scenario.name, elapsed, statuses)
+                completed += 1
+                if options.think_time:
+                    time.sleep(rng.expovariate(1 / options.think_time))
+        finally:
+            client.close()
+
+    def run(self):
+        options = self.options
+        self.prepare()
+
+        start = time.monotonic()
+        warmup_until = start + options.warmup
+        stop_at = start + options.warmup + options.duration if options.duration else float('inf')
+        threads = [
+            threading.Thread(target=self._virtual_user, args=(number, start, stop_at, warmup_until),
+                             name=f'vu-{number}', daemon=True)
+            for number in range(options.users)
+        ]
+        self.log(f'Running {options.users} users across {len(self.tenants)} tenant(s)...')
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = max(time.monotonic() - warmup_until, 0.001)
+        scenarios, totals = self.recorder.summary(elapsed)
+        return {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'git_commit': _git_commit(),
+                'python': platform.python_version(),
+                'target': f'{options.host}:{options.port}',
+                'tenants': self.tenants,
+                'users': options.users,
+                'duration': options.duration,
+                'iterations': options.iterations,
+                'warmup': options.warmup,
+                'think_time': options.think_time,
+                'seed': options.seed,
+                'profile': options.profile or 'default',
+                'elapsed_s': elapsed,
+                'failures': self.failures,
+            },
+            'scenarios': scenarios,
+            'totals': totals,
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare p95 latency and throughput per scenario with a baseline report.
+
+    Returns (name, metric, baseline, current, regressed) rows; p95 regresses
+    when it grows by more than `threshold`, throughput when it drops by more.
+    """
+    rows = []
+    for name, current in report['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        rows.append((name, 'p95_ms', previous['p95_ms'], current['p95_ms'],
+                     current['p95_ms'] > previous['p95_ms'] * (1 + threshold)))
+        rows.append((name, 'throughput_per_s', previous['throughput_per_s'], current['throughput_per_s'],
+                     current['throughput_per_s'] < previous['throughput_per_s'] * (1 - threshold)))
+    return rows
@@ -0,0 +1,102 @@
+"""Request mixes replayed by the virtual users"""
+import json
+from datetime import date
+
+# Default mix for a ward shift. Paths are formatted with the tenant's
+# fixtures ({patient_id}) and {today}; "body" is sent as JSON. Every request
+# gives "access_reason" as its X-PHI-Access-Reason (PHI endpoints reject
+# requests without one).
+DEFAULT_PROFILE = {
+    'token_url': '/api/auth/token/',
+    'access_reason': 'treatment',
+    'fixtures_url': '/api/patients/',
+    'scenarios': [
+        {
+            'name': 'chart_open',
+            'weight': 40,
+            'requests': [
+                {'method': 'GET', 'path': '/api/patients/{patient_id}/'},
+                {'method': 'GET', 'path': '/api/patients/{patient_id}/timeline/'},
+            ],
+        },
+        {
+            'name': 'assessment_submit',
+            'weight': 15,
+            'requests': [
+                {
+                    'method': 'POST',
+                    'path': '/api/assessments/katz/',
+                    'body': {
+                        'patient': '{patient_id}',
+                        'assessment_date': '{today}',
+                        'bathing': 1, 'dressing': 1, 'toileting': 1,
+                        'transferring': 0, 'continence': 1, 'feeding': 1,
+                    },
+                },
+            ],
+        },
+        {
+            'name': 'dashboard',
+            'weight': 20,
+            'requests': [
+                {'method': 'GET', 'path': '/api/dashboard/'},
+            ],
+        },
+        {
+            'name': 'search',
+            'weight': 25,
+            'requests': [
+                {'method': 'GET', 'path': '/api/patients/?search={search_term}'},
+            ],
+        },
+    ],
+}
+
+SEARCH_TERMS = ('smith', 'garcia', 'chen', 'mar', 'jo', 'pat', 'SYN0000', 'stroke')
+
+
+class Scenario:
+    """A named, weighted sequence of requests issued back to back"""
+
+    def __init__(self, name, weight, requests):
+        self.name = name
+        self.weight = weight
+        self.requests = requests
+
+    def render(self, fixtures):
+        """Return [(method, path, body)] with placeholders filled from `fixtures`"""
+        rendered = []
+        for request in self.requests:
+            body = request.get('body')
+            if body is not None:
+                body = json.dumps(_fill(body, fixtures)).encode()
+            rendered.append((request['method'], request['path'].format(**fixtures), body))
+        return rendered
+
+
+def _fill(value, fixtures):
+    if isinstance(value, str):
+        return value.format(**fixtures)
+    if isinstance(value, dict):
+        return {key: _fill(item, fixtures) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, fixtures) for item in value]
+    return value
+
+
+def load_profile(path=None):
+    """Return (profile, [Scenario]) from a JSON file, or the default mix"""
+    profile = DEFAULT_PROFILE
+    if path:
+        with open(path) as f:
+            profile = {**DEFAULT_PROFILE, **json.load(f)}
+    scenarios = [Scenario(s['name'], s['weight'], s['requests']) for s in profile['scenarios']]
+    return profile, scenarios
+
+
+def fixtures_for(rng, patient_ids):
+    return {
+        'patient_id': rng.choice(patient_ids) if patient_ids else '',
+        'search_term': rng.choice(SEARCH_TERMS),
+        'today': date.today().isoformat(),
+    }
@@ -0,0 +1,61 @@
+"""
+Per-endpoint query budgets.
+
+Declare a budget next to the view it protects:
+
+    @query_budget(queries=4, db_ms=50)
+    def patient_chart(request, pk): ...
+
+    class PatientViewSet(viewsets.ModelViewSet):
+        query_budget = {'queries': 6}
+
+or centrally in settings.QUERY_BUDGETS keyed by URL name. When
+QUERY_BUDGET_ENFORCE is on (the test settings), exceeding a budget raises
+QueryBudgetExceeded, failing the test that made the request; otherwise it
+is logged as a warning.
+"""
+from django.conf import settings
+
+BUDGET_KEYS = ('queries', 'db_ms', 'save_ms', 'full_clean_ms')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request does more database/model work than its endpoint allows"""
+
+
+def query_budget(**budget):
+    """Attach a budget to a view function (or DRF as_view() result)"""
+    unknown = set(budget) - set(BUDGET_KEYS)
+    if unknown:
+        raise TypeError(f'Unknown query budget keys: {", ".join(sorted(unknown))}')
+
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_budget(view_func, view_name):
+    """Return the budget declared for a resolved view, or None"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+    if budget is None and view_name:
+        budget = settings.QUERY_BUDGETS.get(view_name)
+    return budget
+
+
+def check_budget(budget, stats):
+    """Return a list of human-readable budget violations for `stats`"""
+    measured = {
+        'queries': stats.query_count,
+        'db_ms': stats.db_time * 1000,
+        'save_ms': stats.sections.get('save', 0.0) * 1000,
+        'full_clean_ms': stats.sections.get('full_clean', 0.0) * 1000,
+    }
+    return [
+        f'{key}={measured[key]:g} exceeds budget of {limit:g}'
+        for key, limit in budget.items()
+        if measured[key] > limit
+    ]
@@ -0,0 +1,173 @@
+"""
+Per-request accounting of database and model-layer work.
+
+RequestStats collects, for the request being served, the number of SQL
+queries, time spent executing them and time spent in named code sections
+(model save() and full_clean()). Collection is bound to a context variable,
+so code outside a request (management commands, shells) pays nothing beyond
+a context lookup.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """
+    Counters for one request. Queries run concurrently by api.concurrency.gather()
+    report from several threads, so updates take a lock.
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.sections = {}
+        self.open_sections = set()  # (thread id, section name)
+        self._lock = threading.Lock()
+
+    def add_section(self, name, elapsed):
+        with self._lock:
+            self.sections[name] = self.sections.get(name, 0.0) + elapsed
+
+    def open_section(self, name):
+        """Mark `name` open on this thread; False if it already was (a nested or re-entrant section)"""
+        key = (threading.get_ident(), name)
+        with self._lock:
+            if key in self.open_sections:
+                return False
+            self.open_sections.add(key)
+            return True
+
+    def close_section(self, name, elapsed):
+        with self._lock:
+            self.sections[name] = self.sections.get(name, 0.0) + elapsed
+            self.open_sections.discard((threading.get_ident(), name))
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper (see BaseDatabaseWrapper.execute_wrapper)"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.db_time += elapsed
+                self.query_count += 1
+
+
+def get_current_stats():
+    """Return the RequestStats of the request being served, or None"""
+    return _current_stats.get()
+
+
+def activate(stats):
+    """Make `stats` the current request's stats; returns a token for deactivate()"""
+    return _current_stats.set(stats)
+
+
+def deactivate(token):
+    _current_stats.reset(token)
+
+
+class timed_section(ContextDecorator):
+    """
+    Time a block (or decorated function) into the current request's stats.
+
+    Usable as `with timed_section('full_clean'):` or `@timed_section('save')`.
+    Nested or re-entrant sections with the same name on one thread are
+    counted once, so Patient.save() -> Model.save() recursion does not
+    double count; sections on concurrent threads add up, like their queries.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+        self._stats = None
+
+    def _recreate_cm(self):
+        # A decorated function may run concurrently or recursively; give each call its own timer
+        return type(self)(self.name)
+
+    def __enter__(self):
+        stats = _current_stats.get()
+        if stats is not None and stats.open_section(self.name):
+            self._stats = stats
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._stats is not None:
+            self._stats.close_section(self.name, time.perf_counter() - self._start)
+            self._stats = None
+        return False
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are computed on read)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            cumulative.append(('+Inf' if bound == float('inf') else bound, running))
+        return {'buckets': cumulative, 'sum': self.total, 'count': self.count}
+
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+TIME_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class EndpointHistograms:
+    """Per-endpoint histograms of query count, DB time and model-layer time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _new_endpoint(self):
+        return {
+            'query_count': Histogram(QUERY_COUNT_BUCKETS),
+            'db_time_ms': Histogram(TIME_MS_BUCKETS),
+            'save_time_ms': Histogram(TIME_MS_BUCKETS),
+            'full_clean_time_ms': Histogram(TIME_MS_BUCKETS),
+        }
+
+    def observe(self, endpoint, stats):
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self._endpoints[endpoint] = self._new_endpoint()
+            histograms['query_count'].observe(stats.query_count)
+            histograms['db_time_ms'].observe(stats.db_time * 1000)
+            histograms['save_time_ms'].observe(stats.sections.get('save', 0.0) * 1000)
+            histograms['full_clean_time_ms'].observe(stats.sections.get('full_clean', 0.0) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {name: histogram.snapshot() for name, histogram in histograms.items()}
+                for endpoint, histograms in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+endpoint_histograms = EndpointHistograms()
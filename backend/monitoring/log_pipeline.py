@@ -0,0 +1,172 @@
+"""
+Non-blocking logging: records are queued on the calling thread and written
+by a background listener.
+
+QueueLogHandler owns its real output handler (a size- or time-rotating
+file, or a stream) and a bounded queue drained by a QueueListener thread.
+The request thread only copies the record and enqueues it; when the queue
+is full the record is dropped and counted instead of blocking. Formatting
+(JSONFormatter for files) happens on the listener thread.
+
+RateLimitFilter caps how many records per second each logger may emit, so
+one noisy logger cannot flood the queue.
+
+Rotation renames files in place, so give each worker process its own
+filename (or use one process per file) when running several workers.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _count_drop(reason):
+    from monitoring import metrics  # Logging is configured before the app registry is ready
+    metrics.log_records_dropped.inc(reason=reason)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with extra={...} fields included"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per logger name: `rate` records per second with bursts of
+    `burst`. `limits` overrides both per logger, e.g.
+    {'django.request': [1, 10]}. Suppressed records are counted.
+    """
+
+    def __init__(self, rate=50, burst=200, limits=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.limits = limits or {}
+        self.suppressed = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # Handlers sharing this filter must not each spend a token on the record
+        decided = getattr(record, '_rate_limit_allowed', None)
+        if decided is not None:
+            return decided
+
+        rate, burst = self.limits.get(record.name, (self.rate, self.burst))
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(record.name, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[record.name] = (tokens - 1 if allowed else tokens, now)
+            if not allowed:
+                self.suppressed += 1
+        if not allowed:
+            _count_drop('rate_limited')
+        record._rate_limit_allowed = allowed
+        return allowed
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for a background listener writing to a file or stream.
+
+    With `filename`, output rotates at `max_bytes` or, if `when` is given,
+    on a TimedRotatingFileHandler schedule ('midnight', 'H', ...), keeping
+    `backup_count` old files. Otherwise records go to `stream`.
+    """
+
+    def __init__(self, filename=None, stream=None, max_bytes=0, backup_count=0, when=None,
+                 interval=1, queue_size=10000, encoding='utf-8'):
+        super().__init__(None)  # The queue is created with its listener
+        if filename and when:
+            self.target = logging.handlers.TimedRotatingFileHandler(
+                filename, when=when, interval=interval, backupCount=backup_count, encoding=encoding, delay=True)
+        elif filename:
+            self.target = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        else:
+            self.target = logging.StreamHandler(stream)
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.listener = None
+        self._listener_pid = None
+        self._start_listener()
+
+    def _start_listener(self):
+        # A worker forked from a preloaded master inherits the queue but not the thread
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        self._listener_pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, in the target handler
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """Merge args and capture the traceback now; leave formatting to the listener"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            _count_drop('queue_full')
+
+    def emit(self, record):
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def flush(self, timeout=5):
+        """Wait (up to `timeout` seconds) for queued records to be written"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.target.flush()
+
+    def close(self):
+        if self.listener is not None and self._listener_pid == os.getpid():
+            self.flush()
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
@@ -0,0 +1,89 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.startup import summarize_importtime
+
+PHASES = ('django_import', 'settings', 'logging', 'framework', 'apps', 'middleware', 'urls')
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot the project in fresh interpreters and report where cold-start time goes: '
+        'phases, each app (import, models, ready()) and the slowest imported packages. '
+        'Fails when the median boot exceeds STARTUP_TIME_BUDGET_MS or a '
+        'STARTUP_LAZY_MODULES module is imported while booting.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Cold boots to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Slowest packages to list')
+        parser.add_argument(
+            '--depth', type=int, default=1, help='Dotted name parts to group packages by (2 = django.db)'
+        )
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            default=settings.STARTUP_TIME_BUDGET_MS,
+            help='Fail when the median boot takes longer than this',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the median report as JSON')
+
+    def boot(self):
+        settings_module = os.environ['DJANGO_SETTINGS_MODULE']
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'monitoring.startup', settings_module],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Booting {settings_module} failed:\n{result.stderr[-2000:]}')
+        report = json.loads(result.stdout)
+        report['importtime'] = result.stderr
+        return report
+
+    def handle(self, *args, **options):
+        reports = sorted((self.boot() for _ in range(max(options['runs'], 1))), key=lambda r: r['total_ms'])
+        report = reports[len(reports) // 2]
+        packages = summarize_importtime(report.pop('importtime'), depth=options['depth'])[:options['top']]
+        total = statistics.median(r['total_ms'] for r in reports)
+
+        if options['json']:
+            self.stdout.write(json.dumps({**report, 'median_total_ms': total, 'packages_ms': packages}, indent=2))
+        else:
+            self.print_report(report, packages, total, options)
+
+        failures = []
+        if total > options['budget_ms']:
+            failures.append(f'cold start {total:.0f} ms exceeds the {options["budget_ms"]:.0f} ms budget')
+        if report['eagerly_imported']:
+            failures.append(f'lazy modules imported at startup: {", ".join(report["eagerly_imported"])}')
+        if failures:
+            raise CommandError('; '.join(failures))
+
+    def print_report(self, report, packages, total, options):
+        self.stdout.write(f'Cold start of {report["settings_module"]}: {total:.1f} ms median '
+                          f'of {options["runs"]} run(s), {report["module_count"]} modules loaded')
+
+        self.stdout.write('\nPhases')
+        for phase in PHASES:
+            self.stdout.write(f'  {phase:<16} {report["phases_ms"].get(phase, 0):8.1f} ms')
+
+        self.stdout.write(f'\n  {"App":<36} {"import":>8} {"models":>8} {"ready":>8} {"total":>8}')
+        rows = sorted(report['apps'].items(), key=lambda item: sum(item[1].values()), reverse=True)
+        for app, timings in rows:
+            self.stdout.write(
+                f'  {app:<36} {timings.get("import_ms", 0):8.1f} {timings.get("models_ms", 0):8.1f} '
+                f'{timings.get("ready_ms", 0):8.1f} {sum(timings.values()):8.1f}'
+            )
+
+        self.stdout.write('\nSlowest packages (self time, ms)')
+        for package, milliseconds in packages:
+            self.stdout.write(f'  {package:<36} {milliseconds:8.1f}')
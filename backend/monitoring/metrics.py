@@ -0,0 +1,391 @@
+"""
+Application metrics: labelled counters and histograms with a text-format scrape.
+
+Each metric keeps its values in process memory behind its own lock (held
+only for a dict update). Under multi-process servers, set METRICS_DIR: a
+background thread then writes each process's values to <METRICS_DIR>/<pid>.json
+(atomically, when they changed), and a scrape of any worker merges every
+process's file with its own live values. Without METRICS_DIR the scrape
+reports the serving process only.
+
+    from monitoring import metrics
+
+    metrics.login_failures.inc(tenant=metrics.current_tenant())
+    with metrics.scoring_seconds.time(instrument='fimassessment'):
+        ...
+"""
+import atexit
+import functools
+import json
+import logging
+import operator
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+from monitoring.instrumentation import Histogram as BucketCounts
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def current_tenant():
+    """Schema name of the current connection ('default' without django-tenants)"""
+    return getattr(connection, 'schema_name', None) or 'default'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.changed()
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def dump(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, value in samples:
+            into[tuple(key)] = into.get(tuple(key), 0) + value
+
+    def render(self, samples):
+        for key, value in sorted(samples.items()):
+            yield f'{self.name}{_label_text(self.labelnames, key)} {_format_number(value)}'
+
+
+class Gauge(Counter):
+    """
+    Current value per label set. A scrape combines the processes' values by
+    `aggregate`: 'sum' for shares of a whole (connections in use), 'max' or
+    'min' for readings every process takes of the same thing (replica lag),
+    which summed would scale with the worker count. A process that died
+    keeps its last values until its file goes stale.
+    """
+
+    type = 'gauge'
+    aggregates = {'sum': operator.add, 'max': max, 'min': min}
+
+    def __init__(self, registry, name, documentation, labelnames=(), aggregate='sum'):
+        if aggregate not in self.aggregates:
+            raise ValueError(f'{name}: aggregate must be one of {", ".join(self.aggregates)}')
+        super().__init__(registry, name, documentation, labelnames)
+        self.aggregate = aggregate
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        self.registry.changed()
+
+    def merge(self, into, samples):
+        combine = self.aggregates[self.aggregate]
+        for key, value in samples:
+            key = tuple(key)
+            into[key] = combine(into[key], value) if key in into else value
+
+
+class Histogram(Metric):
+    """Bucketed distribution per label set (bucket bounds are upper-inclusive)"""
+
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = BucketCounts(self.buckets)
+            counts.observe(value)
+        self.registry.changed()
+
+    def time(self, **labels):
+        """Context manager / decorator observing elapsed seconds"""
+        return _Timer(self, labels)
+
+    def dump(self):
+        with self._lock:
+            return [
+                [list(key), {'counts': list(counts.counts), 'sum': counts.total, 'count': counts.count}]
+                for key, counts in self._values.items()
+            ]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, value in samples:
+            merged = into.setdefault(tuple(key), {'counts': [0] * len(value['counts']), 'sum': 0.0, 'count': 0})
+            if len(merged['counts']) != len(value['counts']):
+                continue  # Buckets changed between deploys; skip the old process
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], value['counts'])]
+            merged['sum'] += value['sum']
+            merged['count'] += value['count']
+
+    def render(self, samples):
+        bounds = [_format_number(float(bound)) for bound in self.buckets] + ['+Inf']
+        for key, value in sorted(samples.items()):
+            running = 0
+            for bound, count in zip(bounds, value['counts']):
+                running += count
+                labels = _label_text(self.labelnames, key, [('le', bound)])
+                yield f'{self.name}_bucket{labels} {running}'
+            labels = _label_text(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_number(float(value["sum"]))}'
+            yield f'{self.name}_count{labels} {value["count"]}'
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.histogram, self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Registry:
+    """The process's metrics, plus writing and merging per-process files"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._dirty = threading.Event()
+        self._flusher_pid = None
+        self._flusher_lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), aggregate='sum'):
+        return self._register(Gauge(self, name, documentation, labelnames, aggregate))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    # -- Multi-process aggregation --------------------------------------------
+
+    def changed(self):
+        self._dirty.set()
+        # Compare pids: a worker forked from a preloaded master inherits no thread
+        if self._flusher_pid != os.getpid() and settings.METRICS_DIR:
+            self._start_flusher()
+
+    def _start_flusher(self):
+        with self._flusher_lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True).start()
+                atexit.register(self.write_process_file)
+
+    def _flush_loop(self):
+        last_write = 0.0
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            # Rewrite unchanged values now and then so the file is not pruned as stale
+            if self._dirty.is_set() or time.monotonic() - last_write > settings.METRICS_STALE_SECONDS / 2:
+                try:
+                    self.write_process_file()
+                    last_write = time.monotonic()
+                except OSError:
+                    logger.exception('Could not write metrics file')
+
+    def dump(self):
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def write_process_file(self):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        self._dirty.clear()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{os.getpid()}.json'
+        temporary = directory / f'.{os.getpid()}.json.tmp'
+        temporary.write_text(json.dumps(self.dump()))
+        os.replace(temporary, path)
+
+    def _process_files(self):
+        directory = settings.METRICS_DIR
+        if not directory or not Path(directory).is_dir():
+            return
+        own = f'{os.getpid()}.json'
+        stale_before = time.time() - settings.METRICS_STALE_SECONDS
+        for path in Path(directory).glob('*.json'):
+            if path.name == own:
+                continue
+            try:
+                if path.stat().st_mtime < stale_before:
+                    path.unlink()  # Left behind by a worker that exited long ago
+                    continue
+                yield json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # Replaced or removed while reading
+
+    def collect(self):
+        """Return {name: {label key: value}} merged across processes"""
+        merged = {name: {} for name in self._metrics}
+        for dump in [self.dump(), *self._process_files()]:
+            for name, samples in dump.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], samples)
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, samples in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.render(samples))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# =============================================================================
+# APPLICATION METRICS
+# =============================================================================
+
+requests = registry.counter(
+    'ot_requests_total', 'HTTP requests by tenant, method and status code', ('tenant', 'method', 'status'))
+request_seconds = registry.histogram(
+    'ot_request_seconds', 'HTTP request duration by tenant', ('tenant',))
+
+model_saves = registry.counter(
+    'ot_model_saves_total', 'Patient and assessment saves', ('tenant', 'model', 'operation'))
+model_save_seconds = registry.histogram(
+    'ot_model_save_seconds', 'Time in Patient/assessment save() including full_clean()', ('model',))
+scoring_seconds = registry.histogram(
+    'ot_assessment_scoring_seconds', 'Time in calculate_total_score()', ('instrument',),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005))
+
+login_failures = registry.counter(
+    'ot_login_failures_total', 'Failed login attempts', ('tenant',))
+login_successes = registry.counter(
+    'ot_login_successes_total', 'Successful logins (failed-attempt counter reset)', ('tenant',))
+account_lockouts = registry.counter(
+    'ot_account_lockouts_total', 'Accounts locked after repeated failed logins', ('tenant',))
+locked_account_attempts = registry.counter(
+    'ot_locked_account_attempts_total', 'Lock checks that found the account still locked', ('tenant',))
+
+tenant_resolutions = registry.counter(
+    'ot_tenant_resolutions_total', 'Hostname to tenant lookups', ('result',))
+tenant_resolution_seconds = registry.histogram(
+    'ot_tenant_resolution_seconds', 'Time to resolve the tenant from the request host')
+
+log_records_dropped = registry.counter(
+    'ot_log_records_dropped_total', 'Log records dropped (queue full or rate limited)', ('reason',))
+phi_access_log_dropped = registry.counter(
+    'ot_phi_access_log_dropped_total', 'PHI access log entries dropped, oldest first, from a full buffer')
+
+db_pool_connections = registry.gauge(
+    'ot_db_pool_connections', 'Pooled database connections by state (in_use/idle), across all workers',
+    ('alias', 'state'))
+db_pool_max_connections = registry.gauge(
+    'ot_db_pool_max_connections', 'Database connection pool size limit, summed over workers (total capacity)',
+    ('alias',))
+db_pool_acquisitions = registry.counter(
+    'ot_db_pool_acquisitions_total', 'Connections taken from the pool by result (reused/new/timeout)',
+    ('alias', 'result'))
+db_pool_acquire_seconds = registry.histogram(
+    'ot_db_pool_acquire_seconds', 'Time to get a pooled connection, including waiting and connecting', ('alias',))
+db_search_path = registry.counter(
+    'ot_db_search_path_total', 'Cursors by whether SET search_path was sent (set) or skipped (cached)', ('result',))
+db_replica_lag_seconds = registry.gauge(
+    'ot_db_replica_lag_seconds', 'Read replica replay lag at the last check (the largest any worker saw)',
+    ('alias',), aggregate='max')
+db_replica_healthy = registry.gauge(
+    'ot_db_replica_healthy',
+    '1 while reads may use the replica (reachable and within REPLICA_MAX_LAG_SECONDS); 0 if any worker found it not',
+    ('alias',), aggregate='min')
+
+cache_requests = registry.counter(
+    'ot_cache_requests_total',
+    "Revalidations of clients' cached copies by cache and result: hit (304) or miss (sent again)",
+    ('cache', 'result'))
+
+
+def instrument_save(save):
+    """Count and time a model save() by model name and create/update"""
+    @functools.wraps(save)
+    def wrapper(self, *args, **kwargs):
+        model = self._meta.model_name
+        operation = 'create' if self._state.adding else 'update'
+        with model_save_seconds.time(model=model):
+            result = save(self, *args, **kwargs)
+        model_saves.inc(tenant=current_tenant(), model=model, operation=operation)
+        return result
+    return wrapper
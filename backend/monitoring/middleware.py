@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from monitoring import instrumentation, metrics, profiling
+from monitoring.budgets import QueryBudgetExceeded, check_budget, get_budget
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None and match.view_name else 'unresolved'
+
+
+def request_tenant(request):
+    """Schema name of the request's tenant (the connection's is per thread under ASGI)"""
+    return getattr(getattr(request, 'tenant', None), 'schema_name', None) or metrics.current_tenant()
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Record query count, DB time and model save()/full_clean() time per request.
+
+    In development (REQUEST_STATS_HEADERS) the numbers are returned as
+    X-Query-Count / X-DB-Time-Ms / X-Save-Time-Ms / X-Full-Clean-Time-Ms
+    response headers. They are always aggregated into per-endpoint
+    histograms and the per-tenant request metrics, and checked against the
+    endpoint's query budget.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _wrap_connections(stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats = instrumentation.RequestStats()
+        token = instrumentation.activate(stats)
+        start = time.perf_counter()
+        try:
+            with self._wrap_connections(stats):
+                response = self.get_response(request)
+        finally:
+            instrumentation.deactivate(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = instrumentation.RequestStats()
+        token = instrumentation.activate(stats)
+        start = time.perf_counter()
+        try:
+            # Connections are per thread: wrap the ones of the thread the ORM
+            # runs sync code on for this request (api.concurrency wraps its own)
+            wrappers = await sync_to_async(self._wrap_connections)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(wrappers.close)()
+        finally:
+            instrumentation.deactivate(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats, elapsed):
+        endpoint = endpoint_name(request)
+        instrumentation.endpoint_histograms.observe(endpoint, stats)
+        tenant = request_tenant(request)
+        metrics.requests.inc(tenant=tenant, method=request.method, status=response.status_code)
+        metrics.request_seconds.observe(elapsed, tenant=tenant)
+
+        if settings.REQUEST_STATS_HEADERS:
+            response['X-Query-Count'] = str(stats.query_count)
+            response['X-DB-Time-Ms'] = f'{stats.db_time * 1000:.2f}'
+            response['X-Save-Time-Ms'] = f'{stats.sections.get("save", 0.0) * 1000:.2f}'
+            response['X-Full-Clean-Time-Ms'] = f'{stats.sections.get("full_clean", 0.0) * 1000:.2f}'
+
+        self._check_budget(request, endpoint, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_budget(view_func, request.resolver_match.view_name)
+
+    def _check_budget(self, request, endpoint, stats):
+        budget = getattr(request, 'query_budget', None)
+        if not budget:
+            return
+
+        violations = check_budget(budget, stats)
+        if not violations:
+            return
+
+        message = f'{request.method} {request.path} ({endpoint}): {"; ".join(violations)}'
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning('Query budget exceeded: %s', message)
+
+
+class RequestProfilingMiddleware:
+    """
+    Sample the Python stack of selected requests into flamegraph-ready profiles.
+
+    Off unless PROFILING_SAMPLE_RATE > 0 or the request carries a valid
+    staff profiling token (see monitoring.profiling); other requests pass
+    straight through. Requested profiles are named in an X-Profile-Id
+    response header. Under ASGI the event loop thread is sampled along with
+    the request's sync_to_async and gather() threads, so requests served
+    concurrently can show up in each other's profiles (through the shared
+    event loop thread).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        requested = self._is_requested(request)
+        if not requested and not self._is_sampled():
+            return self.get_response(request)
+
+        sampler = profiling.StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL).start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return self._save(request, response, sampler, requested, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        requested = self._is_requested(request)
+        if not requested and not self._is_sampled():
+            return await self.get_response(request)
+
+        sampler = profiling.StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL).start()
+        start = time.perf_counter()
+        try:
+            with sampler.tracking():
+                # The request's sync code (ORM, full_clean) runs on its thread-sensitive executor thread
+                sampler.thread_ids.add(await sync_to_async(threading.get_ident)())
+                response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return self._save(request, response, sampler, requested, time.perf_counter() - start)
+
+    def _save(self, request, response, sampler, requested, elapsed):
+        # Sampled requests shorter than one interval have nothing to show
+        if sampler.samples or requested:
+            tenant = getattr(getattr(request, 'tenant', None), 'schema_name', None) or 'default'
+            name = profiling.get_store().save(sampler, tenant, endpoint_name(request), elapsed)
+            if requested:
+                response['X-Profile-Id'] = name
+        return response
+
+    def _is_requested(self, request):
+        token = request.headers.get(profiling.PROFILE_HEADER)
+        return bool(token) and profiling.check_token(token)
+
+    def _is_sampled(self):
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
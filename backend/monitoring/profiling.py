@@ -0,0 +1,157 @@
+"""
+On-demand sampling profiler for individual requests.
+
+While a request is profiled, a helper thread samples the Python stacks of
+the threads doing the request's work every PROFILING_INTERVAL seconds: the
+request thread and, under ASGI, the thread its sync code runs on
+(sync_to_async) and any api.concurrency.gather() worker while it runs a
+query function for the request. The samples are written in
+collapsed-stack format ("frame;frame;frame count" per line), which
+flamegraph.pl, speedscope and inferno render directly. Profiles are kept in
+PROFILING_DIR, named by time, tenant and endpoint; only the newest
+PROFILING_MAX_FILES are kept.
+
+A request is profiled when it falls in the PROFILING_SAMPLE_RATE sample, or
+when it carries a PROFILE_HEADER token issued to a staff user by the
+monitoring:profile-token endpoint.
+"""
+import contextlib
+import contextvars
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+PROFILE_HEADER = 'X-Profile-Request'
+TOKEN_SALT = 'monitoring.profiling'
+
+_unsafe_chars = re.compile(r'[^A-Za-z0-9_.-]+')
+
+# Sampler of the request being served, seen by every thread running its work
+_current_sampler = contextvars.ContextVar('profiling_sampler', default=None)
+
+
+def make_token(user):
+    """Return a signed profiling token for a staff user"""
+    return signing.dumps({'user': str(user.pk)}, salt=TOKEN_SALT)
+
+
+def check_token(token):
+    """Return True if `token` was issued by make_token() and has not expired"""
+    try:
+        signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:  # Includes SignatureExpired
+        return False
+    return True
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{frame.f_globals.get("__name__", "?")}:{code.co_qualname}'
+
+
+class StackSampler:
+    """Sample the stacks of a set of threads from a helper thread until stopped"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_ids = {thread_id}
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @contextlib.contextmanager
+    def tracking(self):
+        """Make sampling_current_thread() add threads working in this context to the sample"""
+        token = _current_sampler.set(self)
+        try:
+            yield self
+        finally:
+            _current_sampler.reset(token)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+@contextlib.contextmanager
+def sampling_current_thread():
+    """Sample the calling thread while it works for a profiled request (no-op otherwise)"""
+    sampler = _current_sampler.get()
+    thread_id = threading.get_ident()
+    if sampler is None or thread_id in sampler.thread_ids:
+        yield
+        return
+    sampler.thread_ids.add(thread_id)
+    try:
+        yield
+    finally:
+        sampler.thread_ids.discard(thread_id)
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of collapsed-stack profiles"""
+
+    suffix = '.folded'
+
+    def __init__(self, directory, max_files):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, sampler, tenant, endpoint, elapsed):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%dT%H%M%S') + f'{time.time() % 1:.6f}'[1:]
+        name = '-'.join((
+            stamp,
+            _unsafe_chars.sub('_', tenant),
+            _unsafe_chars.sub('_', endpoint),
+            f'{elapsed * 1000:.0f}ms',
+        )) + self.suffix
+        (self.directory / name).write_text(sampler.collapsed())
+        self.prune()
+        return name
+
+    def profiles(self):
+        """Saved profile paths, oldest first"""
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob(f'*{self.suffix}'))
+
+    def prune(self):
+        profiles = self.profiles()
+        for path in profiles[:max(len(profiles) - self.max_files, 0)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:  # Pruned concurrently by another worker
+                pass
+
+
+def get_store():
+    return ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
@@ -0,0 +1,121 @@
+"""
+Cold-start profile of the Django process.
+
+Run in a fresh interpreter (the startup_report command does this for you):
+
+    python -X importtime -m monitoring.startup config.settings
+
+Times the boot phases of a worker (Django import, settings, logging setup,
+each app's module import, models import and AppConfig.ready(), middleware
+loading and the URLconf import) and prints
+them as JSON on stdout. -X importtime output on stderr is summarised per
+top-level package by summarize_importtime(). It also lists which of
+settings.STARTUP_LAZY_MODULES were imported during boot; those should
+only be imported by the code paths that use them.
+"""
+import json
+import os
+import sys
+import time
+from importlib import import_module
+
+
+def _timed(timings, key, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[key] = timings.get(key, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def profile(settings_module):
+    """Boot Django in this (fresh) process and return the timing report"""
+    boot_start = time.perf_counter()
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+
+    phases = {}
+    apps = {}
+    import_start = time.perf_counter()
+    import django
+    import django.utils.log
+    from django.apps import apps as registry
+    from django.apps.config import AppConfig
+    from django.conf import settings
+    phases['django_import'] = (time.perf_counter() - import_start) * 1000
+    _timed(phases, 'settings', lambda: settings.INSTALLED_APPS)
+
+    # Wrap the per-app populate steps so each app's share is measured
+    original_create = AppConfig.create.__func__
+    original_import_models = AppConfig.import_models
+    original_ready = {}
+    original_configure_logging = django.utils.log.configure_logging
+    original_populate = registry.populate
+
+    def create(cls, entry):
+        app_timings = apps.setdefault(entry, {})
+        app_config = _timed(app_timings, 'import_ms', original_create, cls, entry)
+        ready = type(app_config).ready
+        if type(app_config) not in original_ready:
+            original_ready[type(app_config)] = ready
+
+            def timed_ready(self, _ready=ready):
+                return _timed(apps[self._startup_entry], 'ready_ms', _ready, self)
+            type(app_config).ready = timed_ready
+        app_config._startup_entry = entry
+        return app_config
+
+    def import_models(self):
+        return _timed(apps[self._startup_entry], 'models_ms', original_import_models, self)
+
+    AppConfig.create = classmethod(create)
+    AppConfig.import_models = import_models
+    django.utils.log.configure_logging = (
+        lambda *args: _timed(phases, 'logging', original_configure_logging, *args))
+    registry.populate = lambda *args: _timed(phases, 'apps', original_populate, *args)
+    try:
+        _timed(phases, 'setup', django.setup)
+    finally:
+        AppConfig.create = classmethod(original_create)
+        AppConfig.import_models = original_import_models
+        django.utils.log.configure_logging = original_configure_logging
+        del registry.populate
+        for config_class, ready in original_ready.items():
+            config_class.ready = ready
+
+    from django.core.handlers.wsgi import WSGIHandler
+    _timed(phases, 'middleware', WSGIHandler)
+    _timed(phases, 'urls', import_module, settings.ROOT_URLCONF)
+    # django.setup() also imports the URL machinery before populating the registry
+    phases['framework'] = phases.pop('setup') - phases['logging'] - phases['apps']
+
+    lazy = getattr(settings, 'STARTUP_LAZY_MODULES', ())
+    return {
+        'settings_module': settings_module,
+        'total_ms': (time.perf_counter() - boot_start) * 1000,
+        'phases_ms': phases,
+        'apps': apps,
+        'eagerly_imported': sorted(
+            name for name in lazy if any(m == name or m.startswith(name + '.') for m in sys.modules)
+        ),
+        'module_count': len(sys.modules),
+    }
+
+
+def summarize_importtime(stderr, depth=1):
+    """
+    Sum -X importtime self times by package prefix (`depth` dotted parts).
+
+    Returns [(package, milliseconds)] sorted slowest first.
+    """
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line.split(':', 1)[1].split('|')
+        package = '.'.join(name.strip().split('.')[:depth])
+        totals[package] = totals.get(package, 0) + int(self_us) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+if __name__ == '__main__':
+    sys.stdout.write(json.dumps(profile(sys.argv[1] if len(sys.argv) > 1 else 'config.settings')))
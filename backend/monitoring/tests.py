@@ -0,0 +1,617 @@
+import contextvars
+import json
+import logging
+import os
+import pytest
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.urls import include, path
+from assessments.models import KatzADLAssessment
+from monitoring import instrumentation, metrics, profiling
+from monitoring.log_pipeline import JSONFormatter, QueueLogHandler, RateLimitFilter
+from monitoring.budgets import QueryBudgetExceeded, query_budget
+from monitoring.startup import summarize_importtime
+from organizations.middleware import TenantMiddleware
+from patients.models import Patient
+from users.models import User
+
+
+def count_users(request):
+    """Test view doing two queries"""
+    User.objects.count()
+    User.objects.count()
+    return HttpResponse('ok')
+
+
+@query_budget(queries=1)
+def over_budget(request):
+    """Test view exceeding its declared budget"""
+    return count_users(request)
+
+
+@query_budget(queries=5)
+def within_budget(request):
+    """Test view staying within its declared budget"""
+    return count_users(request)
+
+
+def create_patient(request):
+    """Test view saving a model (save() and full_clean() are timed)"""
+    Patient.objects.create(
+        medical_record_number='MRN-MON',
+        first_name='Mon',
+        last_name='Itor',
+        date_of_birth=date(1950, 1, 1),
+        gender=Patient.MALE,
+        primary_diagnosis='Stroke',
+        admission_date=date.today(),
+        created_by=User.objects.get()
+    )
+    return HttpResponse('created')
+
+
+def slow_view(request):
+    """Test view slow enough to be sampled"""
+    time.sleep(0.05)
+    return HttpResponse('slow')
+
+
+urlpatterns = [
+    path('count/', count_users, name='count-users'),
+    path('over/', over_budget, name='over-budget'),
+    path('within/', within_budget, name='within-budget'),
+    path('create/', create_patient, name='create-patient'),
+    path('slow/', slow_view, name='slow'),
+    path('monitoring/', include('monitoring.urls')),
+]
+
+
+@pytest.fixture
+def test_user(db):
+    """Create a staff user"""
+    return User.objects.create_user(
+        email='admin@example.com',
+        password='testpass123',
+        username='admin1',
+        first_name='Ada',
+        last_name='Admin',
+        role=User.ADMIN,
+        is_staff=True,
+        license_expiry_date=date.today() + timedelta(days=365)
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_histograms():
+    instrumentation.endpoint_histograms.reset()
+
+
+class TestTimedSection:
+    """Test timing of code sections"""
+
+    def test_section_outside_request_is_noop(self):
+        """Test sections do nothing when no request is being instrumented"""
+        with instrumentation.timed_section('save'):
+            pass
+
+        assert instrumentation.get_current_stats() is None
+
+    def test_nested_sections_with_same_name_count_once(self):
+        """Test re-entrant sections are not double counted"""
+        stats = instrumentation.RequestStats()
+        token = instrumentation.activate(stats)
+        try:
+            with instrumentation.timed_section('save'):
+                with instrumentation.timed_section('save'):
+                    pass
+                with instrumentation.timed_section('full_clean'):
+                    pass
+        finally:
+            instrumentation.deactivate(token)
+
+        assert set(stats.sections) == {'save', 'full_clean'}
+        assert stats.sections['save'] >= stats.sections['full_clean']
+
+    def test_concurrent_threads_lose_no_counts(self):
+        """Test queries and sections reported from several threads (as under gather()) all add up"""
+        stats = instrumentation.RequestStats()
+        start = threading.Barrier(8)
+
+        def work():
+            start.wait()
+            for _ in range(2000):
+                stats(lambda *args: None, 'SELECT 1', (), False, {})
+            with instrumentation.timed_section('save'):
+                with instrumentation.timed_section('save'):
+                    pass
+
+        token = instrumentation.activate(stats)
+        try:
+            # Each thread runs in a copy of the context, as gather() workers do
+            threads = [
+                threading.Thread(target=contextvars.copy_context().run, args=(work,))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            instrumentation.deactivate(token)
+
+        assert stats.query_count == 8 * 2000
+        assert stats.open_sections == set()
+        assert stats.sections['save'] > 0
+
+
+class TestHistogram:
+    """Test fixed-bucket histograms"""
+
+    def test_snapshot_is_cumulative(self):
+        """Test bucket counts accumulate up to +Inf"""
+        histogram = instrumentation.Histogram((1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        assert snapshot['buckets'] == [(1, 1), (10, 2), ('+Inf', 3)]
+        assert snapshot['count'] == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('monitoring.tests')
+class TestRequestInstrumentationMiddleware:
+    """Test per-request instrumentation"""
+
+    def test_headers_report_query_count(self, client, settings):
+        """Test development headers expose the request's query count"""
+        settings.REQUEST_STATS_HEADERS = True
+
+        response = client.get('/count/')
+
+        assert response['X-Query-Count'] == '2'
+        assert float(response['X-DB-Time-Ms']) >= 0
+
+    def test_headers_hidden_in_production(self, client, settings):
+        """Test headers are omitted when disabled"""
+        settings.REQUEST_STATS_HEADERS = False
+
+        response = client.get('/count/')
+
+        assert 'X-Query-Count' not in response
+
+    def test_model_save_and_full_clean_are_timed(self, client, settings, test_user):
+        """Test time in model save() and full_clean() is reported"""
+        settings.REQUEST_STATS_HEADERS = True
+
+        response = client.get('/create/')
+
+        assert float(response['X-Save-Time-Ms']) > 0
+        assert float(response['X-Full-Clean-Time-Ms']) > 0
+        assert float(response['X-Save-Time-Ms']) >= float(response['X-Full-Clean-Time-Ms'])
+
+    def test_requests_aggregate_into_endpoint_histograms(self, client):
+        """Test each request is observed under its URL name"""
+        client.get('/count/')
+        client.get('/count/')
+
+        snapshot = instrumentation.endpoint_histograms.snapshot()
+        assert snapshot['count-users']['query_count']['count'] == 2
+        assert snapshot['count-users']['query_count']['sum'] == 4
+
+    def test_declared_budget_exceeded_fails(self, client):
+        """Test exceeding a declared budget raises when enforcement is on"""
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/over/')
+
+    def test_declared_budget_within_limit(self, client):
+        """Test requests within their budget succeed"""
+        assert client.get('/within/').status_code == 200
+
+    def test_settings_budget_by_url_name(self, client, settings):
+        """Test budgets declared in settings apply by URL name"""
+        settings.QUERY_BUDGETS = {'count-users': {'queries': 1}}
+
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/count/')
+
+    def test_budget_logged_when_not_enforced(self, client, settings, caplog):
+        """Test budget violations are only logged outside of tests"""
+        settings.QUERY_BUDGET_ENFORCE = False
+
+        assert client.get('/over/').status_code == 200
+        assert 'Query budget exceeded' in caplog.text
+
+    def test_request_stats_view_requires_staff(self, client, test_user):
+        """Test the histogram endpoint is staff only"""
+        assert client.get('/monitoring/request-stats/').status_code == 403
+
+        client.force_login(test_user)
+        client.get('/count/')
+        response = client.get('/monitoring/request-stats/')
+
+        assert response.status_code == 200
+        assert 'count-users' in response.json()
+
+    def test_unknown_budget_key_rejected(self):
+        """Test typos in budget declarations fail loudly"""
+        with pytest.raises(TypeError):
+            query_budget(querys=1)
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('monitoring.tests')
+class TestRequestProfiling:
+    """Test the on-demand sampling profiler"""
+
+    @pytest.fixture(autouse=True)
+    def profile_dir(self, settings, tmp_path):
+        settings.PROFILING_DIR = str(tmp_path)
+        settings.PROFILING_SAMPLE_RATE = 0.0
+        settings.PROFILING_INTERVAL = 0.001
+        return tmp_path
+
+    def test_requests_not_profiled_by_default(self, client, profile_dir):
+        """Test nothing is recorded without sampling or a token"""
+        client.get('/slow/')
+
+        assert list(profile_dir.iterdir()) == []
+
+    def test_sampled_request_saves_collapsed_stacks(self, client, settings, profile_dir):
+        """Test sampled requests are saved as flamegraph-ready collapsed stacks"""
+        settings.PROFILING_SAMPLE_RATE = 1.0
+
+        client.get('/slow/')
+
+        [profile] = list(profile_dir.iterdir())
+        assert '-default-slow-' in profile.name
+        lines = profile.read_text().splitlines()
+        assert any('monitoring.tests:slow_view' in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+    def test_staff_token_profiles_request(self, client, test_user, profile_dir):
+        """Test a request carrying a staff token is profiled and named in the response"""
+        client.force_login(test_user)
+        token = client.get('/monitoring/profile-token/').json()['token']
+        client.logout()
+
+        response = client.get('/slow/', HTTP_X_PROFILE_REQUEST=token)
+
+        assert (profile_dir / response['X-Profile-Id']).exists()
+
+    def test_forged_token_ignored(self, client, profile_dir):
+        """Test an invalid token does not trigger profiling"""
+        response = client.get('/slow/', HTTP_X_PROFILE_REQUEST='forged')
+
+        assert 'X-Profile-Id' not in response
+        assert list(profile_dir.iterdir()) == []
+
+    def test_token_view_requires_staff(self, client):
+        """Test only staff can obtain profiling tokens"""
+        assert client.get('/monitoring/profile-token/').status_code == 403
+
+    def test_threads_working_for_the_request_are_sampled(self):
+        """Test worker threads running in the profiled request's context join the sample while they work"""
+        sampler = profiling.StackSampler(threading.get_ident(), 0.001).start()
+
+        def query_worker():
+            with profiling.sampling_current_thread():
+                time.sleep(0.05)
+
+        with sampler.tracking():
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(query_worker,))
+            worker.start()
+            worker.join()
+        sampler.stop()
+
+        assert any('query_worker' in stack for stack in sampler.stacks)
+        assert sampler.thread_ids == {threading.get_ident()}
+
+    def test_ring_buffer_is_bounded(self, settings, profile_dir):
+        """Test only the newest PROFILING_MAX_FILES profiles are kept"""
+        store = profiling.ProfileStore(profile_dir, max_files=3)
+        for number in range(5):
+            (profile_dir / f'2026010{number}T000000.000000-t-e-1ms.folded').write_text('a;b 1\n')
+        store.prune()
+
+        assert [path.name[:9] for path in store.profiles()] == ['20260102T', '20260103T', '20260104T']
+
+
+class TestMetricsRegistry:
+    """Test counters, histograms and the text exposition format"""
+
+    @pytest.fixture
+    def registry(self):
+        return metrics.Registry()
+
+    def test_counter_renders_labels(self, registry):
+        """Test counters are rendered per label set"""
+        counter = registry.counter('test_total', 'Test counter', ('tenant',))
+        counter.inc(tenant='acme')
+        counter.inc(2, tenant='acme')
+        counter.inc(tenant='beta')
+
+        text = registry.render()
+        assert '# TYPE test_total counter' in text
+        assert 'test_total{tenant="acme"} 3' in text
+        assert 'test_total{tenant="beta"} 1' in text
+
+    def test_histogram_renders_cumulative_buckets(self, registry):
+        """Test histogram buckets are cumulative with sum and count"""
+        histogram = registry.histogram('test_seconds', 'Test histogram', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="1.0"} 2' in text
+        assert 'test_seconds_bucket{le="+Inf"} 3' in text
+        assert 'test_seconds_sum 5.55' in text
+        assert 'test_seconds_count 3' in text
+
+    def test_wrong_labels_rejected(self, registry):
+        """Test label mistakes fail loudly"""
+        counter = registry.counter('test_total', 'Test counter', ('tenant',))
+
+        with pytest.raises(ValueError):
+            counter.inc(schema='acme')
+
+    def test_process_files_are_merged(self, registry, settings, tmp_path):
+        """Test a scrape adds the values written by other worker processes"""
+        settings.METRICS_DIR = str(tmp_path)
+        counter = registry.counter('test_total', 'Test counter', ('tenant',))
+        counter.inc(tenant='acme')
+        (tmp_path / '99999999.json').write_text(json.dumps({'test_total': [[['acme'], 4]]}))
+
+        assert 'test_total{tenant="acme"} 5' in registry.render()
+
+    def test_gauges_merge_by_their_aggregate(self, registry, settings, tmp_path):
+        """Test per-process readings are not summed across workers unless the gauge says so"""
+        settings.METRICS_DIR = str(tmp_path)
+        lag = registry.gauge('test_lag_seconds', 'Test lag', aggregate='max')
+        healthy = registry.gauge('test_healthy', 'Test health', aggregate='min')
+        in_use = registry.gauge('test_in_use', 'Test connections')
+        lag.set(0.5)
+        healthy.set(1)
+        in_use.set(2)
+        (tmp_path / '99999999.json').write_text(json.dumps({
+            'test_lag_seconds': [[[], 3.0]], 'test_healthy': [[[], 0]], 'test_in_use': [[[], 3]],
+        }))
+
+        text = registry.render()
+        assert 'test_lag_seconds 3.0' in text
+        assert 'test_healthy 0' in text
+        assert 'test_in_use 5' in text
+
+    def test_own_process_file_not_double_counted(self, registry, settings, tmp_path):
+        """Test the scraping process uses its live values instead of its file"""
+        settings.METRICS_DIR = str(tmp_path)
+        counter = registry.counter('test_total', 'Test counter')
+        counter.inc()
+        registry.write_process_file()
+
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+        assert 'test_total 1' in registry.render()
+
+    def test_stale_process_files_are_dropped(self, registry, settings, tmp_path):
+        """Test files of long-gone workers are removed on scrape"""
+        settings.METRICS_DIR = str(tmp_path)
+        registry.counter('test_total', 'Test counter')
+        stale = tmp_path / '99999999.json'
+        stale.write_text(json.dumps({'test_total': [[[], 4]]}))
+        old = time.time() - settings.METRICS_STALE_SECONDS - 1
+        os.utime(stale, (old, old))
+
+        assert 'test_total 4' not in registry.render()
+        assert not stale.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('monitoring.tests')
+class TestApplicationMetrics:
+    """Test the hot paths are instrumented and scraped"""
+
+    @pytest.fixture(autouse=True)
+    def clear_metrics(self):
+        metrics.registry.clear()
+
+    def test_model_saves_counted(self, test_user):
+        """Test patient and assessment saves are counted and scoring timed"""
+        patient = Patient.objects.create(
+            medical_record_number='MRN-MET',
+            first_name='Met',
+            last_name='Rics',
+            date_of_birth=date(1950, 1, 1),
+            gender=Patient.MALE,
+            primary_diagnosis='Stroke',
+            admission_date=date.today(),
+            created_by=test_user
+        )
+        patient.save()
+        KatzADLAssessment.objects.create(
+            patient=patient, assessed_by=test_user, assessment_date=date.today(),
+            bathing=1, dressing=1, toileting=1, transferring=1, continence=1, feeding=1
+        )
+
+        saves = metrics.model_saves
+        assert saves.value(tenant='default', model='patient', operation='create') == 1
+        assert saves.value(tenant='default', model='patient', operation='update') == 1
+        assert saves.value(tenant='default', model='katzadlassessment', operation='create') == 1
+        assert 'ot_assessment_scoring_seconds_count{instrument="katzadlassessment"} 1' in metrics.registry.render()
+
+    def test_lockout_methods_counted(self, test_user):
+        """Test failed logins, the lockout and lock checks are counted"""
+        for _ in range(5):
+            test_user.increment_failed_login()
+        test_user.is_account_locked()
+
+        assert metrics.login_failures.value(tenant='default') == 5
+        assert metrics.account_lockouts.value(tenant='default') == 1
+        assert metrics.locked_account_attempts.value(tenant='default') == 1
+
+    def test_requests_counted_per_tenant(self, client):
+        """Test the request middleware counts requests by tenant and status"""
+        client.get('/count/')
+
+        assert metrics.requests.value(tenant='default', method='GET', status=200) == 1
+
+    def test_metrics_view_requires_token_or_staff(self, client, settings, test_user):
+        """Test the scrape endpoint is not public"""
+        settings.METRICS_TOKEN = 'scrape-secret'
+
+        assert client.get('/monitoring/metrics/').status_code == 403
+        assert client.get('/monitoring/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+
+        response = client.get('/monitoring/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert '# TYPE ot_requests_total counter' in response.content.decode()
+
+        client.force_login(test_user)
+        assert client.get('/monitoring/metrics/').status_code == 200
+
+    def test_tenant_resolution_counted(self):
+        """Test tenant lookups by hostname are counted as found / not found"""
+        class Domain:
+            class DoesNotExist(Exception):
+                pass
+
+            class objects:
+                @staticmethod
+                def select_related(*fields):
+                    return Domain.objects
+
+                @staticmethod
+                def get(domain):
+                    if domain != 'acme.localhost':
+                        raise Domain.DoesNotExist
+                    return type('FakeDomain', (), {'tenant': 'acme'})
+
+        middleware = TenantMiddleware(lambda request: None)
+        assert middleware.get_tenant(Domain, 'acme.localhost') == 'acme'
+        with pytest.raises(Domain.DoesNotExist):
+            middleware.get_tenant(Domain, 'nobody.localhost')
+
+        assert metrics.tenant_resolutions.value(result='found') == 1
+        assert metrics.tenant_resolutions.value(result='not_found') == 1
+
+
+def make_record(message='hello %s', args=('world',), name='test.logger', **extra):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogPipeline:
+    """Test the queue-based JSON logging pipeline"""
+
+    @pytest.fixture
+    def handler(self, tmp_path):
+        handler = QueueLogHandler(filename=tmp_path / 'app.log', max_bytes=300, backup_count=2)
+        handler.setFormatter(JSONFormatter())
+        yield handler
+        handler.close()
+
+    def test_json_formatter_includes_extras(self):
+        """Test records become one JSON object with message and extra fields"""
+        entry = json.loads(JSONFormatter().format(make_record(tenant='acme')))
+
+        assert entry['message'] == 'hello world'
+        assert entry['level'] == 'INFO'
+        assert entry['logger'] == 'test.logger'
+        assert entry['tenant'] == 'acme'
+
+    def test_json_formatter_includes_exception(self):
+        """Test tracebacks are kept in the JSON entry"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('t', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+
+        assert 'ValueError: boom' in json.loads(JSONFormatter().format(record))['exception']
+
+    def test_records_written_by_listener(self, handler, tmp_path):
+        """Test queued records reach the file as JSON lines"""
+        handler.handle(make_record())
+        handler.flush()
+
+        line = (tmp_path / 'app.log').read_text().splitlines()[0]
+        assert json.loads(line)['message'] == 'hello world'
+
+    def test_file_rotates_by_size(self, handler, tmp_path):
+        """Test the file rotates once it reaches max_bytes"""
+        for number in range(10):
+            handler.handle(make_record('record %s', (number,)))
+        handler.flush()
+
+        assert (tmp_path / 'app.log.1').exists()
+        assert not (tmp_path / 'app.log.3').exists()
+
+    def test_full_queue_drops_and_counts(self, tmp_path):
+        """Test a full queue drops records instead of blocking the caller"""
+        metrics.log_records_dropped.clear()
+        handler = QueueLogHandler(filename=tmp_path / 'app.log', queue_size=1)
+        handler.listener.stop()  # Nothing drains the queue
+        handler.listener = None
+
+        for _ in range(3):
+            handler.handle(make_record())
+
+        assert handler.dropped == 2
+        assert metrics.log_records_dropped.value(reason='queue_full') == 2
+        handler.target.close()
+
+    def test_rate_limit_per_logger(self):
+        """Test a noisy logger is limited without affecting others"""
+        limiter = RateLimitFilter(rate=0, burst=2, limits={'quiet': (0, 1)})
+
+        noisy = [limiter.filter(make_record(name='noisy')) for _ in range(4)]
+        quiet = [limiter.filter(make_record(name='quiet')) for _ in range(2)]
+
+        assert noisy == [True, True, False, False]
+        assert quiet == [True, False]
+        assert limiter.suppressed == 3
+
+    def test_rate_limit_decided_once_per_record(self):
+        """Test handlers sharing the filter do not each spend a token"""
+        limiter = RateLimitFilter(rate=0, burst=1)
+        record = make_record()
+
+        assert limiter.filter(record) and limiter.filter(record)
+
+
+class TestStartupReport:
+    """Test suite for the cold-start profiler"""
+
+    def test_summarize_importtime_groups_by_package(self):
+        """Test self times are summed per package, slowest first"""
+        stderr = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       500 |        500 |     django.db.models',
+            'import time:      1500 |       2000 |   django.db',
+            'import time:      3000 |       3000 | psycopg2',
+        ])
+
+        assert summarize_importtime(stderr) == [('psycopg2', 3.0), ('django', 2.0)]
+        assert summarize_importtime(stderr, depth=2)[1] == ('django.db', 2.0)
+
+    def test_report_breaks_down_boot(self, capsys):
+        """Test a cold boot is timed per phase and app without loading lazy modules"""
+        call_command('startup_report', runs=1, budget_ms=60000, json=True)
+        report = json.loads(capsys.readouterr().out)
+
+        assert {'settings', 'logging', 'apps', 'middleware', 'urls'} <= set(report['phases_ms'])
+        assert {'import_ms', 'models_ms', 'ready_ms'} <= set(report['apps']['patients'])
+        assert report['eagerly_imported'] == []
+        assert report['packages_ms'][0][0] == 'django'
+
+    def test_over_budget_fails(self):
+        """Test the command fails when the boot exceeds the budget"""
+        with pytest.raises(CommandError, match='exceeds the 0 ms budget'):
+            call_command('startup_report', runs=1, budget_ms=0)
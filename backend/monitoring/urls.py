@@ -0,0 +1,11 @@
+from django.urls import path
+
+from monitoring import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('request-stats/', views.request_stats, name='request-stats'),
+    path('profile-token/', views.profile_token, name='profile-token'),
+    path('metrics/', views.metrics_view, name='metrics'),
+]
@@ -0,0 +1,39 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+
+from monitoring import metrics, profiling
+from monitoring.instrumentation import endpoint_histograms
+
+
+def request_stats(request):
+    """Per-endpoint histograms of query count, DB time and model save/full_clean time (staff only)"""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        raise PermissionDenied
+    return JsonResponse(endpoint_histograms.snapshot())
+
+
+def profile_token(request):
+    """Issue a signed token that makes requests carrying it be profiled (staff only)"""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        raise PermissionDenied
+    return JsonResponse({
+        'header': profiling.PROFILE_HEADER,
+        'token': profiling.make_token(request.user),
+        'expires_in': settings.PROFILING_TOKEN_MAX_AGE,
+    })
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Application metrics in Prometheus text format, merged across worker processes"""
+    if not (_has_metrics_token(request) or (request.user.is_authenticated and request.user.is_staff)):
+        raise PermissionDenied
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,101 @@
+"""
+django-tenants' PostgreSQL backend with pooled connections and a cached
+search_path.
+
+django-tenants sends `SET search_path` for every cursor (or, with
+TENANT_LIMIT_SET_CALLS, after every set_tenant() call even to the same
+schema). This backend remembers the search_path last applied to each server
+connection and only sends SET when a cursor needs a different one. The
+remembered value travels with the server connection through the pool, and
+is forgotten on rollback since rolling back a transaction also undoes a
+SET made in it.
+
+With a POOL entry in the database settings, closing the connection (at the
+end of every request with CONN_MAX_AGE = 0) returns the server connection
+to a process-wide pool instead of disconnecting, and connecting takes an
+idle one from it (see pool.py):
+
+    DATABASES = {'default': {
+        'ENGINE': 'organizations.postgresql_backend',
+        ...
+        'CONN_MAX_AGE': 0,
+        'POOL': {'MAX_SIZE': 20, 'TIMEOUT': 10, 'MAX_LIFETIME': 1800},
+    }}
+
+Pooled sessions are shared between requests and tenants: code must not
+leave session state other than search_path behind (use SET LOCAL and
+transaction-level advisory locks).
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper
+from django_tenants.postgresql_backend.base import original_backend, psycopg
+
+from monitoring import metrics
+from organizations.postgresql_backend.creation import DatabaseCreation
+from organizations.postgresql_backend.pool import PooledConnection, get_pool
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        self._pooled = None  # PooledConnection wrapping self.connection
+        super().__init__(*args, **kwargs)
+
+    @property
+    def pool(self):
+        """This connection's pool, or None when POOL is not configured"""
+        return self._pooled.pool if self._pooled is not None else None
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            self._pooled = PooledConnection(super().get_new_connection(conn_params))
+        else:
+            pool = get_pool(self.alias, conn_params, options, self.settings_dict['CONN_HEALTH_CHECKS'])
+            self._pooled = pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        return self._pooled.connection
+
+    def _close(self):
+        pooled, self._pooled = self._pooled, None
+        if pooled is None or pooled.pool is None:
+            return super()._close()
+        if self.in_atomic_block:
+            # Django keeps using this session until the atomic block exits
+            pooled.pool.discard(pooled)
+        else:
+            pooled.pool.release(pooled)
+
+    def _rollback(self):
+        if self._pooled is not None:
+            self._pooled.search_path = None
+        return super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        super()._savepoint_rollback(sid)
+        if self._pooled is not None:
+            self._pooled.search_path = None
+
+    def _cursor(self, name=None):
+        """Open a cursor, sending SET search_path only if the session has a different one"""
+        cursor = original_backend.DatabaseWrapper._cursor(self, name)
+
+        if not self.schema_name:
+            raise ImproperlyConfigured('Database schema not set. Did you forget to call set_schema() or set_tenant()?')
+        search_path = self._get_cursor_search_paths()
+        if self._pooled.search_path == search_path:
+            self.search_path_set_schemas = search_path
+            metrics.db_search_path.inc(result='cached')
+            return cursor
+
+        # Sent on a raw cursor: session setup, not one of the request's queries
+        with self.connection.cursor() as path_cursor:
+            try:
+                path_cursor.execute('SET search_path = {0}'.format(','.join(f"'{s}'" for s in search_path)))
+            except psycopg.Error:
+                # Fails when the transaction is already aborted; the rollback that follows resets it
+                self._pooled.search_path = self.search_path_set_schemas = None
+            else:
+                self._pooled.search_path = self.search_path_set_schemas = search_path
+                metrics.db_search_path.inc(result='set')
+        return cursor
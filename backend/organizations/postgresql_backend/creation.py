@@ -0,0 +1,10 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgresDatabaseCreation
+
+from organizations.postgresql_backend.pool import close_idle_connections
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled sessions would keep DROP DATABASE from running
+        close_idle_connections(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,209 @@
+"""
+Process-wide pool of PostgreSQL server connections.
+
+Each thread's Django connection object takes a server connection from the
+pool when it connects and hands it back when it closes. Idle connections
+are reused most-recently-used first, so a busy process keeps a warm set and
+rarely connects. A connection is discarded instead of reused when it is
+closed or broken, still inside a transaction that cannot be rolled back,
+or older than MAX_LIFETIME seconds. When MAX_SIZE connections are in use,
+acquire() waits up to TIMEOUT seconds and then raises PoolTimeout.
+
+Pools are per process: a forked worker starts a new pool and never touches
+(or closes) the connections it inherited from its parent.
+"""
+import collections
+import os
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+from monitoring import metrics
+
+_STATUS_IDLE = 0  # psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(OperationalError):
+    """No pooled connection became free within the pool's timeout"""
+
+
+class PooledConnection:
+    """A server connection plus the session state the backend tracks for it"""
+
+    __slots__ = ('connection', 'pool', 'created_at', 'search_path')
+
+    def __init__(self, connection, pool=None):
+        self.connection = connection
+        self.pool = pool
+        self.created_at = time.monotonic()
+        self.search_path = None  # Last search_path SET on this session, if known
+
+
+class ConnectionPool:
+    def __init__(self, alias, max_size=20, timeout=10, max_lifetime=None, health_checks=False):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_checks = health_checks
+        self.pid = os.getpid()
+        self._idle = collections.deque()
+        self._size = 0  # Open connections, idle or in use
+        self._condition = threading.Condition()
+        metrics.db_pool_max_connections.set(max_size, alias=alias)
+
+    @property
+    def in_use(self):
+        return self._size - len(self._idle)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def acquire(self, connect):
+        """Return an idle PooledConnection, or one made with connect() while under MAX_SIZE"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        discarded = []
+        try:
+            with self._condition:
+                while True:
+                    while self._idle:
+                        pooled = self._idle.pop()
+                        if self._reusable(pooled):
+                            self._observe(start, 'reused')
+                            return pooled
+                        discarded.append(pooled)
+                        self._size -= 1
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._observe(start, 'timeout')
+                        raise PoolTimeout(
+                            f'No connection free in the {self.alias!r} pool '
+                            f'({self.max_size} in use) after {self.timeout}s'
+                        )
+                    self._condition.wait(remaining)
+        finally:
+            for pooled in discarded:
+                self._close(pooled)
+
+        try:
+            pooled = PooledConnection(connect(), self)
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            self._update_gauges()
+            raise
+        self._observe(start, 'new')
+        return pooled
+
+    def release(self, pooled):
+        """Give a connection back; it is rolled back to idle or discarded"""
+        connection = pooled.connection
+        keep = not connection.closed and not self._expired(pooled)
+        if keep and connection.get_transaction_status() != _STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                keep = False
+            pooled.search_path = None  # The rollback may have undone a SET
+
+        if not keep:
+            self._close(pooled)
+        with self._condition:
+            if keep:
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+            self._condition.notify()
+        self._update_gauges()
+
+    def discard(self, pooled):
+        """Close a connection that must not be reused"""
+        self._close(pooled)
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        self._update_gauges()
+
+    def close_idle(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+        self._update_gauges()
+
+    def _expired(self, pooled):
+        return self.max_lifetime is not None and time.monotonic() - pooled.created_at > self.max_lifetime
+
+    def _reusable(self, pooled):
+        connection = pooled.connection
+        if connection.closed or self._expired(pooled) or connection.get_transaction_status() != _STATUS_IDLE:
+            return False
+        if self.health_checks:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except Exception:
+                return False
+        return True
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def _observe(self, start, result):
+        metrics.db_pool_acquisitions.inc(alias=self.alias, result=result)
+        metrics.db_pool_acquire_seconds.observe(time.perf_counter() - start, alias=self.alias)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.db_pool_connections.set(self.in_use, alias=self.alias, state='in_use')
+        metrics.db_pool_connections.set(self.idle, alias=self.alias, state='idle')
+
+
+_pools = {}
+_inherited = []  # Pools of a parent process; kept referenced so their sockets are never closed here
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options, health_checks=False):
+    """
+    Return this process's pool for `alias` and these connection parameters
+    (the test runner switches NAME to the test database), creating it from
+    the POOL options.
+    """
+    key = (alias, repr(sorted(conn_params.items())))
+    pool = _pools.get(key)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            if pool is not None:
+                _inherited.append(pool)
+            pool = _pools[key] = ConnectionPool(
+                alias,
+                max_size=options.get('MAX_SIZE', 20),
+                timeout=options.get('TIMEOUT', 10),
+                max_lifetime=options.get('MAX_LIFETIME'),
+                health_checks=health_checks,
+            )
+        return pool
+
+
+def close_idle_connections(alias=None):
+    """Close this process's idle pooled connections (for `alias`, or all)"""
+    for pool in list(_pools.values()):
+        if pool.pid == os.getpid() and alias in (None, pool.alias):
+            pool.close_idle()
@@ -0,0 +1,142 @@
+"""
+Route reporting reads to a read replica.
+
+Reads made inside use_replica() go to the REPLICA_DATABASE_ALIAS database
+when it is configured, reachable and at most REPLICA_MAX_LAG_SECONDS behind
+the primary; otherwise they stay on the primary. Writes always go to the
+primary.
+
+    with use_replica('report'):
+        report = dry_run_report(cutoff)
+
+    @use_replica('analytics')
+    def cohort_summary(since):
+        ...
+
+    with use_replica('export'):
+        for patient in Patient.objects.iterator(chunk_size=2000):
+            ...
+
+Only wrap work that tolerates data some seconds old: clinical reads, and
+anything that must see the request's own writes, stay on the primary. The
+replica connection follows the primary connection's tenant schema. Lag is
+measured at most every REPLICA_LAG_CHECK_INTERVAL seconds per process.
+
+ReplicaRouter goes before django_tenants' TenantSyncRouter in
+DATABASE_ROUTERS; it only answers for reads inside use_replica() and for
+objects loaded from the replica.
+"""
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from monitoring import metrics
+from organizations.utils import is_multi_tenant
+
+logger = logging.getLogger(__name__)
+
+# 0 on a primary, or on a standby that has replayed everything it received
+LAG_QUERY = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+_workload = contextvars.ContextVar('replica_workload', default=None)
+_checks = {}  # alias -> (monotonic time of the last check, lag seconds or None if unreachable)
+_checks_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def use_replica(workload):
+    """Send reads in the block (or decorated function) to the replica while it is healthy"""
+    token = _workload.set(workload)
+    try:
+        yield
+    finally:
+        _workload.reset(token)
+
+
+def measure_lag(alias):
+    """Seconds the replica is behind the primary, or None if it cannot be reached"""
+    replica = connections[alias]
+    if replica.vendor != 'postgresql':
+        return 0.0  # A local stand-in database
+    try:
+        replica.ensure_connection()
+        # Raw cursor: no search_path needed, and not one of the request's queries
+        with replica.wrap_database_errors, replica.connection.cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            return float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        logger.warning('Read replica %r is unreachable; reading from the primary', alias, exc_info=True)
+        replica.close()
+        return None
+
+
+def replica_lag(alias):
+    """Last measured lag of `alias` (None if unreachable), re-measured when stale"""
+    now = time.monotonic()
+    with _checks_lock:
+        checked_at, lag = _checks.get(alias, (None, None))
+        stale = checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL
+        if stale:
+            _checks[alias] = (now, lag)  # Other threads keep using the last value meanwhile
+    if not stale:
+        return lag
+
+    lag = measure_lag(alias)
+    with _checks_lock:
+        _checks[alias] = (time.monotonic(), lag)
+    metrics.db_replica_healthy.set(int(lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS), alias=alias)
+    if lag is not None:
+        metrics.db_replica_lag_seconds.set(lag, alias=alias)
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning('Read replica %r is %.1fs behind; reading from the primary', alias, lag)
+    return lag
+
+
+def available_replica():
+    """The replica alias if reads may use it now, else None"""
+    alias = settings.REPLICA_DATABASE_ALIAS
+    if not settings.REPLICA_READS or alias not in settings.DATABASES:
+        return None
+    lag = replica_lag(alias)
+    if lag is None or lag > settings.REPLICA_MAX_LAG_SECONDS:
+        return None
+
+    if is_multi_tenant():
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if replica.schema_name != primary.schema_name:
+            replica.set_tenant(primary.tenant, primary.include_public_schema)
+    return alias
+
+
+class ReplicaRouter:
+    """Send reads inside use_replica() to the replica; keep writes and migrations on the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _workload.get() is None:
+            return None
+        return available_replica()
+
+    def db_for_write(self, model, instance=None, **hints):
+        # Without this, saving an object read from the replica would write to the replica
+        if instance is not None and instance._state.db == settings.REPLICA_DATABASE_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        same_data = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE_ALIAS}
+        if obj1._state.db in same_data and obj2._state.db in same_data:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_DATABASE_ALIAS:
+            return False
+        return None
@@ -2,7 +2,9 @@ import pytest
 from datetime import date
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from organizations import routers
 from organizations.models import Organization
+from organizations.routers import use_replica
 
 
 @pytest.mark.django_db
@@ -471,3 +473,249 @@ class TestOrganizationModel:
         assert orgs[0].name == "Alpha Clinic"
         assert orgs[1].name == "Middle Hospital"
         assert orgs[2].name == "Zebra Hospital"
+
+
+class FakeServerConnection:
+    """Stands in for a psycopg2 connection in pool tests"""
+
+    def __init__(self, status=0):
+        self.closed = False
+        self.status = status
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = 0
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool:
+    """Test the process-wide database connection pool"""
+
+    def make_pool(self, alias='test', **kwargs):
+        from organizations.postgresql_backend.pool import ConnectionPool
+        return ConnectionPool(alias, **kwargs)
+
+    def test_released_connection_is_reused(self):
+        """Test a released connection is handed out again instead of connecting"""
+        pool = self.make_pool(max_size=2)
+        first = pool.acquire(FakeServerConnection)
+        first.search_path = ['clinic_a', 'public']
+        pool.release(first)
+
+        again = pool.acquire(lambda: pytest.fail('should not connect'))
+
+        assert again is first
+        assert again.search_path == ['clinic_a', 'public']
+        assert (pool.in_use, pool.idle) == (1, 0)
+
+    def test_open_transaction_rolled_back_on_release(self):
+        """Test a connection left in a transaction is rolled back and loses its cached search_path"""
+        pool = self.make_pool(max_size=1)
+        pooled = pool.acquire(lambda: FakeServerConnection(status=2))
+        pooled.search_path = ['clinic_a', 'public']
+
+        pool.release(pooled)
+
+        assert pooled.connection.rollbacks == 1
+        assert pooled.search_path is None
+        assert pool.idle == 1
+
+    def test_closed_or_expired_connections_discarded(self):
+        """Test broken and too-old connections are closed instead of pooled"""
+        pool = self.make_pool(max_size=2, max_lifetime=60)
+        broken = pool.acquire(FakeServerConnection)
+        old = pool.acquire(FakeServerConnection)
+        broken.connection.closed = True
+        old.created_at -= 120
+
+        pool.release(broken)
+        pool.release(old)
+
+        assert old.connection.closed
+        assert (pool.in_use, pool.idle) == (0, 0)
+
+    def test_acquire_times_out_when_exhausted(self):
+        """Test acquire() waits for TIMEOUT and raises PoolTimeout when all connections are in use"""
+        from organizations.postgresql_backend.pool import PoolTimeout
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.acquire(FakeServerConnection)
+
+        with pytest.raises(PoolTimeout):
+            pool.acquire(FakeServerConnection)
+
+    def test_waiter_gets_released_connection(self):
+        """Test a waiting acquire() receives a connection released by another thread"""
+        import threading
+        pool = self.make_pool(max_size=1, timeout=5)
+        held = pool.acquire(FakeServerConnection)
+        threading.Timer(0.05, pool.release, [held]).start()
+
+        assert pool.acquire(lambda: pytest.fail('should not connect')) is held
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connect() error does not leak pool capacity"""
+        pool = self.make_pool(max_size=1, timeout=0.05)
+
+        def refuse():
+            raise OSError('connection refused')
+
+        with pytest.raises(OSError):
+            pool.acquire(refuse)
+        assert pool.acquire(FakeServerConnection) is not None
+
+    def test_gauges_track_pool_state(self):
+        """Test the saturation gauges follow in-use and idle counts"""
+        from monitoring import metrics
+        pool = self.make_pool('gauges', max_size=3)
+        pooled = pool.acquire(FakeServerConnection)
+        pool.acquire(FakeServerConnection)
+        pool.release(pooled)
+
+        assert metrics.db_pool_connections.value(alias='gauges', state='in_use') == 1
+        assert metrics.db_pool_connections.value(alias='gauges', state='idle') == 1
+        assert metrics.db_pool_max_connections.value(alias='gauges') == 3
+        assert metrics.db_pool_acquisitions.value(alias='gauges', result='new') >= 2
+
+    def test_close_idle(self):
+        """Test close_idle() closes only idle connections"""
+        pool = self.make_pool(max_size=2)
+        idle = pool.acquire(FakeServerConnection)
+        busy = pool.acquire(FakeServerConnection)
+        pool.release(idle)
+
+        pool.close_idle()
+
+        assert idle.connection.closed
+        assert not busy.connection.closed
+        assert (pool.in_use, pool.idle) == (1, 0)
+
+
+@pytest.mark.django_db
+class TestPooledBackend:
+    """Test the pooled tenant backend against PostgreSQL"""
+
+    @pytest.fixture(autouse=True)
+    def pooled_connection(self):
+        from django.db import connection
+        if connection.vendor != 'postgresql' or not connection.settings_dict.get('POOL'):
+            pytest.skip('Needs the pooled PostgreSQL backend')
+        return connection
+
+    def test_search_path_sent_once_per_session(self, pooled_connection):
+        """Test SET search_path is skipped while the session already has it"""
+        from monitoring import metrics
+        pooled_connection.ensure_connection()
+        before = metrics.db_search_path.value(result='set')
+
+        for _ in range(3):
+            with pooled_connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        with pooled_connection.cursor() as cursor:
+            cursor.execute('SHOW search_path')
+            search_path = cursor.fetchone()[0]
+
+        assert metrics.db_search_path.value(result='set') - before <= 1
+        assert 'public' in search_path
+
+
+def make_organization(name):
+    return Organization.objects.create(
+        name=name,
+        organization_type=Organization.HOSPITAL,
+        schema_name=name.lower().replace(' ', '_'),
+        subdomain=name.lower().replace(' ', ''),
+    )
+
+
+@pytest.fixture
+def replica_reads(settings, monkeypatch):
+    """Route use_replica() reads to the stand-in replica, measuring lag on every read"""
+    settings.REPLICA_READS = True
+    settings.REPLICA_LAG_CHECK_INTERVAL = 0
+    monkeypatch.setattr(routers, '_checks', {})
+    return settings
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouter:
+    """Test reporting reads go to the read replica while it is healthy"""
+
+    def test_reads_inside_use_replica_go_to_replica(self, replica_reads):
+        """Test reads in a use_replica() block use the replica and see committed rows"""
+        make_organization('North Clinic')
+
+        with use_replica('analytics'):
+            queryset = Organization.objects.filter(name='North Clinic')
+            assert queryset.db == 'replica'
+            assert queryset.count() == 1
+
+    def test_other_reads_stay_on_primary(self, replica_reads):
+        """Test reads outside use_replica() use the primary"""
+        assert Organization.objects.all().db == 'default'
+
+    def test_decorated_function_uses_replica(self, replica_reads):
+        """Test use_replica() works as a decorator"""
+        @use_replica('report')
+        def database():
+            return Organization.objects.all().db
+
+        assert database() == 'replica'
+        assert Organization.objects.all().db == 'default'
+
+    def test_writes_go_to_primary(self, replica_reads):
+        """Test saves inside use_replica(), and of objects read from the replica, hit the primary"""
+        make_organization('South Clinic')
+        with use_replica('export'):
+            organization = Organization.objects.get(name='South Clinic')
+            created = make_organization('East Clinic')
+        assert organization._state.db == 'replica'
+        assert created._state.db == 'default'
+
+        organization.name = 'South Clinic Annex'
+        organization.save()
+
+        assert organization._state.db == 'default'
+        assert Organization.objects.filter(name='South Clinic Annex').exists()
+
+    def test_lagging_replica_falls_back_to_primary(self, replica_reads, monkeypatch):
+        """Test reads stay on the primary while replica lag exceeds REPLICA_MAX_LAG_SECONDS"""
+        from monitoring import metrics
+        replica_reads.REPLICA_MAX_LAG_SECONDS = 30
+        monkeypatch.setattr(routers, 'measure_lag', lambda alias: 45.0)
+
+        with use_replica('analytics'):
+            assert Organization.objects.all().db == 'default'
+        assert metrics.db_replica_lag_seconds.value(alias='replica') == 45.0
+        assert metrics.db_replica_healthy.value(alias='replica') == 0
+
+    def test_unreachable_replica_falls_back_to_primary(self, replica_reads, monkeypatch):
+        """Test reads stay on the primary when the replica cannot be reached"""
+        monkeypatch.setattr(routers, 'measure_lag', lambda alias: None)
+
+        with use_replica('analytics'):
+            assert Organization.objects.all().db == 'default'
+
+    def test_lag_checked_once_per_interval(self, replica_reads, monkeypatch):
+        """Test replica lag is measured at most every REPLICA_LAG_CHECK_INTERVAL seconds"""
+        replica_reads.REPLICA_LAG_CHECK_INTERVAL = 60
+        checks = []
+        monkeypatch.setattr(routers, 'measure_lag', lambda alias: checks.append(alias) or 0.0)
+
+        with use_replica('analytics'):
+            for _ in range(3):
+                assert Organization.objects.all().db == 'replica'
+
+        assert checks == ['replica']
+
+    def test_disabled_replica_reads(self, replica_reads):
+        """Test REPLICA_READS = False keeps every read on the primary"""
+        replica_reads.REPLICA_READS = False
+
+        with use_replica('analytics'):
+            assert Organization.objects.all().db == 'default'
@@ -0,0 +1,49 @@
+"""
+Helpers for running code against tenant schemas.
+
+Background jobs (audit flushing, retention, data generation) need to visit
+every tenant schema. These helpers hide django-tenants so the same code runs
+unchanged under the single-schema SQLite test settings, where the "tenant"
+is simply the default database.
+"""
+import contextlib
+
+from django.conf import settings
+
+
+def is_multi_tenant():
+    """Return True when django-tenants schema routing is active"""
+    return 'django_tenants' in settings.INSTALLED_APPS
+
+
+def get_tenant_schemas(schema_names=None):
+    """
+    Return the schema names to visit.
+
+    Returns [None] (meaning "the current database") when multi-tenancy is
+    disabled. `schema_names` restricts the result to the given schemas.
+    """
+    if not is_multi_tenant():
+        return [None]
+
+    from django_tenants.utils import get_public_schema_name
+    from organizations.models import Organization
+
+    queryset = (
+        Organization.objects
+        .filter(is_active=True)
+        .exclude(schema_name=get_public_schema_name())
+        .order_by('schema_name')
+    )
+    if schema_names:
+        queryset = queryset.filter(schema_name__in=schema_names)
+    return list(queryset.values_list('schema_name', flat=True))
+
+
+def schema_context(schema_name):
+    """Activate `schema_name` for the block (no-op when schema_name is None)"""
+    if schema_name is None:
+        return contextlib.nullcontext()
+
+    from django_tenants.utils import schema_context as tenant_schema_context
+    return tenant_schema_context(schema_name)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from patients.retention import enforce_retention, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete (optionally archiving first) discharged patients and their Katz, Barthel '
+        'and FIM assessments once DATA_RETENTION_DAYS have passed since discharge.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be purged per tenant without deleting anything',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.DATA_RETENTION_DAYS,
+            help='Purge patients discharged more than this many days ago',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.DATA_RETENTION_BATCH_SIZE,
+            help='Patients purged per transaction',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches to limit load',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Tenant schemas processed in parallel',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            help='Write purged rows as JSON lines to this directory before deleting them',
+        )
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Only process these tenant schemas (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['retention_days'])
+        dry_run = options['dry_run']
+        purge_options = {} if dry_run else {
+            'batch_size': options['batch_size'],
+            'archive_dir': options['archive_dir'],
+            'pause': options['pause'],
+        }
+
+        results = enforce_retention(
+            cutoff,
+            schema_names=options['schemas'],
+            dry_run=dry_run,
+            workers=options['workers'],
+            **purge_options,
+        )
+
+        self.stdout.write(f'Retention cutoff: discharged before {cutoff.isoformat()}')
+        for schema_name, report in results.items():
+            label = schema_name or 'default'
+            if dry_run:
+                assessments = ', '.join(f'{name}={count}' for name, count in report['assessments'].items())
+                self.stdout.write(
+                    f'{label}: would purge {report["patients"]} patients '
+                    f'(discharged {report["oldest_discharge"]} to {report["newest_discharge"]}); {assessments}'
+                )
+            else:
+                deleted = ', '.join(f'{name}={count}' for name, count in report.items())
+                self.stdout.write(f'{label}: deleted {deleted}')
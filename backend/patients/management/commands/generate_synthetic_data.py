@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from patients.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate clinically plausible synthetic patients with longitudinal Katz, Barthel '
+        'or FIM trajectories in each tenant schema, bulk-loaded (COPY on PostgreSQL). '
+        'For load and performance testing only; never run against a tenant with real PHI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--patients',
+            type=int,
+            default=1000,
+            help='Patients to generate per tenant',
+        )
+        parser.add_argument(
+            '--min-visits',
+            type=int,
+            default=3,
+            help='Minimum assessments per patient',
+        )
+        parser.add_argument(
+            '--max-visits',
+            type=int,
+            default=8,
+            help='Maximum assessments per patient',
+        )
+        parser.add_argument(
+            '--clinicians',
+            type=int,
+            default=20,
+            help='Synthetic OT users per tenant that assessments are spread across',
+        )
+        parser.add_argument(
+            '--history-days',
+            type=int,
+            default=3 * 365,
+            help='Admissions are spread over this many days before today',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Patients loaded per transaction',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for reproducible data (combined with the schema name)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Tenant schemas filled in parallel',
+        )
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Only fill these tenant schemas (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options['min_visits'] <= options['max_visits']:
+            raise CommandError('--min-visits must be at least 1 and not more than --max-visits')
+
+        start = time.monotonic()
+        results = generate(
+            schema_names=options['schemas'],
+            workers=options['workers'],
+            patients=options['patients'],
+            visits=(options['min_visits'], options['max_visits']),
+            clinicians=options['clinicians'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            history_days=options['history_days'],
+        )
+        elapsed = time.monotonic() - start
+
+        total = 0
+        for schema_name, counts in results.items():
+            total += sum(counts.values())
+            created = ', '.join(f'{name}={count}' for name, count in counts.items())
+            self.stdout.write(f'{schema_name or "default"}: created {created}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s)'
+        ))
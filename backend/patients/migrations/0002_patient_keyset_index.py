@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='patient',
+            name='patients_last_na_ce6411_idx',
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='patients_last_na_fd6622_idx'),
+        ),
+    ]
@@ -5,9 +5,13 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
 from datetime import date
+from audit.mixins import AuditOutboxMixin
+from monitoring import metrics
+from monitoring.instrumentation import timed_section
+from sync.mixins import SyncTrackedMixin
 
 
-class Patient(models.Model):
+class Patient(SyncTrackedMixin, AuditOutboxMixin, models.Model):
     """
     Patient model containing Protected Health Information (PHI).
 
@@ -269,7 +273,7 @@ class Patient(models.Model):
         verbose_name = 'Patient'
         verbose_name_plural = 'Patients'
         indexes = [
-            models.Index(fields=['last_name', 'first_name']),
+            models.Index(fields=['last_name', 'first_name', 'id']),
             models.Index(fields=['is_active', 'admission_date']),
             models.Index(fields=['medical_record_number']),
         ]
@@ -313,11 +317,22 @@ class Patient(models.Model):
                 'admission_date': 'Admission date cannot be in the future'
             })
 
+    @metrics.instrument_save
+    @timed_section('save')
     def save(self, *args, **kwargs):
         """Override save to run validation"""
-        self.full_clean()
+        with timed_section('full_clean'):
+            self.full_clean()
         super().save(*args, **kwargs)
 
+    def change_event(self, created):
+        """Live event of a save: admissions and discharges"""
+        if created:
+            return 'patient.admitted'
+        # Unknown when discharge_date was not loaded: no event
+        previous = getattr(self, '_audit_snapshot', {}).get('discharge_date', self.discharge_date)
+        return 'patient.discharged' if self.discharge_date and not previous else ''
+
     def get_full_name(self):
         """Return patient's full name"""
         if self.middle_name:
@@ -0,0 +1,162 @@
+"""
+Enforcement of DATA_RETENTION_DAYS for discharged patients.
+
+Patients discharged before the retention cutoff are purged in small batches
+walked in (discharge_date, id) keyset order. Each batch deletes the Katz,
+Barthel and FIM assessments of its patients and then the patients
+themselves (assessments PROTECT their patient, so order matters) inside one
+short transaction, optionally archiving the rows as JSON lines first.
+Schemas are independent, so tenants can be purged in parallel threads, each
+with its own connection.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core import serializers
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from assessments.models import BarthelAssessment, FIMAssessment, KatzADLAssessment
+from organizations.routers import use_replica
+from organizations.utils import get_tenant_schemas, schema_context
+from patients.models import Patient
+
+logger = logging.getLogger(__name__)
+
+ASSESSMENT_MODELS = (KatzADLAssessment, BarthelAssessment, FIMAssessment)
+
+
+def retention_cutoff(retention_days=None, today=None):
+    """Return the date before which discharged patients are past retention"""
+    if retention_days is None:
+        retention_days = settings.DATA_RETENTION_DAYS
+    today = today or timezone.now().date()
+    return today - timedelta(days=retention_days)
+
+
+def expired_patients(cutoff):
+    """Return discharged patients whose discharge date is before `cutoff`"""
+    return Patient.objects.filter(discharge_date__isnull=False, discharge_date__lt=cutoff)
+
+
+def dry_run_report(cutoff):
+    """Count what a purge with `cutoff` would delete, without touching any rows"""
+    summary = expired_patients(cutoff).aggregate(
+        patients=Count('id'),
+        oldest_discharge=Min('discharge_date'),
+        newest_discharge=Max('discharge_date'),
+    )
+    report = {
+        'patients': summary['patients'],
+        'oldest_discharge': summary['oldest_discharge'],
+        'newest_discharge': summary['newest_discharge'],
+        'assessments': {},
+    }
+    for model in ASSESSMENT_MODELS:
+        report['assessments'][model._meta.label] = model.objects.filter(
+            patient__discharge_date__isnull=False,
+            patient__discharge_date__lt=cutoff,
+        ).count()
+    return report
+
+
+class RetentionArchive:
+    """Append-only JSON lines archive of purged rows, one file per schema and run"""
+
+    def __init__(self, directory, schema_name, today=None):
+        today = today or timezone.now().date()
+        self.path = Path(directory) / f'{schema_name or "default"}-{today.isoformat()}.jsonl'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, queryset):
+        """Append every row of `queryset` to the archive"""
+        with self.path.open('a', encoding='utf-8') as archive_file:
+            serializers.serialize('jsonl', queryset.iterator(), stream=archive_file)
+
+
+def purge_batch(cutoff, batch_size, after=None, archive=None):
+    """
+    Purge the next batch of expired patients after keyset `after`.
+
+    Returns (counts, last_key); last_key is None once nothing is left.
+    """
+    queryset = expired_patients(cutoff).order_by('discharge_date', 'id')
+    if after is not None:
+        discharge_date, patient_id = after
+        queryset = queryset.filter(
+            Q(discharge_date__gt=discharge_date) | Q(discharge_date=discharge_date, id__gt=patient_id)
+        )
+
+    counts = {}
+    with transaction.atomic():
+        keys = list(queryset.values_list('discharge_date', 'id')[:batch_size])
+        if not keys:
+            return counts, None
+        patient_ids = [patient_id for _, patient_id in keys]
+
+        for model in ASSESSMENT_MODELS + (Patient,):
+            field = 'id' if model is Patient else 'patient_id'
+            rows = model.objects.filter(**{f'{field}__in': patient_ids})
+            if archive is not None:
+                archive.write(rows)
+            deleted, _ = rows.delete()
+            counts[model._meta.label] = deleted
+
+    return counts, keys[-1]
+
+
+def purge_schema(cutoff, batch_size=None, archive_dir=None, pause=0, schema_name=None):
+    """Purge every expired patient of the current schema; return total deleted rows per model"""
+    batch_size = batch_size or settings.DATA_RETENTION_BATCH_SIZE
+    archive = RetentionArchive(archive_dir, schema_name) if archive_dir else None
+
+    totals = {model._meta.label: 0 for model in ASSESSMENT_MODELS + (Patient,)}
+    after = None
+    while True:
+        counts, after = purge_batch(cutoff, batch_size, after=after, archive=archive)
+        if after is None:
+            break
+        for label, deleted in counts.items():
+            totals[label] += deleted
+        if pause:
+            time.sleep(pause)
+
+    logger.info('Retention purge of %s (cutoff %s): %s', schema_name or 'default schema', cutoff, totals)
+    return totals
+
+
+def _run_for_schema(schema_name, cutoff, dry_run, in_worker_thread, options):
+    try:
+        with schema_context(schema_name):
+            if dry_run:
+                with use_replica('report'):
+                    return schema_name, dry_run_report(cutoff)
+            return schema_name, purge_schema(cutoff, schema_name=schema_name, **options)
+    finally:
+        if in_worker_thread:
+            connections.close_all()  # Each worker thread opened its own connections
+
+
+def enforce_retention(cutoff, schema_names=None, dry_run=False, workers=1, **options):
+    """
+    Enforce retention across tenant schemas; return {schema_name: report}.
+
+    With workers > 1 schemas are processed concurrently, one connection per
+    worker thread. Batches stay small either way, so no single transaction
+    holds locks for long. `options` are passed to purge_schema().
+    """
+    schemas = get_tenant_schemas(schema_names)
+    if workers <= 1 or len(schemas) <= 1:
+        return dict(_run_for_schema(schema, cutoff, dry_run, False, options) for schema in schemas)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='retention') as executor:
+        futures = [
+            executor.submit(_run_for_schema, schema, cutoff, dry_run, True, options)
+            for schema in schemas
+        ]
+        return dict(future.result() for future in futures)
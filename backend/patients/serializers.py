@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from api.fieldsets import ALL, SparseFieldsSerializerMixin
+from patients.models import Patient
+
+# Identification and admission status: what a patient list row shows
+LIST_FIELDS = (
+    'id', 'medical_record_number', 'full_name', 'first_name', 'last_name', 'date_of_birth', 'age', 'gender',
+    'primary_diagnosis', 'admission_date', 'discharge_date', 'is_active', 'updated_at',
+)
+
+# The list fields plus the clinical context of a chart; no contact, insurance or audit fields
+CHART_FIELDS = LIST_FIELDS + (
+    'middle_name', 'length_of_stay', 'icd10_codes', 'secondary_diagnoses', 'comorbidities',
+    'discharge_disposition', 'referring_physician', 'primary_care_physician', 'advance_directives',
+    'allergies', 'medications', 'precautions',
+)
+
+
+class PatientSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Full patient record (PHI) with derived age and length of stay"""
+
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+    age = serializers.IntegerField(source='get_age', read_only=True)
+    length_of_stay = serializers.IntegerField(source='get_length_of_stay', read_only=True)
+
+    class Meta:
+        model = Patient
+        fields = '__all__'
+        read_only_fields = ('created_at', 'updated_at', 'created_by', 'updated_by')
+        profiles = {'list': LIST_FIELDS, 'chart': CHART_FIELDS, 'full': ALL}
+        sources = {
+            'full_name': ('first_name', 'middle_name', 'last_name'),
+            'age': ('date_of_birth',),
+            'length_of_stay': ('admission_date', 'discharge_date'),
+        }
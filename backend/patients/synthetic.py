@@ -0,0 +1,360 @@
+"""
+Synthetic, clinically plausible tenant data for load and performance testing.
+
+Each patient gets a diagnosis-dependent length of stay, a valid admission /
+discharge ordering and a longitudinal trajectory on one instrument (Katz,
+Barthel or FIM): a latent independence level that recovers along a
+saturating curve from an admission baseline towards a ceiling, mapped onto
+each item with a per-item difficulty and a little visit-to-visit noise.
+
+Rows are generated column-wise in batches and loaded with COPY on
+PostgreSQL (bulk_create elsewhere). They never go through save(), so there
+is no full_clean() and no audit outbox entry per row (sync changes are
+logged in bulk); this is test data only and must never be loaded into a
+tenant holding real PHI.
+"""
+import io
+import json
+import logging
+import math
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import JSONField
+from django.utils import timezone
+
+from assessments.models import BarthelAssessment, FIMAssessment, KatzADLAssessment
+from organizations.utils import get_tenant_schemas, schema_context
+from patients.models import Patient
+from sync.changes import record_saves
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+MRN_PREFIX = 'SYN'
+CLINICIAN_PREFIX = 'synthetic_ot'
+
+# (diagnosis, ICD-10, weight, mean length of stay in days,
+#  independence at admission, independence the patient recovers towards)
+DIAGNOSES = (
+    ('Ischemic stroke', 'I63.9', 30, 24, 0.30, 0.75),
+    ('Hip fracture', 'S72.001A', 25, 16, 0.40, 0.85),
+    ('Traumatic brain injury', 'S06.9X0A', 10, 30, 0.25, 0.70),
+    ('Spinal cord injury', 'S14.109A', 5, 45, 0.15, 0.50),
+    ('Total knee arthroplasty', 'Z96.651', 15, 7, 0.60, 0.95),
+    ('Debility', 'R53.81', 15, 12, 0.45, 0.85),
+)
+DIAGNOSIS_WEIGHTS = [diagnosis[2] for diagnosis in DIAGNOSES]
+
+COMORBIDITIES = ('Hypertension', 'Diabetes mellitus type 2', 'COPD', 'Atrial fibrillation',
+                 'CHF', 'CKD stage 3', 'Osteoarthritis', 'Depression')
+MEDICATIONS = ('Aspirin', 'Atorvastatin', 'Metoprolol', 'Lisinopril', 'Metformin',
+               'Apixaban', 'Omeprazole', 'Sertraline', 'Acetaminophen')
+FIRST_NAMES = ('Mary', 'James', 'Patricia', 'Robert', 'Linda', 'Michael', 'Barbara', 'William',
+               'Elizabeth', 'David', 'Susan', 'Richard', 'Maria', 'Jose', 'Wei', 'Aisha')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Nguyen', 'Chen', 'Patel', 'Kim', 'Okafor', 'Cohen')
+GENDERS = (Patient.MALE, Patient.FEMALE, Patient.OTHER, Patient.PREFER_NOT_TO_SAY)
+GENDER_WEIGHTS = (47, 50, 1, 2)
+
+# Item -> difficulty; harder items lag the patient's overall independence
+KATZ_ITEMS = {
+    'feeding': -0.2, 'continence': -0.05, 'transferring': 0.05,
+    'toileting': 0.05, 'dressing': 0.1, 'bathing': 0.2,
+}
+BARTHEL_ITEMS = {
+    'feeding': -0.2, 'bowels': -0.1, 'bladder': -0.05, 'grooming': -0.05, 'toilet_use': 0.05,
+    'transfers': 0.0, 'mobility': 0.05, 'dressing': 0.1, 'bathing': 0.2, 'stairs': 0.25,
+}
+FIM_ITEMS = {
+    'eating': -0.2, 'grooming': -0.1, 'bathing': 0.15, 'dressing_upper': 0.0,
+    'dressing_lower': 0.1, 'toileting': 0.05, 'bladder_management': -0.05,
+    'bowel_management': -0.05, 'transfer_bed_chair': 0.0, 'transfer_toilet': 0.05,
+    'transfer_tub_shower': 0.15, 'locomotion_walk_wheelchair': 0.1, 'locomotion_stairs': 0.25,
+    'comprehension': -0.15, 'expression': -0.15, 'social_interaction': -0.2,
+    'problem_solving': -0.05, 'memory': -0.1,
+}
+INSTRUMENT_ITEMS = {
+    KatzADLAssessment: KATZ_ITEMS,
+    BarthelAssessment: BARTHEL_ITEMS,
+    FIMAssessment: FIM_ITEMS,
+}
+INSTRUMENTS = tuple(INSTRUMENT_ITEMS)
+INSTRUMENT_WEIGHTS = (25, 35, 40)
+
+
+def _clip(value, low=0.0, high=1.0):
+    return low if value < low else high if value > high else value
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _barthel_levels():
+    return {
+        name: sorted(value for value, _ in BarthelAssessment._meta.get_field(name).choices)
+        for name in BARTHEL_ITEMS
+    }
+
+
+# =============================================================================
+# GENERATION
+# =============================================================================
+
+def patient_profiles(rng, count, today, history_days=3 * 365):
+    """
+    Draw `count` admission profiles: diagnosis, dates and recovery curve.
+
+    Categorical columns are drawn in one call per batch; admission dates are
+    spread over the last `history_days`, and patients whose stay has not
+    ended by `today` are still inpatients (no discharge date).
+    """
+    diagnoses = rng.choices(DIAGNOSES, weights=DIAGNOSIS_WEIGHTS, k=count)
+    instruments = rng.choices(INSTRUMENTS, weights=INSTRUMENT_WEIGHTS, k=count)
+    profiles = []
+    for diagnosis, instrument in zip(diagnoses, instruments):
+        name, icd10, _, mean_stay, baseline, ceiling = diagnosis
+        length_of_stay = max(2, round(rng.gammavariate(4, mean_stay / 4)))
+        admission = today - timedelta(days=rng.randint(0, history_days))
+        discharge = admission + timedelta(days=length_of_stay)
+        baseline = _clip(rng.gauss(baseline, 0.12), 0.0, 0.9)
+        profiles.append({
+            'diagnosis': name,
+            'icd10': icd10,
+            'instrument': instrument,
+            'admission_date': admission,
+            'discharge_date': discharge if discharge <= today else None,
+            'length_of_stay': length_of_stay,
+            'baseline': baseline,
+            'ceiling': _clip(rng.gauss(ceiling, 0.12), baseline, 1.0),
+            'tau': max(length_of_stay / 3, 1.0),
+            'age': _clip(round(rng.gauss(72, 13)), 18, 100),
+        })
+    return profiles
+
+
+def _disposition(rng, independence):
+    if rng.random() < 0.01:
+        return Patient.DECEASED
+    if independence >= 0.7:
+        return Patient.HOME
+    return rng.choices((Patient.REHAB, Patient.SNF, Patient.LTACH, Patient.HOME), weights=(40, 40, 10, 10))[0]
+
+
+def patient_row(rng, index, profile, created_by_id, now):
+    """Return {attname: value} for one Patient"""
+    admission = profile['admission_date']
+    date_of_birth = admission - timedelta(days=profile['age'] * 365 + rng.randint(0, 364))
+    discharged = profile['discharge_date'] is not None
+    return {
+        'id': _uuid(rng),
+        'medical_record_number': f'{MRN_PREFIX}{index:09d}',
+        'first_name': rng.choice(FIRST_NAMES),
+        'last_name': rng.choice(LAST_NAMES),
+        'date_of_birth': date_of_birth,
+        'gender': rng.choices(GENDERS, weights=GENDER_WEIGHTS)[0],
+        'primary_diagnosis': profile['diagnosis'],
+        'icd10_codes': [profile['icd10']],
+        'comorbidities': rng.sample(COMORBIDITIES, rng.randint(0, 4)),
+        'medications': rng.sample(MEDICATIONS, rng.randint(0, 7)),
+        'admission_date': admission,
+        'discharge_date': profile['discharge_date'],
+        'discharge_disposition': _disposition(rng, profile['ceiling']) if discharged else '',
+        'precautions': [Patient.PRECAUTION_FALL_RISK] if profile['baseline'] < 0.4 else [],
+        'is_active': not discharged,
+        'consent_for_data_use': rng.random() < 0.4,
+        'created_by_id': created_by_id,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def _visit_days(rng, profile, visits, today):
+    """Days after admission of each assessment, from admission to discharge (or today)"""
+    end = profile['discharge_date'] or today
+    span = (end - profile['admission_date']).days
+    count = min(rng.randint(*visits), span + 1)
+    if count <= 1:
+        return [0]
+    step = span / (count - 1)
+    return sorted({min(span, max(0, round(i * step + rng.uniform(-step / 4, step / 4)))) for i in range(count)})
+
+
+def _item_scores(rng, model, items, independence, barthel_levels):
+    scores = {}
+    for name, difficulty in items.items():
+        level = _clip(independence - difficulty + rng.gauss(0, 0.05))
+        if model is KatzADLAssessment:
+            scores[name] = 1 if level >= 0.5 else 0
+        elif model is BarthelAssessment:
+            levels = barthel_levels[name]
+            scores[name] = levels[min(len(levels) - 1, int(level * len(levels)))]
+        else:
+            scores[name] = 1 + round(level * 6)
+    return scores
+
+
+def assessment_rows(rng, patient_id, profile, assessor_ids, visits, today, now, barthel_levels):
+    """Return (model, [rows]) for one patient's trajectory on their instrument"""
+    model = profile['instrument']
+    items = INSTRUMENT_ITEMS[model]
+    assessor_id = rng.choice(assessor_ids)  # Patients mostly keep their therapist
+    rows = []
+    for number, day in enumerate(_visit_days(rng, profile, visits, today)):
+        recovery = 1 - math.exp(-day / profile['tau'])
+        independence = profile['baseline'] + (profile['ceiling'] - profile['baseline']) * recovery
+        scores = _item_scores(rng, model, items, independence + rng.gauss(0, 0.03), barthel_levels)
+        rows.append({
+            'id': _uuid(rng),
+            'patient_id': patient_id,
+            'assessed_by_id': assessor_id if rng.random() < 0.8 else rng.choice(assessor_ids),
+            'assessment_date': profile['admission_date'] + timedelta(days=day),
+            'total_score': sum(scores.values()),
+            'is_baseline': number == 0,
+            'created_at': now,
+            'updated_at': now,
+            **scores,
+        })
+    return model, rows
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def _copy_value(field, value):
+    if value is None:
+        return '\\N'
+    if isinstance(field, JSONField):
+        value = json.dumps(value)
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(model, rows):
+    """Load rows with COPY ... FROM STDIN; fields missing from a row get their default"""
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(
+            _copy_value(field, row[field.attname] if field.attname in row else field.get_default())
+            for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+
+
+def insert_rows(model, rows):
+    if not rows:
+        return
+    if connection.vendor == 'postgresql':
+        copy_rows(model, rows)
+    else:
+        model.objects.bulk_create([model(**row) for row in rows], batch_size=1000)
+    record_saves(model, [row['id'] for row in rows])
+
+
+def ensure_clinicians(count, now):
+    """Return the ids of `count` synthetic OT users, creating any that are missing"""
+    existing = list(
+        User.objects.filter(username__startswith=CLINICIAN_PREFIX).order_by('username').values_list('id', flat=True)
+    )
+    missing = count - len(existing)
+    if missing > 0:
+        password = make_password(None)  # Unusable; these accounts never log in
+        users = [
+            User(
+                email=f'{CLINICIAN_PREFIX}{number}@example.com',
+                username=f'{CLINICIAN_PREFIX}{number}',
+                password=password,
+                first_name='Synthetic',
+                last_name=f'Therapist {number}',
+                role=User.OT,
+                license_number=f'OT-SYN-{number}',
+                license_expiry_date=now.date() + timedelta(days=365),
+                password_last_changed=now,
+            )
+            for number in range(len(existing), count)
+        ]
+        User.objects.bulk_create(users)
+        existing.extend(user.id for user in users)
+    return existing[:count]
+
+
+def generate_schema(patients, visits=(3, 8), clinicians=20, batch_size=5000, seed=None,
+                    history_days=3 * 365, clinician_ids=None, schema_name=None):
+    """
+    Generate `patients` patients with their assessment trajectories in the current schema.
+
+    Each batch of patients and assessments is loaded in its own transaction.
+    Returns {'patients': n, model label: n, ...}.
+    """
+    rng = random.Random(f'{seed}:{schema_name}') if seed is not None else random.Random()
+    now = timezone.now()
+    today = timezone.localdate()
+    barthel_levels = _barthel_levels()
+    clinician_ids = clinician_ids or ensure_clinicians(clinicians, now)
+    first_index = Patient.objects.filter(medical_record_number__startswith=MRN_PREFIX).count()
+
+    counts = {Patient._meta.label: 0, **{model._meta.label: 0 for model in INSTRUMENTS}}
+    for start in range(0, patients, batch_size):
+        size = min(batch_size, patients - start)
+        patient_batch = []
+        assessment_batches = {model: [] for model in INSTRUMENTS}
+        for offset, profile in enumerate(patient_profiles(rng, size, today, history_days)):
+            row = patient_row(rng, first_index + start + offset, profile, rng.choice(clinician_ids), now)
+            patient_batch.append(row)
+            model, rows = assessment_rows(rng, row['id'], profile, clinician_ids, visits, today, now, barthel_levels)
+            assessment_batches[model].extend(rows)
+
+        with transaction.atomic():
+            insert_rows(Patient, patient_batch)
+            for model, rows in assessment_batches.items():
+                insert_rows(model, rows)
+
+        counts[Patient._meta.label] += len(patient_batch)
+        for model, rows in assessment_batches.items():
+            counts[model._meta.label] += len(rows)
+        logger.info('Synthetic data for %s: %s', schema_name or 'default schema', counts)
+
+    return counts
+
+
+def _run_for_schema(schema_name, in_worker_thread, options):
+    try:
+        with schema_context(schema_name):
+            return schema_name, generate_schema(schema_name=schema_name, **options)
+    finally:
+        if in_worker_thread:
+            connection.close()  # Each worker thread opened its own connection
+
+
+def generate(schema_names=None, workers=1, **options):
+    """
+    Generate synthetic data in each tenant schema; return {schema_name: counts}.
+
+    With workers > 1 schemas are filled concurrently, one connection per
+    worker thread. `options` are passed to generate_schema().
+    """
+    schemas = get_tenant_schemas(schema_names)
+    if workers <= 1 or len(schemas) <= 1:
+        return dict(_run_for_schema(schema, False, options) for schema in schemas)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='synthetic') as executor:
+        futures = [executor.submit(_run_for_schema, schema, True, options) for schema in schemas]
+        return dict(future.result() for future in futures)
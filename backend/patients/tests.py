@@ -1,7 +1,20 @@
+import json
 import pytest
+import random
 from datetime import date, timedelta
+from io import StringIO
 from django.core.exceptions import ValidationError
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from assessments.models import BarthelAssessment, FIMAssessment, KatzADLAssessment
+from audit import access
+from monitoring import metrics
+from patients import retention, synthetic
 from patients.models import Patient
+from patients.serializers import LIST_FIELDS
 from users.models import User
 
 
@@ -620,3 +633,584 @@ class TestPatientModel:
         assert patient.emergency_contact == {}
         assert patient.insurance_info == {}
         assert patient.advance_directives == {}
+
+
+# =============================================================================
+# DATA RETENTION TESTS
+# =============================================================================
+
+def make_discharged_patient(user, mrn, discharge_date):
+    """Create a patient discharged on `discharge_date` with one Katz assessment"""
+    patient = Patient.objects.create(
+        medical_record_number=mrn,
+        first_name='Retained',
+        last_name=mrn,
+        date_of_birth=date(1940, 1, 1),
+        gender=Patient.FEMALE,
+        primary_diagnosis='Stroke',
+        admission_date=discharge_date - timedelta(days=14),
+        discharge_date=discharge_date,
+        discharge_disposition=Patient.HOME,
+        created_by=user
+    )
+    KatzADLAssessment.objects.create(
+        patient=patient,
+        assessed_by=user,
+        assessment_date=discharge_date,
+        bathing=1, dressing=1, toileting=1,
+        transferring=1, continence=1, feeding=1
+    )
+    return patient
+
+
+@pytest.mark.django_db
+class TestDataRetention:
+    """Test enforcement of DATA_RETENTION_DAYS"""
+
+    @pytest.fixture
+    def cutoff(self):
+        return retention.retention_cutoff(retention_days=365 * 7)
+
+    @pytest.fixture
+    def patients(self, test_user, cutoff):
+        """Two patients past retention, one discharged recently, one still admitted"""
+        return {
+            'expired_1': make_discharged_patient(test_user, 'RET001', cutoff - timedelta(days=30)),
+            'expired_2': make_discharged_patient(test_user, 'RET002', cutoff - timedelta(days=1)),
+            'recent': make_discharged_patient(test_user, 'RET003', cutoff + timedelta(days=1)),
+            'admitted': Patient.objects.create(
+                medical_record_number='RET004',
+                first_name='Still',
+                last_name='Admitted',
+                date_of_birth=date(1940, 1, 1),
+                gender=Patient.MALE,
+                primary_diagnosis='Stroke',
+                admission_date=date(2000, 1, 1),
+                created_by=test_user
+            ),
+        }
+
+    def test_dry_run_report_counts_without_deleting(self, patients, cutoff):
+        """Test the dry run reports expired rows and leaves them in place"""
+        report = retention.dry_run_report(cutoff)
+
+        assert report['patients'] == 2
+        assert report['assessments']['assessments.KatzADLAssessment'] == 2
+        assert report['oldest_discharge'] == cutoff - timedelta(days=30)
+        assert Patient.objects.count() == 4
+
+    def test_purge_deletes_assessments_then_patients(self, patients, cutoff):
+        """Test expired patients and their protected assessments are removed"""
+        totals = retention.purge_schema(cutoff, batch_size=1)
+
+        assert totals['patients.Patient'] == 2
+        assert totals['assessments.KatzADLAssessment'] == 2
+        assert set(Patient.objects.values_list('medical_record_number', flat=True)) == {'RET003', 'RET004'}
+        assert KatzADLAssessment.objects.filter(patient=patients['recent']).exists()
+
+    def test_purge_batch_walks_keyset_order(self, patients, cutoff):
+        """Test batches advance in (discharge_date, id) order"""
+        counts, last_key = retention.purge_batch(cutoff, batch_size=1)
+
+        assert counts['patients.Patient'] == 1
+        assert last_key == (patients['expired_1'].discharge_date, patients['expired_1'].id)
+        assert Patient.objects.filter(pk=patients['expired_2'].pk).exists()
+
+    def test_purge_archives_rows_before_delete(self, patients, cutoff, tmp_path):
+        """Test archived JSON lines contain every purged row"""
+        retention.purge_schema(cutoff, archive_dir=tmp_path)
+
+        lines = next(tmp_path.glob('*.jsonl')).read_text().splitlines()
+        models = sorted(json.loads(line)['model'] for line in lines)
+        assert models == ['assessments.katzadlassessment'] * 2 + ['patients.patient'] * 2
+
+    def test_command_dry_run(self, patients):
+        """Test the management command reports per tenant in dry-run mode"""
+        out = StringIO()
+        call_command('enforce_data_retention', '--dry-run', '--retention-days', str(365 * 7), stdout=out)
+
+        assert 'would purge 2 patients' in out.getvalue()
+        assert Patient.objects.count() == 4
+
+    def test_command_purges(self, patients):
+        """Test the management command deletes expired patients"""
+        call_command('enforce_data_retention', '--retention-days', str(365 * 7), stdout=StringIO())
+
+        assert Patient.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestSyntheticData:
+    """Test the synthetic tenant data generator"""
+
+    @pytest.fixture
+    def counts(self):
+        return synthetic.generate_schema(50, visits=(2, 6), clinicians=3, batch_size=20, seed=7)
+
+    def test_counts(self, counts):
+        """Test patients and assessments are created in the requested volumes"""
+        assessments = sum(count for label, count in counts.items() if label != 'patients.Patient')
+
+        assert counts['patients.Patient'] == Patient.objects.count() == 50
+        assert 50 <= assessments <= 300
+        assert User.objects.filter(username__startswith=synthetic.CLINICIAN_PREFIX).count() == 3
+
+    def test_rows_pass_model_validation(self, counts):
+        """Test generated rows are valid even though they bypass full_clean()"""
+        for patient in Patient.objects.all():
+            patient.full_clean()
+        for model in synthetic.INSTRUMENTS:
+            for assessment in model.objects.all():
+                assessment.full_clean()
+                assert assessment.total_score == assessment.calculate_total_score()
+
+    def test_trajectories_follow_the_stay(self, counts):
+        """Test assessments fall within the stay and start with a baseline"""
+        for model in synthetic.INSTRUMENTS:
+            for patient_id in model.objects.values_list('patient_id', flat=True).distinct():
+                patient = Patient.objects.get(pk=patient_id)
+                assessments = list(model.objects.filter(patient=patient).order_by('assessment_date'))
+                end = patient.discharge_date or date.today()
+                assert assessments[0].is_baseline
+                assert sum(a.is_baseline for a in assessments) == 1
+                assert all(patient.admission_date <= a.assessment_date <= end for a in assessments)
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed produces the same profiles"""
+        today = date(2026, 1, 1)
+        first = synthetic.patient_profiles(random.Random(1), 10, today)
+        second = synthetic.patient_profiles(random.Random(1), 10, today)
+
+        assert first == second
+
+    def test_rerun_continues_numbering(self, counts):
+        """Test a second run adds patients instead of colliding on MRN"""
+        synthetic.generate_schema(10, visits=(1, 1), clinicians=3, seed=8)
+
+        assert Patient.objects.count() == 60
+
+    def test_command(self):
+        """Test the management command reports created rows"""
+        out = StringIO()
+        call_command('generate_synthetic_data', '--patients', '5', '--clinicians', '1', '--seed', '1', stdout=out)
+
+        assert 'patients.Patient=5' in out.getvalue()
+
+
+# =============================================================================
+# READ API TESTS
+# =============================================================================
+
+@pytest.fixture
+def chart_patient(test_user):
+    """A patient with two Katz assessments and one Barthel and FIM assessment"""
+    patient = Patient.objects.create(
+        medical_record_number='API001',
+        first_name='Chart',
+        last_name='Patient',
+        date_of_birth=date(1950, 1, 1),
+        gender=Patient.FEMALE,
+        primary_diagnosis='Hip fracture',
+        admission_date=date.today() - timedelta(days=10),
+        created_by=test_user
+    )
+    common = {'patient': patient, 'assessed_by': test_user}
+    KatzADLAssessment.objects.create(
+        assessment_date=date.today() - timedelta(days=9), is_baseline=True,
+        **common, **dict.fromkeys(synthetic.KATZ_ITEMS, 0)
+    )
+    KatzADLAssessment.objects.create(
+        assessment_date=date.today() - timedelta(days=1), **common, **dict.fromkeys(synthetic.KATZ_ITEMS, 1)
+    )
+    BarthelAssessment.objects.create(
+        assessment_date=date.today() - timedelta(days=5), **common, **dict.fromkeys(synthetic.BARTHEL_ITEMS, 5)
+    )
+    FIMAssessment.objects.create(
+        assessment_date=date.today() - timedelta(days=3), **common, **dict.fromkeys(synthetic.FIM_ITEMS, 4)
+    )
+    return patient
+
+
+@pytest.fixture
+def api_client(test_user):
+    client = APIClient(HTTP_X_PHI_ACCESS_REASON='treatment')
+    client.force_authenticate(test_user)
+    return client
+
+
+@pytest.fixture
+def access_buffer(monkeypatch):
+    buffer = access.AccessLogBuffer(max_size=100, flush_interval=0)
+    monkeypatch.setattr(access, 'access_log_buffer', buffer)
+    return buffer
+
+
+@pytest.mark.django_db
+class TestPatientReadEndpoints:
+    """Test the async patient detail, chart and timeline endpoints"""
+
+    def test_detail(self, api_client, chart_patient, access_buffer):
+        """Test the detail returns the record and records the PHI access"""
+        response = api_client.get(f'/api/patients/{chart_patient.pk}/')
+
+        assert response.status_code == 200
+        assert response.data['medical_record_number'] == 'API001'
+        assert response.data['age'] == chart_patient.get_age()
+        assert len(access_buffer) == 1
+
+    def test_chart_has_latest_assessment_per_instrument(self, api_client, chart_patient, access_buffer):
+        """Test the chart combines the patient with each instrument's latest assessment"""
+        response = api_client.get(f'/api/patients/{chart_patient.pk}/chart/')
+
+        assessments = response.data['assessments']
+        assert response.status_code == 200
+        assert response.data['patient']['id'] == str(chart_patient.pk)
+        assert assessments['katz']['count'] == 2
+        assert assessments['katz']['latest']['total_score'] == 6
+        assert assessments['barthel']['latest']['instrument'] == 'barthel'
+        assert assessments['fim']['latest']['motor_score'] == 52
+        assert len(access_buffer) == 1
+
+    def test_timeline_is_chronological_across_instruments(self, api_client, chart_patient, access_buffer):
+        """Test the timeline merges all instruments oldest first"""
+        response = api_client.get(f'/api/patients/{chart_patient.pk}/timeline/')
+
+        instruments = [assessment['instrument'] for assessment in response.data['assessments']]
+        assert instruments == ['katz', 'barthel', 'fim', 'katz']
+        assert response.data['assessments'][0]['interpretation'].startswith('Very severely dependent')
+
+    @pytest.mark.parametrize('suffix', ['', 'chart/', 'timeline/'])
+    def test_unknown_patient_is_404(self, api_client, suffix, access_buffer):
+        """Test a missing patient is a 404 and is not recorded as accessed"""
+        response = api_client.get(f'/api/patients/00000000-0000-0000-0000-000000000000/{suffix}')
+
+        assert response.status_code == 404
+        assert len(access_buffer) == 0
+
+    def test_requires_access_reason(self, test_user, chart_patient, access_buffer):
+        """Test PHI is not returned without an access reason"""
+        client = APIClient()
+        client.force_authenticate(test_user)
+
+        response = client.get(f'/api/patients/{chart_patient.pk}/chart/')
+
+        assert response.status_code == 403
+        assert len(access_buffer) == 0
+
+    def test_requires_authentication(self, chart_patient):
+        """Test anonymous requests are rejected before any PHI is read"""
+        response = APIClient().get(f'/api/patients/{chart_patient.pk}/chart/')
+
+        assert response.status_code == 401
+
+    def test_served_through_asgi(self, test_user, chart_patient, access_buffer):
+        """Test the endpoint and the middleware stack run natively under ASGI"""
+        client = AsyncClient()
+        client.force_login(test_user)
+
+        response = async_to_sync(client.get)(
+            f'/api/patients/{chart_patient.pk}/timeline/', headers={'X-PHI-Access-Reason': 'treatment'}
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()['assessments']) == 4
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    """Test ETag / Last-Modified revalidation of patient resources"""
+
+    def revalidate(self, api_client, url, response):
+        return api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_detail_validators(self, api_client, chart_patient, access_buffer):
+        """Test the detail sends an ETag, Last-Modified and a private revalidate policy"""
+        response = api_client.get(f'/api/patients/{chart_patient.pk}/')
+
+        assert response['ETag'].startswith('W/"')
+        assert response['Last-Modified']
+        assert 'private' in response['Cache-Control']
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_unchanged_detail_is_304_from_one_small_query(
+            self, api_client, chart_patient, access_buffer, django_assert_num_queries):
+        """Test a matching If-None-Match is answered from updated_at alone, without recording access"""
+        url = f'/api/patients/{chart_patient.pk}/'
+        first = api_client.get(url)
+
+        with django_assert_num_queries(1) as captured:
+            response = self.revalidate(api_client, url, first)
+
+        assert response.status_code == 304
+        assert response['ETag'] == first['ETag']
+        assert not response.content
+        assert 'medications' not in captured.captured_queries[0]['sql']
+        assert len(access_buffer) == 1
+
+    def test_changed_detail_is_200(self, api_client, chart_patient, access_buffer):
+        """Test an update changes the ETag and returns the new record"""
+        url = f'/api/patients/{chart_patient.pk}/'
+        first = api_client.get(url)
+        chart_patient.precautions = 'Fall risk'
+        chart_patient.save()
+
+        response = self.revalidate(api_client, url, first)
+
+        assert response.status_code == 200
+        assert response['ETag'] != first['ETag']
+        assert response.data['precautions'] == 'Fall risk'
+
+    def test_revalidations_counted_as_cache_hits_and_misses(self, api_client, chart_patient, access_buffer):
+        """Test 304s count as hits of the client's cache and re-sent bodies as misses"""
+        url = f'/api/patients/{chart_patient.pk}/'
+        first = api_client.get(url)
+        hits = metrics.cache_requests.value(cache='api', result='hit')
+        misses = metrics.cache_requests.value(cache='api', result='miss')
+
+        self.revalidate(api_client, url, first)
+        chart_patient.precautions = 'Fall risk'
+        chart_patient.save()
+        self.revalidate(api_client, url, first)
+
+        assert metrics.cache_requests.value(cache='api', result='hit') == hits + 1
+        assert metrics.cache_requests.value(cache='api', result='miss') == misses + 1
+
+    def test_if_modified_since(self, api_client, chart_patient, access_buffer):
+        """Test Last-Modified revalidation for clients without ETag support"""
+        url = f'/api/patients/{chart_patient.pk}/'
+        first = api_client.get(url)
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+
+        assert response.status_code == 304
+
+    @pytest.mark.parametrize('suffix', ['chart/', 'timeline/'])
+    def test_chart_and_timeline_revalidate(self, api_client, chart_patient, suffix, access_buffer):
+        """Test the ETag of a plain GET matches the version a revalidation computes"""
+        url = f'/api/patients/{chart_patient.pk}/{suffix}'
+        first = api_client.get(url)
+
+        assert self.revalidate(api_client, url, first).status_code == 304
+
+    @pytest.mark.parametrize('suffix', ['chart/', 'timeline/'])
+    def test_deleted_assessment_changes_etag(self, api_client, chart_patient, suffix, access_buffer):
+        """Test removing an assessment invalidates the chart and timeline"""
+        url = f'/api/patients/{chart_patient.pk}/{suffix}'
+        first = api_client.get(url)
+        KatzADLAssessment.objects.filter(patient=chart_patient).order_by('assessment_date').first().delete()
+
+        response = self.revalidate(api_client, url, first)
+
+        assert response.status_code == 200
+        assert response['ETag'] != first['ETag']
+
+    def test_unknown_patient_revalidation_is_404(self, api_client, access_buffer):
+        """Test a revalidation of a missing patient is still a 404"""
+        response = api_client.get(
+            '/api/patients/00000000-0000-0000-0000-000000000000/chart/', HTTP_IF_NONE_MATCH='W/"stale"'
+        )
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestPatientList:
+    """Test the paginated patient list"""
+
+    def test_list_in_name_order_records_access(self, api_client, chart_patient, test_user, access_buffer):
+        """Test patients are listed by name and each listed patient's access is recorded"""
+        Patient.objects.create(
+            medical_record_number='API002', first_name='Ann', last_name='Adams', date_of_birth=date(1960, 5, 5),
+            gender=Patient.FEMALE, primary_diagnosis='Stroke', admission_date=date.today(), created_by=test_user,
+        )
+
+        response = api_client.get('/api/patients/')
+
+        assert response.status_code == 200
+        assert [patient['last_name'] for patient in response.data['results']] == ['Adams', 'Patient']
+        assert len(access_buffer) == 2
+
+    def test_search_by_name_or_mrn(self, api_client, chart_patient, test_user, access_buffer):
+        """Test ?search= narrows the list to matching names and record numbers"""
+        Patient.objects.create(
+            medical_record_number='API005', first_name='Ann', last_name='Adams', date_of_birth=date(1960, 5, 5),
+            gender=Patient.FEMALE, primary_diagnosis='Stroke', admission_date=date.today(), created_by=test_user,
+        )
+
+        by_name = api_client.get('/api/patients/?search=adam')
+        by_mrn = api_client.get('/api/patients/?search=API005')
+
+        assert [patient['last_name'] for patient in by_name.data['results']] == ['Adams']
+        assert [patient['last_name'] for patient in by_mrn.data['results']] == ['Adams']
+        assert len(access_buffer) == 2
+
+    def test_ordering_parameter_is_ignored(self, api_client, chart_patient, access_buffer):
+        """Test ?ordering= cannot replace the keyset order"""
+        response = api_client.get('/api/patients/?ordering=first_name')
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 1
+
+    def test_collection_version(self, api_client, chart_patient, test_user, access_buffer):
+        """Test the list revalidates until a patient is added"""
+        first = api_client.get('/api/patients/')
+
+        assert api_client.get('/api/patients/', HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+
+        Patient.objects.create(
+            medical_record_number='API003', first_name='Bo', last_name='Berg', date_of_birth=date(1945, 3, 3),
+            gender=Patient.MALE, primary_diagnosis='COPD', admission_date=date.today(), created_by=test_user,
+        )
+        response = api_client.get('/api/patients/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+
+    def test_pages_have_their_own_etag(self, api_client, chart_patient, access_buffer):
+        """Test the query string is part of the ETag"""
+        first = api_client.get('/api/patients/')
+        second = api_client.get('/api/patients/?page_size=1')
+
+        assert first['ETag'] != second['ETag']
+
+    def test_cursor_pages(self, api_client, chart_patient, test_user, access_buffer):
+        """Test the list pages by cursor and a later page revalidates on its own"""
+        Patient.objects.create(
+            medical_record_number='API004', first_name='Cy', last_name='Zane', date_of_birth=date(1950, 4, 4),
+            gender=Patient.MALE, primary_diagnosis='Hip fracture', admission_date=date.today(), created_by=test_user,
+        )
+        first = api_client.get('/api/patients/?page_size=1')
+        second = api_client.get(first.data['next'])
+
+        assert 'count' not in first.data
+        assert [patient['last_name'] for patient in second.data['results']] == ['Zane']
+        assert second.data['next'] is None
+        assert api_client.get(first.data['next'], HTTP_IF_NONE_MATCH=second['ETag']).status_code == 304
+
+        zane = Patient.objects.get(last_name='Zane')
+        zane.precautions = 'Fall risk'
+        zane.save()
+        assert api_client.get(first.data['next'], HTTP_IF_NONE_MATCH=second['ETag']).status_code == 200
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """Test ?profile= and ?fields= trim both the response and the columns loaded"""
+
+    def test_list_defaults_to_list_profile(self, api_client, chart_patient, access_buffer, django_assert_num_queries):
+        """Test the list sends and loads only the list fields"""
+        with django_assert_num_queries(1) as captured:
+            response = api_client.get('/api/patients/')
+
+        assert set(response.data['results'][0]) == set(LIST_FIELDS)
+        assert 'insurance_info' not in captured.captured_queries[0]['sql']
+        assert 'medications' not in captured.captured_queries[0]['sql']
+
+    def test_list_payload_shrinks(self, api_client, chart_patient, access_buffer):
+        """Test the list profile is a fraction of the full record"""
+        chart_patient.medications = [{'name': f'Drug {n}', 'dose': '10 mg', 'frequency': 'BID'} for n in range(20)]
+        chart_patient.insurance_info = {'provider': 'Medicare', 'policy_number': 'X' * 200}
+        chart_patient.save()
+
+        trimmed = api_client.get('/api/patients/')
+        full = api_client.get('/api/patients/?profile=full')
+
+        assert 'insurance_info' in full.data['results'][0]
+        assert len(trimmed.content) * 4 < len(full.content)
+
+    def test_fields_parameter(self, api_client, chart_patient, access_buffer, django_assert_num_queries):
+        """Test ?fields= selects computed fields and loads only their source columns"""
+        with django_assert_num_queries(1) as captured:
+            response = api_client.get('/api/patients/?fields=id,age')
+
+        sql = captured.captured_queries[0]['sql']
+        assert response.data['results'] == [{'id': str(chart_patient.pk), 'age': chart_patient.get_age()}]
+        assert 'date_of_birth' in sql
+        assert 'primary_diagnosis' not in sql
+
+    def test_detail_and_chart_profiles(self, api_client, chart_patient, access_buffer):
+        """Test the detail defaults to the full record and the chart to the chart profile"""
+        detail = api_client.get(f'/api/patients/{chart_patient.pk}/')
+        chart = api_client.get(f'/api/patients/{chart_patient.pk}/chart/')
+        named = api_client.get(f'/api/patients/{chart_patient.pk}/?fields=full_name,length_of_stay')
+
+        assert 'insurance_info' in detail.data
+        assert 'allergies' in chart.data['patient']
+        assert 'insurance_info' not in chart.data['patient']
+        assert named.data == {'full_name': 'Chart Patient', 'length_of_stay': 10}
+
+    @pytest.mark.parametrize('query', ['profile=everything', 'fields=id,ssn'])
+    def test_unknown_selection_is_400(self, api_client, chart_patient, query, access_buffer):
+        """Test unknown profiles and fields are rejected rather than ignored"""
+        assert api_client.get(f'/api/patients/?{query}').status_code == 400
+        assert api_client.get(f'/api/patients/{chart_patient.pk}/?{query}').status_code == 400
+
+
+@pytest.mark.django_db
+class TestPatientUpdate:
+    """Test PATCH on the patient detail endpoint"""
+
+    def test_patch_updates_fields(self, api_client, chart_patient, test_user, access_buffer):
+        """Test a partial update saves, stamps the editor and returns the new ETag"""
+        first = api_client.get(f'/api/patients/{chart_patient.pk}/')
+
+        response = api_client.patch(
+            f'/api/patients/{chart_patient.pk}/', {'precautions': ['fall_risk']}, format='json',
+            HTTP_IF_MATCH=first['ETag'],
+        )
+
+        chart_patient.refresh_from_db()
+        assert response.status_code == 200
+        assert response['ETag'] != first['ETag']
+        assert chart_patient.precautions == ['fall_risk']
+        assert chart_patient.updated_by == test_user
+        assert len(access_buffer) == 2
+
+    def test_patch_requires_access_reason(self, chart_patient, test_user, access_buffer):
+        """Test an update, which returns the full record, needs an access reason like a read"""
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+
+        response = client.patch(f'/api/patients/{chart_patient.pk}/', {'precautions': ['fall_risk']}, format='json')
+
+        chart_patient.refresh_from_db()
+        assert response.status_code == 403
+        assert chart_patient.precautions == []
+        assert len(access_buffer) == 0
+
+    def test_patch_locks_the_row(self, api_client, chart_patient, access_buffer, django_assert_num_queries):
+        """Test the row is read FOR UPDATE where the database supports it"""
+        with django_assert_num_queries(9, exact=False) as captured:
+            api_client.patch(f'/api/patients/{chart_patient.pk}/', {'precautions': ['fall_risk']}, format='json')
+
+        load = next(query['sql'] for query in captured.captured_queries if query['sql'].startswith('SELECT'))
+        assert ('FOR UPDATE' in load) == connection.features.has_select_for_update
+
+    def test_stale_if_match_is_412(self, api_client, chart_patient, access_buffer):
+        """Test an update based on an older version is refused"""
+        response = api_client.patch(
+            f'/api/patients/{chart_patient.pk}/', {'precautions': ['fall_risk']}, format='json',
+            HTTP_IF_MATCH='W/"stale"',
+        )
+
+        chart_patient.refresh_from_db()
+        assert response.status_code == 412
+        assert chart_patient.precautions == []
+
+    def test_model_validation_is_400(self, api_client, chart_patient, access_buffer):
+        """Test full_clean() errors come back as field errors"""
+        response = api_client.patch(
+            f'/api/patients/{chart_patient.pk}/', {'discharge_date': date.today().isoformat()}, format='json',
+        )
+
+        assert response.status_code == 400
+        assert 'discharge_disposition' in response.data
+
+    def test_invalid_patch_leaves_the_transaction_usable(self, api_client, chart_patient, access_buffer):
+        """Test a 400 PATCH rolls back only its savepoint, not a transaction it runs in"""
+        response = api_client.patch(f'/api/patients/{chart_patient.pk}/', {'gender': 'X'}, format='json')
+
+        assert response.status_code == 400
+        assert 'gender' in response.data
+        chart_patient.refresh_from_db()
+        assert chart_patient.gender == Patient.FEMALE
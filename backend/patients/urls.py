@@ -0,0 +1,12 @@
+from django.urls import path
+
+from patients import views
+
+app_name = 'patients'
+
+urlpatterns = [
+    path('', views.PatientListView.as_view(), name='patient-list'),
+    path('<uuid:pk>/', views.PatientDetailView.as_view(), name='patient-detail'),
+    path('<uuid:pk>/chart/', views.PatientChartView.as_view(), name='patient-chart'),
+    path('<uuid:pk>/timeline/', views.PatientTimelineView.as_view(), name='patient-timeline'),
+]
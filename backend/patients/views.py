@@ -1,3 +1,224 @@
-from django.shortcuts import render
+import functools
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework.filters import SearchFilter
+from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
+
+from api.async_views import AsyncAPIView
+from api.concurrency import gather
+from api.conditional import (
+    Validators, collection_version, is_conditional, page_validators, page_version, rows_version,
+)
+from api.fieldsets import SparseFieldsMixin, load_only, select_fields
+from assessments.models import INSTRUMENTS
+from assessments.serializers import SUMMARY_FIELDS, AssessmentSummarySerializer, serialize_assessment
+from audit.access import get_access_reason, record_access
+from patients.models import Patient
+from patients.serializers import PatientSerializer
+
+
+def _serialized_patient(pk, fields):
+    patient = get_object_or_404(load_only(Patient.objects.all(), PatientSerializer, fields, 'updated_at'), pk=pk)
+    return PatientSerializer(patient, fields=fields).data, patient.updated_at
+
+
+def _update_patient(request, pk):
+    """Check If-Match against the locked row and save, so no write lands in between"""
+    with transaction.atomic():
+        try:
+            patient = Patient.objects.select_for_update().get(pk=pk)
+        except Patient.DoesNotExist:
+            raise Http404('No Patient matches the given query.')
+        precondition_failed = _patient_validators(request, pk, patient.updated_at).precondition_failed(request)
+        if precondition_failed is not None:
+            return None, precondition_failed
+
+        serializer = PatientSerializer(patient, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(updated_by=request.user)
+    return patient, Response(serializer.data)
+
+
+def _patient_updated_at(pk):
+    updated_at = Patient.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        raise Http404('No Patient matches the given query.')
+    return updated_at
+
+
+def _patient_validators(request, pk, updated_at, *version):
+    return Validators(request, str(pk), updated_at, *version, last_modified=updated_at)
+
+
+def _instrument_version(model, patient_id):
+    return collection_version(model.objects.filter(patient_id=patient_id))
+
+
+def _instrument_latest(model, patient_id):
+    latest = model.objects.filter(patient_id=patient_id).order_by('-assessment_date', '-created_at').first()
+    return serialize_assessment(latest) if latest is not None else None
+
+
+def _patient_exists(pk):
+    if not Patient.objects.filter(pk=pk).exists():
+        raise Http404('No Patient matches the given query.')
+
+
+def _instrument_timeline(model, patient_id):
+    assessments = list(model.objects.filter(patient_id=patient_id).only(*SUMMARY_FIELDS))
+    return AssessmentSummarySerializer(assessments, many=True).data, rows_version(assessments)
+
+
+class PatientListView(SparseFieldsMixin, ListAPIView):
+    """
+    Patients in name order, keyset paginated, in the `list` profile unless
+    ?profile= or ?fields= say otherwise. The ETag is the page version, so a
+    revalidation costs one page query of a few columns.
+    """
+
+    serializer_class = PatientSerializer
+    default_profile = 'list'
+    # Search only: the keyset order is fixed, so no ?ordering= (OrderingFilter)
+    filter_backends = (SearchFilter,)
+    search_fields = ('last_name', 'first_name', 'medical_record_number')
+    query_budget = {'queries': 5}
+
+    def get_queryset(self):
+        return Patient.objects.order_by('last_name', 'first_name', 'id')
+
+    def list(self, request, *args, **kwargs):
+        reason = get_access_reason(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_conditional(request):
+            not_modified = page_validators(self, queryset).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        page = self.paginate_queryset(self.load_only(queryset, 'updated_at'))
+        validators = Validators(request, *page_version(self.paginator, page))
+        for patient in page:
+            record_access(request, patient.pk, reason)
+        return validators.apply(self.get_paginated_response(self.get_serializer(page, many=True).data))
+
+
+class PatientDetailView(AsyncAPIView):
+    """
+    A patient's record (all of it unless ?profile= or ?fields= say
+    otherwise), revalidated by (id, updated_at). PATCH updates some fields
+    and, like a read, needs an access reason; send If-Match with the
+    record's ETag to refuse overwriting a newer version (412). The row is
+    locked from the If-Match check to the save.
+    """
+
+    # PATCH: locked load, full_clean()'s unique and FK checks, update, audit outbox, sync change, and a
+    # savepoint and its release when nested in a transaction (an atomic batch)
+    query_budget = {'queries': 9}
+
+    async def get(self, request, pk):
+        reason = get_access_reason(request)
+        fields = select_fields(PatientSerializer, request)
+        if is_conditional(request):
+            updated_at = await sync_to_async(_patient_updated_at)(pk)
+            not_modified = _patient_validators(request, pk, updated_at).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        try:
+            patient = await load_only(Patient.objects.all(), PatientSerializer, fields, 'updated_at').aget(pk=pk)
+        except Patient.DoesNotExist:
+            raise Http404('No Patient matches the given query.')
+        await sync_to_async(record_access)(request, patient.pk, reason)
+        validators = _patient_validators(request, pk, patient.updated_at)
+        return validators.apply(Response(PatientSerializer(patient, fields=fields).data))
+
+    async def patch(self, request, pk):
+        reason = get_access_reason(request)
+        patient, response = await sync_to_async(_update_patient)(request, pk)
+        if patient is None:
+            return response
+        await sync_to_async(record_access)(request, patient.pk, reason)
+        return _patient_validators(request, pk, patient.updated_at).apply(response)
+
+
+class PatientChartView(AsyncAPIView):
+    """
+    What a chart open shows: the patient record (`chart` profile by
+    default) plus, per instrument, the latest assessment and how many there
+    are. The patient row and the
+    instrument tables are queried concurrently. A revalidation first
+    queries only the patient's updated_at and each instrument's version.
+    """
+
+    query_budget = {'queries': 10}
+
+    async def get(self, request, pk):
+        reason = get_access_reason(request)
+        fields = select_fields(PatientSerializer, request, default_profile='chart')
+        versions = None
+        if is_conditional(request):
+            updated_at, *versions = await gather(
+                request,
+                functools.partial(_patient_updated_at, pk),
+                *(functools.partial(_instrument_version, model, pk) for model in INSTRUMENTS.values()),
+            )
+            not_modified = _patient_validators(request, pk, updated_at, *versions).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        version_queries = [] if versions else [
+            functools.partial(_instrument_version, model, pk) for model in INSTRUMENTS.values()
+        ]
+        (patient, updated_at), *results = await gather(
+            request,
+            functools.partial(_serialized_patient, pk, fields),
+            *(functools.partial(_instrument_latest, model, pk) for model in INSTRUMENTS.values()),
+            *version_queries,
+        )
+        latest, versions = results[:len(INSTRUMENTS)], versions or results[len(INSTRUMENTS):]
+        await sync_to_async(record_access)(request, pk, reason)
+        validators = _patient_validators(request, pk, updated_at, *versions)
+        return validators.apply(Response({
+            'patient': patient,
+            'assessments': {
+                key: {'latest': assessment, 'count': count}
+                for key, assessment, (count, _) in zip(INSTRUMENTS, latest, versions)
+            },
+        }))
+
+
+class PatientTimelineView(AsyncAPIView):
+    """Every assessment of a patient across instruments, oldest first, in summary form"""
+
+    query_budget = {'queries': 9}
+
+    async def get(self, request, pk):
+        reason = get_access_reason(request)
+        if is_conditional(request):
+            _, *versions = await gather(
+                request,
+                functools.partial(_patient_exists, pk),
+                *(functools.partial(_instrument_version, model, pk) for model in INSTRUMENTS.values()),
+            )
+            not_modified = Validators(request, str(pk), *versions).not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            histories = await gather(
+                request, *(functools.partial(_instrument_timeline, model, pk) for model in INSTRUMENTS.values()))
+        else:
+            _, *histories = await gather(
+                request,
+                functools.partial(_patient_exists, pk),
+                *(functools.partial(_instrument_timeline, model, pk) for model in INSTRUMENTS.values()),
+            )
+        # ISO dates and timestamps sort chronologically as strings
+        assessments = sorted(
+            (assessment for history, _ in histories for assessment in history),
+            key=lambda assessment: (assessment['assessment_date'], assessment['created_at']),
+        )
+        await sync_to_async(record_access)(request, pk, reason)
+        validators = Validators(request, str(pk), *(version for _, version in histories))
+        return validators.apply(Response({'patient': pk, 'assessments': assessments}))
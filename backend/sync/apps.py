@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sync'
+
+    def ready(self):
+        from django.apps import apps
+        from django.db.models.signals import post_delete
+        from sync.changes import record_delete
+        from sync.mixins import SyncTrackedMixin
+
+        # Deletes go through the Collector, which sends post_delete inside its transaction
+        for model in apps.get_models():
+            if issubclass(model, SyncTrackedMixin):
+                post_delete.connect(record_delete, sender=model, dispatch_uid=f'sync_delete_{model._meta.label}')
@@ -0,0 +1,104 @@
+"""
+The sync change log: capture and reading.
+
+Every save or delete of a synced model inserts one Change row in the same
+transaction. Change ids come from a sequence, but a transaction that took
+id 10 may commit after one that took id 11, so a reader that only
+remembered the last id it saw could skip id 10 for good. On PostgreSQL each
+row therefore also stores its writer's transaction id, and readers are only
+served rows of transactions older than their snapshot's xmin (every one of
+them has finished), in (txid, id) order. Any row committed later carries a
+txid at or above that horizon, i.e. after every position already served.
+Other databases serialize writers, so txid is 0 there and the order is id.
+"""
+from django.db import connections, router
+from django.db.models import BigIntegerField, Exists, Func, OuterRef, Q
+
+from sync.models import Change
+
+# PostgreSQL channel a trigger notifies, with the schema as payload, when a
+# transaction commits changes that carry a live event (sync.events)
+NOTIFY_CHANNEL = 'sync_changes'
+
+
+class CurrentTransactionId(Func):
+    """The writing transaction's id on PostgreSQL, 0 elsewhere"""
+
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return '0', []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class _SnapshotHorizon(Func):
+    # Every transaction below this id has committed or rolled back
+    output_field = BigIntegerField()
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+
+class _OwnTransactionId(Func):
+    # NULL unless the reading transaction has written itself
+    output_field = BigIntegerField()
+    template = 'pg_current_xact_id_if_assigned()::text::bigint'
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def record(model, pks, action, using=None, events=None):
+    """
+    Log `action` on the rows of `model` with primary keys `pks`, in the current transaction.
+
+    `events` maps primary keys to the live event (sync.events) of their change.
+    """
+    using = using or router.db_for_write(model)
+    events = events or {}
+    Change.objects.using(using).bulk_create([
+        Change(txid=CurrentTransactionId(), model=label(model), object_id=pk, action=action, event=events.get(pk, ''))
+        for pk in pks
+    ])
+
+
+def record_saves(model, pks, using=None, events=None):
+    """For writes that bypass save() (bulk_create, COPY, queryset update())"""
+    record(model, pks, Change.SAVE, using, events)
+
+
+def record_delete(sender, instance, using, **kwargs):
+    """post_delete receiver: log a tombstone inside the Collector's transaction"""
+    record(sender, [instance.pk], Change.DELETE, using)
+
+
+def changes_after(position, using=None):
+    """
+    Committed changes after `position` ((txid, id), or None for all), in log order.
+
+    A transaction that wrote changes itself also reads its own.
+    """
+    changes = Change.objects.using(using).order_by('txid', 'id')
+    if connections[changes.db].vendor == 'postgresql':
+        changes = changes.filter(Q(txid__lt=_SnapshotHorizon()) | Q(txid=_OwnTransactionId()))
+    if position is not None:
+        txid, id = position
+        changes = changes.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=id))
+    return changes
+
+
+def latest_position(using=None):
+    """Position of the newest committed change, (0, 0) for an empty log"""
+    return changes_after(None, using).reverse().values_list('txid', 'id').first() or (0, 0)
+
+
+def compact(using=None):
+    """Delete changes superseded by a later change to the same row; return how many"""
+    # Later in log order, so a client that has not read a deleted change has not read its successor either
+    later = Change.objects.using(using).filter(
+        Q(txid__gt=OuterRef('txid')) | Q(txid=OuterRef('txid'), id__gt=OuterRef('id')),
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+    )
+    deleted, _ = Change.objects.using(using).filter(Exists(later)).delete()
+    return deleted
@@ -0,0 +1,366 @@
+"""
+Live events for dashboards (server-sent events).
+
+    GET /api/sync/events/
+    Accept: text/event-stream
+
+streams the tenant's assessment and patient events as they commit:
+
+    id: <token>
+    event: assessment.created
+    data: {"id": "...", "instrument": "fim", "patient": "...", "assessment_date": "2026-10-19",
+           "total_score": 84, "is_complete": true, "updated_at": "..."}
+
+Event types are assessment.created (an assessment saved complete, or a
+draft finalized), assessment.updated (complete assessments only; drafts
+send nothing), patient.admitted and patient.discharged. Payloads carry ids, dates and scores, never names:
+clients load what they display through the regular endpoints. Every event
+sent is still recorded as a PHI access of its patient, so the stream needs
+an X-PHI-Access-Reason like any other PHI request (EventSource cannot send
+headers; use a fetch()-based client).
+
+The stream starts with a `retry:` hint and sends a `: heartbeat` comment
+every EVENT_STREAM_HEARTBEAT seconds of silence, which keeps proxies from
+timing it out. A reconnecting client sends the id of the last event it got
+as Last-Event-ID (or ?last_event_id=) and is sent what it missed, read from
+the sync change log, before live events resume. If it missed more than
+EVENT_STREAM_REPLAY_LIMIT events, or its id is not valid, it gets one
+`reset` event instead and should reload the panel.
+
+Past the replay on connect, streams do not query the database. One
+EventHub per process follows each tenant's change log on a background
+thread and fans the new events out to that tenant's open streams. On
+PostgreSQL it wakes up on the NOTIFY sent by a trigger on the log
+(sync/migrations/0004_notify_trigger.py), on a connection of its own
+outside the connection pool, and polls every EVENT_STREAM_POLL_INTERVAL seconds as a safety net; other
+databases are polled at that interval. Each stream has a queue of at most
+EVENT_STREAM_QUEUE_SIZE events: a client too slow to keep up is
+disconnected rather than buffered without bound, and catches up from the
+log when it reconnects.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.async_views import AsyncAPIView
+from api.concurrency import request_schema
+from assessments.models import INSTRUMENTS
+from audit.access import get_access_reason, record_access
+from organizations.utils import is_multi_tenant, schema_context
+from patients.models import Patient
+from sync.changes import NOTIFY_CHANNEL, changes_after, label, latest_position
+from sync.views import decode_token, encode_token
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('assessment.created', 'assessment.updated', 'patient.admitted', 'patient.discharged')
+
+# Change log entries the hub reads per query
+POLL_BATCH_SIZE = 500
+
+# Columns sent for each model's events: label -> (instrument key or None, columns)
+_ASSESSMENT_COLUMNS = ('id', 'patient_id', 'assessment_date', 'total_score', 'is_complete', 'updated_at')
+_PATIENT_COLUMNS = ('id', 'admission_date', 'discharge_date', 'updated_at')
+_SOURCES = {
+    label(Patient): (Patient, None, _PATIENT_COLUMNS),
+    **{label(model): (model, key, _ASSESSMENT_COLUMNS) for key, model in INSTRUMENTS.items()},
+}
+
+# A stream's payload: `position` in the change log, `patient_id` for access
+# logging and the encoded SSE `frame`, built once however many streams send it
+Event = namedtuple('Event', 'position patient_id frame')
+
+
+# =============================================================================
+# EVENTS
+# =============================================================================
+
+def frame(event_type, event_id, data):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n'
+
+
+def events_after(position, until=None):
+    """Change log entries with a live event after `position` (up to `until` included), in log order"""
+    entries = changes_after(position).exclude(event='')
+    if until is not None:
+        txid, id = until
+        entries = entries.filter(Q(txid__lt=txid) | Q(txid=txid, id__lte=id))
+    return entries.values_list('txid', 'id', 'model', 'object_id', 'event')
+
+
+def describe(entries):
+    """Events for change log entries, in order; rows deleted since are left out. Run in the tenant's schema."""
+    ids = {}
+    for _, _, model_label, object_id, _ in entries:
+        ids.setdefault(model_label, set()).add(object_id)
+
+    rows = {}
+    for model_label, object_ids in ids.items():
+        if model_label in _SOURCES:
+            model, _, columns = _SOURCES[model_label]
+            rows[model_label] = {row['id']: row for row in model.objects.filter(pk__in=object_ids).values(*columns)}
+
+    events = []
+    for txid, id, model_label, object_id, event_type in entries:
+        row = rows.get(model_label, {}).get(object_id)
+        if row is None:
+            continue
+        _, instrument, _ = _SOURCES[model_label]
+        if instrument is None:
+            patient_id, data = row['id'], row
+        else:
+            patient_id = row['patient_id']
+            data = {
+                'id': row['id'], 'instrument': instrument, 'patient': patient_id,
+                **{name: value for name, value in row.items() if name not in ('id', 'patient_id')},
+            }
+        events.append(Event((txid, id), patient_id, frame(event_type, encode_token((txid, id)), data)))
+    return events
+
+
+# =============================================================================
+# HUB
+# =============================================================================
+
+class Subscriber:
+    """One open stream: a bounded queue the hub fills from its thread"""
+
+    def __init__(self, loop, max_pending=None):
+        self.loop = loop
+        self.queue = asyncio.Queue(max_pending or settings.EVENT_STREAM_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, events):
+        """Queue `events` (from any thread); past the limit the stream is marked overflowed"""
+        self.loop.call_soon_threadsafe(self._put, events)
+
+    def _put(self, events):
+        for event in events:
+            if self.overflowed:
+                return
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflowed = True
+
+
+class _Tenant:
+    def __init__(self, position):
+        self.position = position
+        self.subscribers = set()
+
+
+class EventHub:
+    """Follows the change log of every tenant with open streams and fans new events out to them"""
+
+    def __init__(self, poll_interval=None):
+        self.poll_interval = (
+            settings.EVENT_STREAM_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self._tenants = {}
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, schema_name, subscriber):
+        """Register `subscriber` for the tenant's events; return the log position it is sent events after"""
+        with self._lock:
+            tenant = self._tenants.get(schema_name)
+        if tenant is None:
+            # First stream of the tenant: it starts at the end of the log
+            with schema_context(schema_name):
+                position = latest_position()
+        with self._lock:
+            tenant = self._tenants.setdefault(schema_name, _Tenant(position if tenant is None else tenant.position))
+            tenant.subscribers.add(subscriber)
+            position = tenant.position
+        if self.poll_interval > 0:
+            self._ensure_thread()
+        return position
+
+    def unsubscribe(self, schema_name, subscriber):
+        with self._lock:
+            tenant = self._tenants.get(schema_name)
+            if tenant is None:
+                return
+            tenant.subscribers.discard(subscriber)
+            if not tenant.subscribers:
+                del self._tenants[schema_name]
+
+    def poll(self, schema_names=None):
+        """Send the events committed since the last poll to the streams of `schema_names` (None: all); return how many"""
+        with self._poll_lock:
+            with self._lock:
+                targets = [
+                    (schema_name, tenant.position) for schema_name, tenant in self._tenants.items()
+                    if schema_names is None or schema_name in schema_names
+                ]
+            sent = 0
+            for schema_name, position in targets:
+                sent += self._poll_tenant(schema_name, position)
+            return sent
+
+    def _poll_tenant(self, schema_name, position):
+        sent = 0
+        while True:
+            with schema_context(schema_name):
+                entries = list(events_after(position)[:POLL_BATCH_SIZE])
+                events = describe(entries) if entries else []
+            if not entries:
+                return sent
+
+            position = entries[-1][:2]
+            with self._lock:
+                tenant = self._tenants.get(schema_name)
+                if tenant is None:
+                    return sent
+                tenant.position = position
+                subscribers = list(tenant.subscribers)
+            for subscriber in subscribers:
+                try:
+                    subscriber.deliver(events)
+                except RuntimeError:  # Its event loop is closed: the stream is gone
+                    self.unsubscribe(schema_name, subscriber)
+            sent += len(events)
+            if len(entries) < POLL_BATCH_SIZE:
+                return sent
+
+    def _listen(self):
+        """A connection LISTENing on the change log's channel; None off PostgreSQL"""
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        if wrapper.vendor != 'postgresql':
+            return None
+        # A plain driver connection: the backend's get_new_connection() would take a slot of
+        # the connection pool (organizations.postgresql_backend) for as long as the hub runs
+        listener = wrapper.Database.connect(**wrapper.get_connection_params())
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+        return listener
+
+    def _wait(self, listener):
+        """Sleep until notified or the poll interval passes; return the schemas to poll (None: all)"""
+        if listener is None:
+            time.sleep(self.poll_interval)
+            return None
+        readable, _, _ = select.select([listener], [], [], self.poll_interval)
+        if not readable:
+            return None
+        listener.poll()
+        schema_names = {notify.payload for notify in listener.notifies}
+        listener.notifies.clear()
+        # Single-tenant streams are keyed by None, whatever the payload
+        return schema_names if is_multi_tenant() else None
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='live-events', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        listener = None
+        while True:
+            try:
+                if listener is None:
+                    listener = self._listen()
+                self.poll(self._wait(listener))
+            except Exception:
+                logger.exception('Live event poll failed')
+                if listener is not None:
+                    listener.close()
+                    listener = None
+                time.sleep(self.poll_interval)
+            finally:
+                close_old_connections()
+
+
+event_hub = EventHub()
+
+
+# =============================================================================
+# STREAM
+# =============================================================================
+
+def _replay(schema_name, last_event_id, until):
+    """Events after `last_event_id` up to `until`, and a reset frame instead if there are too many or the id is bad"""
+    limit = settings.EVENT_STREAM_REPLAY_LIMIT
+    with schema_context(schema_name):
+        try:
+            position = decode_token(last_event_id)
+        except ValidationError:
+            position = None
+        if position is not None:
+            entries = list(events_after(position, until)[:limit + 1])
+            if len(entries) <= limit:
+                return describe(entries), None
+        return [], frame('reset', encode_token(until), {})
+
+
+def _record_access(request, schema_name, patient_ids, reason):
+    with schema_context(schema_name):
+        for patient_id in patient_ids:
+            record_access(request, patient_id, reason)
+
+
+class EventStreamView(AsyncAPIView):
+    """Server-sent stream of the tenant's live events (see sync.events)"""
+
+    def perform_content_negotiation(self, request, force=False):
+        # Clients ask for text/event-stream; errors still go out as JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    async def get(self, request):
+        reason = get_access_reason(request)
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        response = StreamingHttpResponse(
+            self.stream(request, request_schema(request), last_event_id, reason),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+        return response
+
+    async def stream(self, request, schema_name, last_event_id, reason):
+        # Subscribed while iterated only: a response that is never sent (e.g. in a batch) leaves nothing behind
+        hub = event_hub
+        subscriber = Subscriber(asyncio.get_running_loop())
+        position = await sync_to_async(hub.subscribe)(schema_name, subscriber)
+        try:
+            yield f'retry: {settings.EVENT_STREAM_RETRY}\n\n'
+            events = []
+            if last_event_id:
+                events, reset = await sync_to_async(_replay)(schema_name, last_event_id, position)
+                if reset is not None:
+                    yield reset
+            while True:
+                if events:
+                    await sync_to_async(_record_access)(
+                        request, schema_name, {event.patient_id for event in events}, reason)
+                    yield ''.join(event.frame for event in events)
+                if subscriber.overflowed and subscriber.queue.empty():
+                    return  # Fell behind: the client reconnects with Last-Event-ID and replays
+                try:
+                    events = [await asyncio.wait_for(subscriber.queue.get(), settings.EVENT_STREAM_HEARTBEAT)]
+                except asyncio.TimeoutError:
+                    events = []
+                    yield ': heartbeat\n\n'
+                    continue
+                while not subscriber.queue.empty():
+                    events.append(subscriber.queue.get_nowait())
+        finally:
+            hub.unsubscribe(schema_name, subscriber)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from organizations.utils import get_tenant_schemas, schema_context
+from sync.changes import compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete sync changes superseded by a later change to the same record. '
+        'Clients behind them still get the later change, so nothing is lost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Only compact these tenant schemas (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for schema_name in get_tenant_schemas(options['schemas']):
+            with schema_context(schema_name):
+                total += compact()
+        self.stdout.write(f'Deleted {total} superseded sync changes')
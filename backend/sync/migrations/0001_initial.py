@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(default=0, help_text="Writing transaction's id (PostgreSQL), 0 on other databases and for seeded rows")),
+                ('model', models.CharField(help_text='app_label.model_name of the changed row', max_length=100)),
+                ('object_id', models.UUIDField(help_text='Primary key of the changed row')),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Save'), (2, 'Delete')])),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Change',
+                'verbose_name_plural': 'Sync Changes',
+                'db_table': 'sync_changes',
+                'indexes': [models.Index(fields=['txid', 'id'], name='sync_change_txid_b55203_idx'), models.Index(fields=['model', 'object_id'], name='sync_change_model_1958f0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.utils import timezone
+
+SYNCED_MODELS = (
+    ('patients', 'patient'),
+    ('assessments', 'katzadlassessment'),
+    ('assessments', 'barthelassessment'),
+    ('assessments', 'fimassessment'),
+)
+
+
+def seed_changes(apps, schema_editor):
+    """Log a save for every existing row, so a first sync downloads them"""
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        for app_label, model_name in SYNCED_MODELS:
+            table = apps.get_model(app_label, model_name)._meta.db_table
+            cursor.execute(
+                f'INSERT INTO {quote("sync_changes")} (txid, model, object_id, action, changed_at) '
+                f'SELECT 0, %s, id, 1, %s FROM {quote(table)}',
+                [f'{app_label}.{model_name}', now],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('patients', '0002_patient_keyset_index'),
+        ('assessments', '0002_assessment_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0002_seed_existing_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='event',
+            field=models.CharField(blank=True, default='', help_text='Live event type pushed to dashboards (sync.events), blank for changes they are not sent', max_length=40),
+        ),
+    ]
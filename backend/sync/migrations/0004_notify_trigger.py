@@ -0,0 +1,63 @@
+"""
+Notify the live event hub (sync.events) of new events.
+
+PostgreSQL only: an AFTER INSERT trigger on the change log sends one NOTIFY
+on the 'sync_changes' channel (sync.changes.NOTIFY_CHANNEL), with the
+schema name as payload, for every statement that logs changes carrying a
+live event. PostgreSQL delivers it when the transaction commits and merges
+duplicates, so a transaction is announced once however many rows it wrote.
+Other databases have no notifications; the hub polls the log there.
+"""
+from django.db import migrations
+
+# As of this migration; renaming the channel later needs a migration that replaces the function
+NOTIFY_CHANNEL = 'sync_changes'
+FUNCTION = 'sync_changes_notify'
+TRIGGER = 'sync_changes_notify'
+
+FUNCTION_BODY = f"""
+BEGIN
+    IF EXISTS (SELECT 1 FROM inserted WHERE event <> '') THEN
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', current_schema());
+    END IF;
+    RETURN NULL;
+END
+"""
+
+
+def create_trigger(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    quote = connection.ops.quote_name
+    table = apps.get_model('sync', 'Change')._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE FUNCTION {quote(FUNCTION)}() RETURNS trigger LANGUAGE plpgsql AS $${FUNCTION_BODY}$$')
+        cursor.execute(
+            f'CREATE TRIGGER {quote(TRIGGER)} AFTER INSERT ON {quote(table)} '
+            f'REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION {quote(FUNCTION)}()'
+        )
+
+
+def drop_trigger(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    quote = connection.ops.quote_name
+    table = apps.get_model('sync', 'Change')._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER {quote(TRIGGER)} ON {quote(table)}')
+        cursor.execute(f'DROP FUNCTION {quote(FUNCTION)}()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0003_change_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,32 @@
+from django.db import router, transaction
+
+from sync import changes
+from sync.models import Change
+
+
+class SyncTrackedMixin:
+    """
+    Record every save of the model in the sync change log.
+
+    Mix into a concrete model with a UUID primary key (before models.Model).
+    The Change row is inserted in the same transaction as the row itself;
+    deletes are recorded by a post_delete receiver (SyncConfig.ready()).
+    Queryset update() and bulk_create() bypass save() and must call
+    sync.changes.record_saves() themselves.
+
+    Saves that dashboards are told about live name their event in
+    change_event().
+    """
+
+    def change_event(self, created):
+        """Live event type of this save (see sync.events), '' for none"""
+        return ''
+
+    def save_base(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        kwargs['using'] = using
+        # Before saving: the audit mixin refreshes its snapshot of the loaded values
+        event = self.change_event(self._state.adding)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save_base(*args, **kwargs)
+            changes.record(type(self), [self.pk], Change.SAVE, using, {self.pk: event})
@@ -0,0 +1,63 @@
+from django.db import models
+
+
+class Change(models.Model):
+    """
+    One saved or deleted row of a synced model.
+
+    Rows are inserted in the same transaction as the change itself. Clients
+    read them in (txid, id) order: `id` is the insert sequence and `txid`
+    the writing transaction's id on PostgreSQL (0 elsewhere), which lets the
+    reader hold back changes of transactions that may still commit (see
+    sync.changes.changes_after()).
+    """
+
+    SAVE = 1
+    DELETE = 2
+    ACTION_CHOICES = [
+        (SAVE, 'Save'),
+        (DELETE, 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    txid = models.BigIntegerField(
+        default=0,
+        help_text="Writing transaction's id (PostgreSQL), 0 on other databases and for seeded rows"
+    )
+
+    model = models.CharField(
+        max_length=100,
+        help_text="app_label.model_name of the changed row"
+    )
+
+    object_id = models.UUIDField(
+        help_text="Primary key of the changed row"
+    )
+
+    action = models.PositiveSmallIntegerField(
+        choices=ACTION_CHOICES
+    )
+
+    event = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        help_text="Live event type pushed to dashboards (sync.events), blank for changes they are not sent"
+    )
+
+    changed_at = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        db_table = 'sync_changes'
+        verbose_name = 'Sync Change'
+        verbose_name_plural = 'Sync Changes'
+        indexes = [
+            models.Index(fields=['txid', 'id']),
+            models.Index(fields=['model', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_action_display()} {self.model} {self.object_id}'
@@ -0,0 +1,614 @@
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from assessments.models import BarthelAssessment, KatzADLAssessment
+from audit import access
+from patients import synthetic
+from patients.models import Patient
+from sync import events
+from sync.changes import changes_after, compact
+from sync.models import Change
+from users.models import User
+
+
+@pytest.fixture
+def test_user(db):
+    return User.objects.create_user(
+        email='therapist@example.com',
+        password='testpass123',
+        username='therapist1',
+        first_name='Jane',
+        last_name='Doe',
+        role=User.OT,
+        license_number='OT123',
+        license_expiry_date=date.today() + timedelta(days=365)
+    )
+
+
+@pytest.fixture
+def access_buffer(monkeypatch):
+    buffer = access.AccessLogBuffer(max_size=100, flush_interval=0)
+    monkeypatch.setattr(access, 'access_log_buffer', buffer)
+    return buffer
+
+
+@pytest.fixture
+def sync_client(test_user, access_buffer):
+    client = APIClient(HTTP_X_PHI_ACCESS_REASON='treatment')
+    client.force_authenticate(test_user)
+    return client
+
+
+def make_patient(user, mrn):
+    return Patient.objects.create(
+        medical_record_number=mrn,
+        first_name='Test',
+        last_name=mrn,
+        date_of_birth=date(1950, 1, 1),
+        gender=Patient.MALE,
+        primary_diagnosis='Stroke',
+        admission_date=date.today() - timedelta(days=3),
+        created_by=user,
+    )
+
+
+def make_barthel(patient, user, score=5):
+    return BarthelAssessment.objects.create(
+        patient=patient, assessed_by=user, assessment_date=date.today(),
+        **dict.fromkeys(synthetic.BARTHEL_ITEMS, score),
+    )
+
+
+def log(model=None):
+    changes = Change.objects.order_by('txid', 'id')
+    if model is not None:
+        changes = changes.filter(model=model._meta.label_lower)
+    return list(changes.values_list('object_id', 'action'))
+
+
+def pull(client, since=None, **params):
+    if since:
+        params['since'] = since
+    return client.get('/api/sync/changes/', params)
+
+
+def patient_record(**overrides):
+    return {
+        'id': str(uuid.uuid4()), 'medical_record_number': 'OFF001', 'first_name': 'Offline', 'last_name': 'Patient',
+        'date_of_birth': '1950-01-01', 'gender': Patient.FEMALE, 'primary_diagnosis': 'Stroke',
+        'admission_date': (date.today() - timedelta(days=2)).isoformat(), **overrides,
+    }
+
+
+def barthel_record(patient_id, **overrides):
+    return {
+        'id': str(uuid.uuid4()), 'patient': str(patient_id), 'assessment_date': date.today().isoformat(),
+        **dict.fromkeys(synthetic.BARTHEL_ITEMS, 5), **overrides,
+    }
+
+
+@pytest.mark.django_db
+class TestChangeCapture:
+    """Saves and deletes of synced models are logged in their own transaction"""
+
+    def test_save_and_delete_are_logged(self, test_user):
+        patient = make_patient(test_user, 'S001')
+        patient.first_name = 'Renamed'
+        patient.save()
+        assessment = make_barthel(patient, test_user)
+        assessment_id = assessment.pk
+        assessment.delete()
+
+        assert log(Patient) == [(patient.pk, Change.SAVE), (patient.pk, Change.SAVE)]
+        assert log(BarthelAssessment) == [(assessment_id, Change.SAVE), (assessment_id, Change.DELETE)]
+
+    def test_failed_save_logs_nothing(self, test_user):
+        patient = make_patient(test_user, 'S001')
+        patient.admission_date = date.today() + timedelta(days=5)
+        with pytest.raises(Exception):
+            patient.save()
+        assert log(Patient) == [(patient.pk, Change.SAVE)]
+
+    def test_changes_after_position(self, test_user):
+        first = make_patient(test_user, 'S001')
+        position = changes_after(None).values_list('txid', 'id').last()
+        second = make_patient(test_user, 'S002')
+
+        assert [change.object_id for change in changes_after(None)] == [first.pk, second.pk]
+        assert [change.object_id for change in changes_after(position)] == [second.pk]
+
+    def test_compact_keeps_latest_change_per_row(self, test_user):
+        patient = make_patient(test_user, 'S001')
+        other = make_patient(test_user, 'S002')
+        for name in ('A', 'B', 'C'):
+            patient.first_name = name
+            patient.save()
+        patient_id = patient.pk
+        patient.delete()
+
+        assert compact() == 4
+        assert log(Patient) == [(other.pk, Change.SAVE), (patient_id, Change.DELETE)]
+
+    def test_compact_command(self, test_user):
+        patient = make_patient(test_user, 'S001')
+        patient.save()
+        out = StringIO()
+        call_command('compact_sync_changes', stdout=out)
+        assert 'Deleted 1 superseded sync changes' in out.getvalue()
+
+    def test_synthetic_rows_are_logged(self, test_user):
+        synthetic.generate_schema(3, visits=(2, 2), clinicians=1, seed=1, clinician_ids=[test_user.pk])
+        assert len(log(Patient)) == Patient.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestChanges:
+    """GET /api/sync/changes/: records changed since a sync token"""
+
+    def test_first_sync_returns_everything(self, sync_client, test_user, access_buffer):
+        patient = make_patient(test_user, 'S001')
+        assessment = make_barthel(patient, test_user)
+
+        response = pull(sync_client)
+
+        assert response.status_code == 200
+        assert [record['id'] for record in response.data['changes']['patients']] == [str(patient.pk)]
+        assert [record['id'] for record in response.data['changes']['barthel']] == [str(assessment.pk)]
+        assert response.data['changes']['barthel'][0]['total_score'] == assessment.total_score
+        assert response.data['changes']['katz'] == []
+        assert response.data['deleted'] == {'patients': [], 'katz': [], 'barthel': [], 'fim': []}
+        assert response.data['has_more'] is False
+        assert len(access_buffer) == 1
+
+    def test_token_returns_only_later_changes(self, sync_client, test_user):
+        patient = make_patient(test_user, 'S001')
+        token = pull(sync_client).data['token']
+
+        assert pull(sync_client, token).data['changes']['patients'] == []
+
+        other = make_patient(test_user, 'S002')
+        patient.first_name = 'Renamed'
+        patient.save()
+        response = pull(sync_client, token)
+
+        records = response.data['changes']['patients']
+        assert [record['id'] for record in records] == [str(other.pk), str(patient.pk)]
+        assert records[1]['first_name'] == 'Renamed'
+        assert pull(sync_client, response.data['token']).data['changes']['patients'] == []
+
+    def test_empty_log_token_is_reusable(self, sync_client, test_user):
+        token = pull(sync_client).data['token']
+        assert pull(sync_client, token).data['token'] == token
+
+        patient = make_patient(test_user, 'S001')
+        assert [record['id'] for record in pull(sync_client, token).data['changes']['patients']] == [str(patient.pk)]
+
+    def test_deletes_are_tombstones(self, sync_client, test_user):
+        patient = make_patient(test_user, 'S001')
+        assessment = make_barthel(patient, test_user)
+        assessment_id = assessment.pk
+        token = pull(sync_client).data['token']
+
+        assessment.delete()
+        response = pull(sync_client, token)
+
+        assert response.data['changes']['barthel'] == []
+        assert response.data['deleted']['barthel'] == [str(assessment_id)]
+
+    def test_saved_then_deleted_is_only_a_tombstone(self, sync_client, test_user):
+        patient_id = make_patient(test_user, 'S001').pk
+        Patient.objects.filter(pk=patient_id).delete()
+
+        response = pull(sync_client)
+
+        assert response.data['changes']['patients'] == []
+        assert response.data['deleted']['patients'] == [str(patient_id)]
+
+    def test_pages(self, sync_client, test_user):
+        patients = [make_patient(test_user, f'S{number:03}') for number in range(5)]
+
+        seen, token, pages = [], None, 0
+        while True:
+            response = pull(sync_client, token, limit=2)
+            seen += [record['id'] for record in response.data['changes']['patients']]
+            token, pages = response.data['token'], pages + 1
+            if not response.data['has_more']:
+                break
+
+        assert seen == [str(patient.pk) for patient in patients]
+        assert pages == 3
+
+    def test_invalid_token(self, sync_client):
+        response = pull(sync_client, 'not-a-token')
+        assert response.status_code == 400
+        assert 'since' in response.data
+
+    def test_requires_access_reason(self, test_user, access_buffer):
+        client = APIClient()
+        client.force_authenticate(test_user)
+        assert pull(client).status_code == 403
+
+    def test_requires_authentication(self, db):
+        assert APIClient().get('/api/sync/changes/').status_code == 401
+
+
+@pytest.mark.django_db
+class TestUpload:
+    """POST /api/sync/upload/: saving offline records by client-generated id"""
+
+    def upload(self, client, **resources):
+        return client.post('/api/sync/upload/', resources, format='json')
+
+    def test_create_with_client_ids(self, sync_client, test_user):
+        patient = patient_record()
+        assessment = barthel_record(patient['id'])
+
+        response = self.upload(sync_client, barthel=[assessment], patients=[patient])
+
+        assert response.status_code == 200
+        assert [result['status'] for result in response.data['results']['patients']] == ['created']
+        assert [result['status'] for result in response.data['results']['barthel']] == ['created']
+        created = Patient.objects.get(pk=patient['id'])
+        assert created.created_by == test_user
+        barthel = BarthelAssessment.objects.get(pk=assessment['id'])
+        assert barthel.assessed_by == test_user
+        assert barthel.total_score == 5 * len(synthetic.BARTHEL_ITEMS)
+        assert response.data['results']['barthel'][0]['record']['total_score'] == barthel.total_score
+
+    def test_replay_is_unchanged(self, sync_client):
+        patient = patient_record()
+        self.upload(sync_client, patients=[patient])
+
+        response = self.upload(sync_client, patients=[patient])
+
+        assert response.data['results']['patients'] == [{'id': patient['id'], 'status': 'unchanged'}]
+        assert Patient.objects.count() == 1
+        assert len(log(Patient)) == 1
+
+    def test_update_based_on_current_version(self, sync_client, test_user):
+        patient = patient_record()
+        record = self.upload(sync_client, patients=[patient]).data['results']['patients'][0]['record']
+
+        response = self.upload(sync_client, patients=[{**record, 'first_name': 'Edited'}])
+
+        assert response.data['results']['patients'][0]['status'] == 'updated'
+        updated = Patient.objects.get(pk=patient['id'])
+        assert updated.first_name == 'Edited'
+        assert updated.updated_by == test_user
+
+    def test_stale_update_is_a_conflict(self, sync_client, test_user):
+        existing = make_patient(test_user, 'S001')
+        record = pull(sync_client).data['changes']['patients'][0]
+        existing.first_name = 'Server'
+        existing.save()
+
+        response = self.upload(sync_client, patients=[{**record, 'first_name': 'Client'}])
+
+        result = response.data['results']['patients'][0]
+        assert result['status'] == 'conflict'
+        assert result['record']['first_name'] == 'Server'
+        assert Patient.objects.get(pk=existing.pk).first_name == 'Server'
+
+    def test_complete_assessment_is_a_conflict(self, sync_client, test_user):
+        existing = make_barthel(make_patient(test_user, 'S001'), test_user)
+        record = pull(sync_client).data['changes']['barthel'][0]
+
+        response = self.upload(sync_client, barthel=[{**record, 'feeding': 0}])
+
+        result = response.data['results']['barthel'][0]
+        assert result['status'] == 'conflict'
+        assert result['record']['feeding'] == 5
+        assert BarthelAssessment.objects.get(pk=existing.pk).feeding == 5
+
+    def test_moving_an_assessment_is_a_conflict(self, sync_client, test_user):
+        patient, other = make_patient(test_user, 'S001'), make_patient(test_user, 'S002')
+        draft = BarthelAssessment.objects.create(
+            patient=patient, assessed_by=test_user, assessment_date=date.today(), is_complete=False, feeding=5,
+        )
+        record = pull(sync_client).data['changes']['barthel'][0]
+
+        response = self.upload(sync_client, barthel=[{**record, 'patient': str(other.pk)}])
+
+        result = response.data['results']['barthel'][0]
+        assert result['status'] == 'conflict'
+        assert BarthelAssessment.objects.get(pk=draft.pk).patient_id == patient.pk
+
+    def test_invalid_records(self, sync_client):
+        valid = patient_record(medical_record_number='OFF002')
+        response = self.upload(sync_client, patients=[
+            patient_record(id=None),
+            patient_record(first_name=''),
+            patient_record(admission_date=(date.today() + timedelta(days=3)).isoformat()),
+            valid,
+        ])
+
+        results = response.data['results']['patients']
+        assert [result['status'] for result in results] == ['invalid', 'invalid', 'invalid', 'created']
+        assert 'id' in results[0]['errors']
+        assert 'first_name' in results[1]['errors']
+        assert 'admission_date' in results[2]['errors']
+        assert list(Patient.objects.values_list('pk', flat=True)) == [uuid.UUID(valid['id'])]
+
+    def test_unknown_resource(self, sync_client):
+        response = self.upload(sync_client, visits=[])
+        assert response.status_code == 400
+        assert 'visits' in response.data
+
+    def test_too_many_records(self, sync_client, settings):
+        settings.SYNC_UPLOAD_MAX_RECORDS = 1
+        response = self.upload(sync_client, patients=[patient_record(), patient_record()])
+        assert response.status_code == 400
+
+
+# =============================================================================
+# LIVE EVENTS
+# =============================================================================
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = events.EventHub(poll_interval=0)
+    monkeypatch.setattr(events, 'event_hub', hub)
+    return hub
+
+
+@pytest.fixture
+def stream_client(test_user, access_buffer):
+    client = AsyncClient()
+    client.force_login(test_user)
+    return client
+
+
+def open_stream(client, steps, **headers):
+    """
+    Open the event stream, then run each step (None: nothing) and read the
+    next chunk; return (response, chunks), fewer chunks if the stream ended.
+    """
+    async def run():
+        response = await client.get(
+            '/api/sync/events/', headers={'X-PHI-Access-Reason': 'treatment', 'Accept': 'text/event-stream', **headers})
+        if not response.streaming:
+            return response, []
+        content = aiter(response.streaming_content)
+        chunks = []
+        try:
+            for step in steps:
+                if step is not None:
+                    await sync_to_async(step)()
+                try:
+                    chunks.append((await asyncio.wait_for(anext(content), 5)).decode())
+                except StopAsyncIteration:
+                    break
+        finally:
+            await content.aclose()
+        return response, chunks
+    return async_to_sync(run)()
+
+
+def parse(chunk):
+    """[(event type, id, data)] of the events in an SSE chunk"""
+    parsed = []
+    for block in chunk.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], fields['id'], json.loads(fields['data'])))
+    return parsed
+
+
+def event_types(model):
+    return list(Change.objects.filter(model=model._meta.label_lower).order_by('id').values_list('event', flat=True))
+
+
+@pytest.mark.django_db
+class TestLiveEvents:
+    """Saves log their live event; one hub poll fans new events out to every stream"""
+
+    def test_saves_name_their_events(self, test_user):
+        patient = make_patient(test_user, 'E001')
+        patient.first_name = 'Renamed'
+        patient.save()
+        patient.discharge_date = date.today()
+        patient.discharge_disposition = 'home'
+        patient.save()
+        assessment = make_barthel(patient, test_user)
+        assessment.notes = 'Reviewed'
+        assessment.save()
+        assessment.delete()
+
+        assert event_types(Patient) == ['patient.admitted', '', 'patient.discharged']
+        assert event_types(BarthelAssessment) == ['assessment.created', 'assessment.updated', '']
+
+    def test_drafts_send_no_event_until_finalized(self, test_user):
+        patient = make_patient(test_user, 'E001')
+        draft = BarthelAssessment.objects.create(
+            patient=patient, assessed_by=test_user, assessment_date=date.today(), is_complete=False)
+        draft.feeding = 5
+        draft.save(update_fields=['feeding', 'updated_at'])
+        draft = BarthelAssessment.objects.get(pk=draft.pk)
+        for name in synthetic.BARTHEL_ITEMS:
+            setattr(draft, name, 5)
+        draft.is_complete = True
+        draft.save()
+        draft.notes = 'Reviewed'
+        draft.save()
+
+        assert event_types(BarthelAssessment) == ['', '', 'assessment.created', 'assessment.updated']
+
+    def test_bulk_finalized_draft_is_created(self, sync_client, test_user):
+        patient = make_patient(test_user, 'E001')
+        record = {
+            'id': str(uuid.uuid4()), 'patient': str(patient.pk), 'assessment_date': date.today().isoformat(),
+            'bathing': 1, 'dressing': 1, 'toileting': 1, 'transferring': 1, 'continence': 1, 'feeding': 1,
+        }
+        sync_client.post('/api/assessments/katz/bulk/', {'assessments': [{**record, 'is_complete': False}]},
+                        format='json')
+        sync_client.post('/api/assessments/katz/bulk/', {'assessments': [record]}, format='json')
+
+        assert event_types(KatzADLAssessment) == ['', 'assessment.created']
+
+    def test_one_poll_serves_every_stream(self, test_user, hub, django_assert_num_queries):
+        loop = asyncio.new_event_loop()
+        try:
+            patient = make_patient(test_user, 'E001')
+            subscribers = [events.Subscriber(loop) for _ in range(3)]
+            for subscriber in subscribers:
+                hub.subscribe(None, subscriber)
+            make_barthel(patient, test_user)
+            make_barthel(patient, test_user)
+
+            with django_assert_num_queries(2):  # Change log page, then the assessments it names
+                assert hub.poll() == 2
+            loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+
+        for subscriber in subscribers:
+            assert subscriber.queue.qsize() == 2
+            assert 'event: assessment.created' in subscriber.queue.get_nowait().frame
+
+    def test_slow_stream_overflows_instead_of_buffering(self, test_user, hub):
+        loop = asyncio.new_event_loop()
+        try:
+            patient = make_patient(test_user, 'E001')
+            subscriber = events.Subscriber(loop, max_pending=1)
+            hub.subscribe(None, subscriber)
+            make_barthel(patient, test_user)
+            make_barthel(patient, test_user)
+            hub.poll()
+            loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+
+        assert subscriber.overflowed
+        assert subscriber.queue.qsize() == 1
+
+    def test_last_stream_closing_forgets_tenant(self, hub):
+        subscriber = events.Subscriber(asyncio.new_event_loop())
+        hub.subscribe(None, subscriber)
+        hub.unsubscribe(None, subscriber)
+
+        assert hub._tenants == {}
+        assert hub.poll() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_commit_notifies_listener(self, test_user):
+        from django.db import connection
+        if connection.vendor != 'postgresql':
+            pytest.skip('LISTEN/NOTIFY requires PostgreSQL')
+        hub = events.EventHub(poll_interval=30)
+        listener = hub._listen()
+        try:
+            make_patient(test_user, 'E001')
+            started = time.monotonic()
+            hub._wait(listener)
+            assert time.monotonic() - started < 10
+        finally:
+            listener.close()
+
+    def test_listener_is_opened_outside_the_backend(self, monkeypatch):
+        from django.db import DEFAULT_DB_ALIAS, connections
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        if wrapper.vendor != 'postgresql':
+            pytest.skip('LISTEN/NOTIFY requires PostgreSQL')
+
+        def pooled(*args):
+            raise AssertionError('The listener must not take a (pooled) backend connection')
+
+        monkeypatch.setattr(type(wrapper), 'get_new_connection', pooled)
+        listener = events.EventHub(poll_interval=30)._listen()
+        try:
+            assert not listener.closed
+        finally:
+            listener.close()
+
+
+@pytest.mark.django_db
+class TestEventStream:
+    """Test GET /api/sync/events/"""
+
+    def test_streams_events_as_they_commit(self, stream_client, hub, test_user, access_buffer):
+        patient = make_patient(test_user, 'E001')
+
+        response, chunks = open_stream(stream_client, [None, lambda: (make_barthel(patient, test_user), hub.poll())])
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        assert response['Cache-Control'] == 'no-cache'
+        assert chunks[0] == 'retry: 3000\n\n'
+        [(event_type, _, data)] = parse(chunks[1])
+        assert event_type == 'assessment.created'
+        assert data['instrument'] == 'barthel'
+        assert data['patient'] == str(patient.pk)
+        assert data['total_score'] == 50
+        assert 'first_name' not in data and 'last_name' not in data
+        assert [entry[2] for entry in access_buffer._entries] == [patient.pk]
+        assert hub._tenants == {}  # Closing the stream unsubscribed it
+
+    def test_heartbeat_when_idle(self, stream_client, hub, settings):
+        settings.EVENT_STREAM_HEARTBEAT = 0.05
+
+        _, chunks = open_stream(stream_client, [None, None])
+
+        assert chunks[1] == ': heartbeat\n\n'
+
+    def test_reconnect_replays_missed_events(self, stream_client, hub, test_user):
+        patient = make_patient(test_user, 'E001')
+        _, chunks = open_stream(stream_client, [None, lambda: (make_barthel(patient, test_user), hub.poll())])
+        [(_, last_event_id, _)] = parse(chunks[1])
+        missed = [make_barthel(patient, test_user).pk for _ in range(2)]
+        patient.discharge_date = date.today()
+        patient.discharge_disposition = 'home'
+        patient.save()
+
+        _, chunks = open_stream(stream_client, [None, None], **{'Last-Event-ID': last_event_id})
+
+        replayed = parse(chunks[1])
+        assert [event_type for event_type, _, _ in replayed] == [
+            'assessment.created', 'assessment.created', 'patient.discharged']
+        assert [data['id'] for _, _, data in replayed[:2]] == [str(pk) for pk in missed]
+
+    def test_too_far_behind_gets_reset(self, stream_client, hub, test_user, settings):
+        settings.EVENT_STREAM_REPLAY_LIMIT = 1
+        patient = make_patient(test_user, 'E001')
+        _, chunks = open_stream(stream_client, [None, lambda: (make_barthel(patient, test_user), hub.poll())])
+        [(_, last_event_id, _)] = parse(chunks[1])
+        make_barthel(patient, test_user)
+        make_barthel(patient, test_user)
+
+        _, chunks = open_stream(stream_client, [None, None], **{'Last-Event-ID': last_event_id})
+
+        assert [event_type for event_type, _, _ in parse(chunks[1])] == ['reset']
+
+    def test_invalid_last_event_id_gets_reset(self, stream_client, hub):
+        _, chunks = open_stream(stream_client, [None, None], **{'Last-Event-ID': 'forged'})
+
+        assert [event_type for event_type, _, _ in parse(chunks[1])] == ['reset']
+
+    def test_slow_client_is_disconnected(self, stream_client, hub, test_user, settings):
+        settings.EVENT_STREAM_QUEUE_SIZE = 1
+        patient = make_patient(test_user, 'E001')
+
+        def two_events():
+            make_barthel(patient, test_user)
+            make_barthel(patient, test_user)
+            hub.poll()
+
+        _, chunks = open_stream(stream_client, [None, two_events, None])
+
+        assert len(chunks) == 2  # The queued event, then the stream ends
+        assert len(parse(chunks[1])) == 1
+
+    def test_requires_access_reason(self, stream_client, hub):
+        response = async_to_sync(stream_client.get)('/api/sync/events/')
+
+        assert response.status_code == 403
+        assert hub._tenants == {}
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from sync import events, views
+
+app_name = 'sync'
+
+urlpatterns = [
+    path('changes/', views.ChangesView.as_view(), name='changes'),
+    path('upload/', views.UploadView.as_view(), name='upload'),
+    path('events/', events.EventStreamView.as_view(), name='events'),
+]
@@ -0,0 +1,248 @@
+"""
+Delta sync for offline clients.
+
+    GET /api/sync/changes/?since=<token>&limit=500
+
+returns the patients and assessments saved or deleted since `token` (all of
+them without one), read from the change log rather than by scanning
+updated_at:
+
+    {"changes": {"patients": [...], "katz": [...], "barthel": [...], "fim": [...]},
+     "deleted": {"patients": [<id>, ...], ...},
+     "token": "...", "has_more": false}
+
+Records are the full representations of the detail endpoints. Keep the
+returned token and pass it as `since` next time; while has_more is true,
+ask again straight away. Tokens are opaque, signed and valid for one tenant
+only.
+
+    POST /api/sync/upload/
+    {"patients": [{"id": "<client uuid>", ..., "updated_at": "<as last synced>"}], "fim": [...]}
+
+saves records made or edited offline. Ids are generated by the client, so
+replaying an upload after a lost response is harmless. Each record gets
+one result, in order: `created`, `updated`, `unchanged` (same values as
+the server's), `conflict` (changed on the server since the client's
+updated_at, a complete assessment, or an assessment moved to another
+patient; the server copy is returned as `record`) or `invalid` (with
+`errors`). Records are saved independently, patients first, so new
+assessments may refer to patients created in the same upload.
+"""
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from assessments.models import INSTRUMENTS
+from assessments.serializers import SERIALIZERS
+from audit.access import get_access_reason, record_access
+from organizations.utils import is_multi_tenant
+from patients.models import Patient
+from patients.serializers import PatientSerializer
+from sync.changes import changes_after, label
+from sync.models import Change
+
+# Synced resources: key in requests and responses -> (model, serializer)
+RESOURCES = {
+    'patients': (Patient, PatientSerializer),
+    **{key: (model, SERIALIZERS[key]) for key, model in INSTRUMENTS.items()},
+}
+
+_KEYS_BY_LABEL = {label(model): key for key, (model, _) in RESOURCES.items()}
+
+
+# =============================================================================
+# TOKENS
+# =============================================================================
+
+def _token_salt():
+    # Per tenant: a token issued by one tenant is rejected by every other
+    return f'sync:{connection.schema_name}' if is_multi_tenant() else 'sync'
+
+
+def encode_token(position):
+    return signing.dumps(list(position), salt=_token_salt())
+
+
+def decode_token(token):
+    """Return the (txid, id) log position in `token`, or None for an empty token"""
+    if not token:
+        return None
+    try:
+        txid, id = signing.loads(token, salt=_token_salt())
+        if not isinstance(txid, int) or not isinstance(id, int):
+            raise ValueError
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValidationError({'since': ['Invalid sync token']})
+    return txid, id
+
+
+def _page_size(request):
+    try:
+        limit = int(request.query_params['limit'])
+    except (KeyError, ValueError):
+        return settings.SYNC_PAGE_SIZE
+    return min(limit, settings.SYNC_MAX_PAGE_SIZE) if limit > 0 else settings.SYNC_PAGE_SIZE
+
+
+def _patient_id(record):
+    return record.pk if isinstance(record, Patient) else record.patient_id
+
+
+# =============================================================================
+# PULL
+# =============================================================================
+
+class ChangesView(APIView):
+    """Patients and assessments changed since a sync token (see sync.views)"""
+
+    query_budget = {'queries': 5}  # Change page, then one query per synced model
+
+    def get(self, request):
+        reason = get_access_reason(request)
+        since = request.query_params.get('since')
+        position = decode_token(since)
+        limit = _page_size(request)
+
+        entries = list(
+            changes_after(position).values_list('txid', 'id', 'model', 'object_id', 'action')[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Only the last change to each row matters: the current row is sent
+        latest = {}
+        for _, _, model_label, object_id, action in entries:
+            latest.pop((model_label, object_id), None)
+            latest[(model_label, object_id)] = action
+
+        saved = {key: [] for key in RESOURCES}
+        deleted = {key: [] for key in RESOURCES}
+        for (model_label, object_id), action in latest.items():
+            key = _KEYS_BY_LABEL.get(model_label)
+            if key is not None:
+                (saved if action == Change.SAVE else deleted)[key].append(object_id)
+
+        changes = {}
+        patient_ids = set()
+        for key, (model, serializer_class) in RESOURCES.items():
+            rows = model.objects.in_bulk(saved[key]) if saved[key] else {}
+            # A row deleted by a transaction whose tombstone is not served yet is gone already
+            deleted[key].extend(pk for pk in saved[key] if pk not in rows)
+            records = [rows[pk] for pk in saved[key] if pk in rows]
+            patient_ids.update(_patient_id(record) for record in records)
+            changes[key] = serializer_class(records, many=True).data
+        for patient_id in patient_ids:
+            record_access(request, patient_id, reason)
+
+        if entries:
+            token = encode_token(entries[-1][:2])
+        else:
+            token = since or encode_token((0, 0))
+        return Response({
+            'changes': changes,
+            'deleted': {key: [str(pk) for pk in pks] for key, pks in deleted.items()},
+            'token': token,
+            'has_more': has_more,
+        })
+
+
+# =============================================================================
+# UPLOAD
+# =============================================================================
+
+def _unchanged(instance, values):
+    for name, value in values.items():
+        field = instance._meta.get_field(name)
+        if field.is_relation and value is not None:
+            value = value.pk
+        if getattr(instance, field.attname) != value:
+            return False
+    return True
+
+
+def _save_kwargs(model, user, created):
+    if model is Patient:
+        return {'created_by': user} if created else {'updated_by': user}
+    return {'assessed_by': user} if created else {}
+
+
+def _invalid(record_id, errors):
+    return {'id': record_id, 'status': 'invalid', 'errors': errors}
+
+
+def _refused(instance, values):
+    """Whether an upload may not overwrite `instance`: a complete assessment, or one moved to another patient"""
+    if instance._meta.model is Patient:
+        return False
+    patient = values.get('patient')
+    return instance.is_complete or (patient is not None and patient.pk != instance.patient_id)
+
+
+def apply_record(request, model, serializer_class, data):
+    """Create or update one uploaded record in its own savepoint; return its result"""
+    record_id = data.get('id') if isinstance(data, dict) else None
+    try:
+        pk = uuid.UUID(str(record_id))
+    except ValueError:
+        return _invalid(record_id, {'id': ['A client-generated UUID is required']})
+
+    try:
+        # Locked from the updated_at comparison to the save, so two uploads from one base cannot both pass
+        with transaction.atomic():
+            instance = model.objects.select_for_update().filter(pk=pk).first()
+            serializer = serializer_class(instance, data=data)
+            if not serializer.is_valid():
+                return _invalid(str(pk), serializer.errors)
+
+            if instance is None:
+                status = 'created'
+            elif _unchanged(instance, serializer.validated_data):
+                return {'id': str(pk), 'status': 'unchanged'}
+            else:
+                base = None
+                if data.get('updated_at'):
+                    try:
+                        base = serializers.DateTimeField().to_internal_value(data['updated_at'])
+                    except serializers.ValidationError as error:
+                        return _invalid(str(pk), {'updated_at': error.detail})
+                # Without the updated_at it was based on, an edit cannot be told from a stale copy
+                if base != instance.updated_at or _refused(instance, serializer.validated_data):
+                    record_access(request, _patient_id(instance))
+                    return {'id': str(pk), 'status': 'conflict', 'record': serializer_class(instance).data}
+                status = 'updated'
+
+            record = serializer.save(id=pk, **_save_kwargs(model, request.user, instance is None))
+    except DjangoValidationError as error:
+        return _invalid(str(pk), error.message_dict if hasattr(error, 'error_dict') else {'non_field_errors': error.messages})
+    record_access(request, _patient_id(record))
+    return {'id': str(pk), 'status': status, 'record': serializer.data}
+
+
+class UploadView(APIView):
+    """Save records created or edited offline (see sync.views)"""
+
+    def post(self, request):
+        get_access_reason(request)  # Results carry PHI
+        if not isinstance(request.data, dict):
+            raise ValidationError({'non_field_errors': ['Expected an object of record lists']})
+        unknown = [key for key in request.data if key not in RESOURCES]
+        if unknown:
+            raise ValidationError({key: ['Unknown resource'] for key in unknown})
+        if any(not isinstance(records, list) for records in request.data.values()):
+            raise ValidationError({'non_field_errors': ['Each resource must be a list of records']})
+        if sum(len(records) for records in request.data.values()) > settings.SYNC_UPLOAD_MAX_RECORDS:
+            raise ValidationError({'non_field_errors': [f'At most {settings.SYNC_UPLOAD_MAX_RECORDS} records per upload']})
+
+        results = {
+            key: [apply_record(request, model, serializer_class, data) for data in request.data[key]]
+            for key, (model, serializer_class) in RESOURCES.items()
+            if key in request.data
+        }
+        return Response({'results': results})
@@ -5,6 +5,9 @@ from django.core.validators import RegexValidator, EmailValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
+from audit.mixins import AuditOutboxMixin
+from monitoring import metrics
+from monitoring.instrumentation import timed_section
 
 
 class UserManager(BaseUserManager):
@@ -38,7 +41,7 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(AuditOutboxMixin, AbstractBaseUser, PermissionsMixin):
     """
     Custom user model for healthcare providers and staff.
     Extends AbstractBaseUser for full control over authentication.
@@ -231,6 +234,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    # Audit outbox: activity pings are not changes; secrets are never logged
+    audit_exclude_fields = ('updated_at', 'last_activity')
+    audit_mask_fields = ('password', 'two_factor_secret')
+
     class Meta:
         db_table = 'users'
         ordering = ['last_name', 'first_name']
@@ -268,13 +275,15 @@ class User(AbstractBaseUser, PermissionsMixin):
         if self.email:
             self.email = self.email.lower()
 
+    @timed_section('save')
     def save(self, *args, **kwargs):
         """Override save to run validation and set password_last_changed"""
         # Set password_last_changed on first save or when password changes
         if not self.pk or self.password != User.objects.filter(pk=self.pk).values_list('password', flat=True).first():
             self.password_last_changed = timezone.now()
 
-        self.full_clean()
+        with timed_section('full_clean'):
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def get_full_name(self):
@@ -291,6 +300,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         HIPAA requirement: Lock account after 5 failed attempts.
         """
         self.failed_login_attempts += 1
+        metrics.login_failures.inc(tenant=metrics.current_tenant())
 
         if self.failed_login_attempts >= 5:
             self.lock_account()
@@ -303,6 +313,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.failed_login_attempts = 0
         self.account_locked_until = None
         self.last_login = timezone.now()
+        metrics.login_successes.inc(tenant=metrics.current_tenant())
         self.last_activity = timezone.now()
         # Don't call full_clean() here to avoid validation issues during login
         super(User, self).save(update_fields=['failed_login_attempts', 'account_locked_until',
@@ -314,6 +325,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         Default: 30 minutes (HIPAA recommendation)
         """
         self.account_locked_until = timezone.now() + timedelta(minutes=minutes)
+        metrics.account_lockouts.inc(tenant=metrics.current_tenant())
         # Don't call full_clean() here to avoid validation issues
         super(User, self).save(update_fields=['account_locked_until', 'failed_login_attempts', 'updated_at'])
 
@@ -323,6 +335,7 @@ class User(AbstractBaseUser, PermissionsMixin):
             return False
 
         if timezone.now() < self.account_locked_until:
+            metrics.locked_account_attempts.inc(tenant=metrics.current_tenant())
             return True
 
         # Lock period has expired, clear the lock